@@ -0,0 +1,34 @@
+"""indice para paginacao por DATA e ID
+
+Revision ID: 3b9d2c71e4a8
+Revises: fac59dbb027a
+Create Date: 2025-10-06 10:14:32.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d2c71e4a8'
+down_revision: Union[str, Sequence[str], None] = 'fac59dbb027a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sustenta o ORDER BY DATA DESC, ID DESC da paginacao por cursor.
+    op.create_index(
+        'ix_mercado_gas_data_id',
+        'MERCADO_GAS',
+        ['DATA', 'ID'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_mercado_gas_data_id', table_name='MERCADO_GAS')
@@ -0,0 +1,47 @@
+"""registro de conteudos importados para uploads idempotentes
+
+Revision ID: 5d8e2b7f1a90
+Revises: c7a13e5f9b02
+Create Date: 2025-10-14 11:26:48.207153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e2b7f1a90'
+down_revision: Union[str, Sequence[str], None] = 'c7a13e5f9b02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'REGISTRO_IMPORTACAO_GAS',
+        sa.Column('HASH', sa.String(length=64), nullable=False),
+        sa.Column('TIPO', sa.String(length=20), nullable=False),
+        sa.Column('ARQUIVO', sa.String(length=255), nullable=True),
+        sa.Column('LINHAS_INSERIDAS', sa.Integer(), nullable=False),
+        sa.Column('LINHAS_SUBSTITUIDAS', sa.Integer(), nullable=False),
+        sa.Column('IMPORTACOES', sa.Integer(), nullable=False),
+        sa.Column('IMPORTADO_EM', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('HASH'),
+    )
+    op.add_column('IMPORTACAO_GAS', sa.Column('HASH', sa.String(length=64), nullable=True))
+    op.add_column(
+        'IMPORTACAO_GAS',
+        sa.Column('FORCAR', sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+    op.create_index('ix_IMPORTACAO_GAS_HASH', 'IMPORTACAO_GAS', ['HASH'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_IMPORTACAO_GAS_HASH', table_name='IMPORTACAO_GAS')
+    op.drop_column('IMPORTACAO_GAS', 'FORCAR', mssql_drop_default=True)
+    op.drop_column('IMPORTACAO_GAS', 'HASH')
+    op.drop_table('REGISTRO_IMPORTACAO_GAS')
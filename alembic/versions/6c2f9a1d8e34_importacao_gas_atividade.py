@@ -0,0 +1,28 @@
+"""ultimo sinal de vida das importacoes de MercadoGas
+
+Revision ID: 6c2f9a1d8e34
+Revises: b81d3f6a9c54
+Create Date: 2025-10-17 09:41:26.503817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c2f9a1d8e34'
+down_revision: Union[str, Sequence[str], None] = 'b81d3f6a9c54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('IMPORTACAO_GAS', sa.Column('ATIVIDADE_EM', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('IMPORTACAO_GAS', 'ATIVIDADE_EM')
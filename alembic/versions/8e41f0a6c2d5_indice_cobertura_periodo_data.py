@@ -0,0 +1,51 @@
+"""indice de cobertura para consultas por periodo de DATA
+
+Revision ID: 8e41f0a6c2d5
+Revises: 3b9d2c71e4a8
+Create Date: 2025-10-08 15:02:47.903114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41f0a6c2d5'
+down_revision: Union[str, Sequence[str], None] = '3b9d2c71e4a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Apenas ATUALIZADO_EM: com DATA e ID na chave, o indice cobre versao_periodo
+# (COUNT, MAX(ID), MAX(ATUALIZADO_EM)) e o filtro de linhas atuais das
+# listagens. Incluir as demais colunas faria do indice uma segunda copia de
+# MERCADO_GAS, mantida em cada insercao em massa e em cada substituicao; as
+# leituras de linhas completas fazem seek no periodo e buscam o restante pela
+# chave primaria (key lookup), custo proporcional as linhas do periodo.
+COLUNAS_INCLUIDAS = ['ATUALIZADO_EM']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Os filtros DATA >= x AND DATA < y fazem seek no indice em vez de
+    # percorrer a tabela.
+    op.drop_index('ix_mercado_gas_data_id', table_name='MERCADO_GAS')
+    op.create_index(
+        'ix_mercado_gas_data_id',
+        'MERCADO_GAS',
+        ['DATA', 'ID'],
+        unique=False,
+        mssql_include=COLUNAS_INCLUIDAS,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_mercado_gas_data_id', table_name='MERCADO_GAS')
+    op.create_index(
+        'ix_mercado_gas_data_id',
+        'MERCADO_GAS',
+        ['DATA', 'ID'],
+        unique=False,
+    )
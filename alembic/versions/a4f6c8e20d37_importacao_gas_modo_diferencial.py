@@ -0,0 +1,33 @@
+"""modo e linhas inalteradas das importacoes de MercadoGas
+
+Revision ID: a4f6c8e20d37
+Revises: 5d8e2b7f1a90
+Create Date: 2025-10-15 10:12:37.845216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f6c8e20d37'
+down_revision: Union[str, Sequence[str], None] = '5d8e2b7f1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('IMPORTACAO_GAS', sa.Column('MODO', sa.String(length=20), nullable=True))
+    op.add_column(
+        'IMPORTACAO_GAS',
+        sa.Column('LINHAS_INALTERADAS', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('IMPORTACAO_GAS', 'LINHAS_INALTERADAS', mssql_drop_default=True)
+    op.drop_column('IMPORTACAO_GAS', 'MODO')
@@ -0,0 +1,51 @@
+"""tabela de historico das versoes substituidas de MERCADO_GAS
+
+Revision ID: b81d3f6a9c54
+Revises: e2b95d4c7f18
+Create Date: 2025-10-16 14:05:52.190378
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81d3f6a9c54'
+down_revision: Union[str, Sequence[str], None] = 'e2b95d4c7f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # O ID nao e IDENTITY: cada linha arquivada mantem o ID que tinha em MERCADO_GAS.
+    op.create_table(
+        'MERCADO_GAS_HISTORICO',
+        sa.Column('ID', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('DATA', sa.Date(), nullable=False),
+        sa.Column('PLANILHA', sa.String(length=100), nullable=False),
+        sa.Column('ABA', sa.String(length=100), nullable=False),
+        sa.Column('PRODUTO', sa.String(length=100), nullable=False),
+        sa.Column('LOCAL', sa.String(length=100), nullable=True),
+        sa.Column('EMPRESA', sa.String(length=255), nullable=True),
+        sa.Column('UNIDADE', sa.String(length=20), nullable=False),
+        sa.Column('VALOR', sa.Float(), nullable=False),
+        sa.Column('CRIADO_EM', sa.DateTime(), nullable=True),
+        sa.Column('ATUALIZADO_EM', sa.DateTime(), nullable=False),
+        sa.Column('ARQUIVADO_EM', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('ID'),
+    )
+    op.create_index(
+        'ix_mercado_gas_historico_data_id',
+        'MERCADO_GAS_HISTORICO',
+        ['DATA', 'ID'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_mercado_gas_historico_data_id', table_name='MERCADO_GAS_HISTORICO')
+    op.drop_table('MERCADO_GAS_HISTORICO')
@@ -0,0 +1,48 @@
+"""tabela de importacoes de MercadoGas em segundo plano
+
+Revision ID: c7a13e5f9b02
+Revises: 8e41f0a6c2d5
+Create Date: 2025-10-13 09:41:05.612384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a13e5f9b02'
+down_revision: Union[str, Sequence[str], None] = '8e41f0a6c2d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'IMPORTACAO_GAS',
+        sa.Column('ID', sa.String(length=32), nullable=False),
+        sa.Column('TIPO', sa.String(length=20), nullable=False),
+        sa.Column('ARQUIVO', sa.String(length=255), nullable=True),
+        sa.Column('MOTOR', sa.String(length=20), nullable=True),
+        sa.Column('USUARIO', sa.String(length=50), nullable=True),
+        sa.Column('CAMINHO', sa.String(length=500), nullable=False),
+        sa.Column('FASE', sa.String(length=20), nullable=False),
+        sa.Column('LINHAS_LIDAS', sa.Integer(), nullable=False),
+        sa.Column('LINHAS_INSERIDAS', sa.Integer(), nullable=False),
+        sa.Column('LINHAS_SUBSTITUIDAS', sa.Integer(), nullable=False),
+        sa.Column('ERROS', sa.Text(), nullable=True),
+        sa.Column('TEMPOS', sa.Text(), nullable=True),
+        sa.Column('CRIADO_EM', sa.DateTime(), server_default=sa.text('getdate()'), nullable=True),
+        sa.Column('INICIADO_EM', sa.DateTime(), nullable=True),
+        sa.Column('CONCLUIDO_EM', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('ID'),
+    )
+    op.create_index('ix_IMPORTACAO_GAS_FASE', 'IMPORTACAO_GAS', ['FASE'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_IMPORTACAO_GAS_FASE', table_name='IMPORTACAO_GAS')
+    op.drop_table('IMPORTACAO_GAS')
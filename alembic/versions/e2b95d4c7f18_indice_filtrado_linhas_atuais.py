@@ -0,0 +1,51 @@
+"""indice filtrado das linhas atuais de MERCADO_GAS
+
+Revision ID: e2b95d4c7f18
+Revises: a4f6c8e20d37
+Create Date: 2025-10-16 08:47:19.530641
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b95d4c7f18'
+down_revision: Union[str, Sequence[str], None] = 'a4f6c8e20d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# As dimensoes e VALOR cobrem as agregacoes (GET /api/gas/agregado), que leem
+# so o indice. CRIADO_EM e ATUALIZADO_EM ficam de fora: o retrato completo
+# (GET /api/gas/atuais) os busca pela chave primaria, uma busca por linha
+# atual, sem depender do historico. O indice so guarda as linhas atuais e a
+# substituicao apenas as remove dele.
+COLUNAS_INCLUIDAS = [
+    'PRODUTO',
+    'LOCAL',
+    'EMPRESA',
+    'UNIDADE',
+    'VALOR',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Apenas as linhas atuais entram no indice: o retrato atual e lido sem
+    # percorrer o historico, qualquer que seja o tamanho da tabela.
+    op.create_index(
+        'ix_mercado_gas_atuais',
+        'MERCADO_GAS',
+        ['DATA', 'PLANILHA', 'ABA'],
+        unique=False,
+        mssql_where=sa.text('ATUALIZADO_EM IS NULL'),
+        sqlite_where=sa.text('ATUALIZADO_EM IS NULL'),
+        mssql_include=COLUNAS_INCLUIDAS,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_mercado_gas_atuais', table_name='MERCADO_GAS')
@@ -1,16 +1,75 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import Response
+from bd_pcp.core.cache_leitura import cache_leitura
 from bd_pcp.core.config import settings
-from bd_pcp.core.session import get_db
+from bd_pcp.core.metricas import ColetorEstatisticas, MEDIA_TYPE_PROMETHEUS, MetricasMiddleware, registro
+from bd_pcp.core.security import cache_tokens
+from bd_pcp.core.senhas import pool_senhas
+from bd_pcp.core.session import estatisticas_pool, get_db
 from sqlalchemy import text
-from bd_pcp.routers import gas_rotas, usuario_autenticacao
+from bd_pcp.routers import gas_rotas, monitoramento, usuario_autenticacao
+from bd_pcp.services.gas_artefatos_excel import artefatos_excel
+from bd_pcp.services.gas_parser_paralelo import encerrar_executor
+from bd_pcp.services.importacao_jobs import fila_importacoes
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    # Importacoes gravadas antes de uma reinicializacao e ainda nao iniciadas.
+    try:
+        fila_importacoes.retomar_pendentes()
+    except Exception as e:
+        print("Erro ao retomar importacoes pendentes:", e)
+    # Temporarios de exportacoes Excel interrompidas por uma parada do processo.
+    try:
+        artefatos_excel.remover_temporarios_antigos()
+    except Exception as e:
+        print("Erro ao remover exportacoes Excel incompletas:", e)
+    # Regera em segundo plano os xlsx mensais ja exportados quando o mes e alterado.
+    cache_leitura.ao_invalidar(artefatos_excel.agendar_regeneracao)
+    yield
+    fila_importacoes.encerrar()
+    artefatos_excel.encerrar()
+    encerrar_executor()
+
 
 app = FastAPI(
-    title="API PCP"
+    title="API PCP",
+    lifespan=ciclo_de_vida,
 )
 
+app.add_middleware(MetricasMiddleware)
+
+registro.registrar_coletor(ColetorEstatisticas(
+    "pcp_db_pool", "Pool de conexoes do banco", estatisticas_pool,
+))
+registro.registrar_coletor(ColetorEstatisticas(
+    "pcp_token_cache", "Cache de tokens JWT verificados", cache_tokens.estatisticas,
+))
+registro.registrar_coletor(ColetorEstatisticas(
+    "pcp_gas_cache", "Cache de leituras de MercadoGas", cache_leitura.estatisticas,
+))
+registro.registrar_coletor(ColetorEstatisticas(
+    "pcp_gas_excel", "Exportacoes Excel mensais pre-geradas", artefatos_excel.estatisticas,
+))
+registro.registrar_coletor(ColetorEstatisticas(
+    "pcp_senhas", "Pool de hash de senhas", pool_senhas.estatisticas,
+))
+registro.registrar_coletor(ColetorEstatisticas(
+    "pcp_importacoes", "Fila de importacoes em segundo plano", fila_importacoes.estatisticas,
+))
 
 app.include_router(gas_rotas.router)
 app.include_router(usuario_autenticacao.router)
+app.include_router(monitoramento.router)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metricas():
+    """Metricas da aplicacao no formato texto do Prometheus."""
+    return Response(content=registro.exportar(), media_type=MEDIA_TYPE_PROMETHEUS)
 
 @app.get("/")
 def read_root():
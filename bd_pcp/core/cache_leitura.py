@@ -0,0 +1,266 @@
+"""
+Cache em processo das leituras de MercadoGas (listagens e exportacoes).
+
+Cada resposta e guardada ja serializada, com chave formada pela rota, pelos
+parametros e pela versao dos dados dos meses que a consulta cobre. As
+gravacoes registram na sessao os meses alterados (``registrar_alteracao``) e,
+somente depois do commit, a versao desses meses e incrementada: uma leitura
+iniciada antes do commit guarda o resultado sob a versao antiga, que nenhuma
+consulta posterior volta a usar. Consultas sem periodo usam a versao global,
+incrementada a cada gravacao.
+
+O cache e por processo. Para perceber gravacoes de outros processos (outros
+workers da API, o script de arquivamento), ``sincronizar`` compara a
+assinatura de cada mes no banco (quantidade de linhas, maior ID e maior
+ATUALIZADO_EM) com a ultima vista e invalida os meses que mudaram. A consulta
+roda no maximo uma vez a cada ``GAS_CACHE_VERIFICACAO_SEGUNDOS`` por mes;
+nesse intervalo um acerto nao vai ao banco, e esse e o maior atraso com que
+uma gravacao de outro processo aparece.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from bd_pcp.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Mes = Tuple[int, int]
+# Assinaturas dos meses com linhas no periodo consultado (meses sem linhas ficam de fora).
+ConsultaAssinaturas = Callable[[Optional[date], Optional[date]], Dict[Mes, Hashable]]
+# Periodos maiores que isso usam a versao global em vez da versao de cada mes.
+MAXIMO_MESES_POR_CHAVE = 120
+CHAVE_MESES_ALTERADOS = "cache_leitura_meses_alterados"
+
+
+class CacheLeitura:
+    """
+    Cache LRU de respostas serializadas, limitado pelo total de bytes.
+
+    Entradas maiores que ``capacidade_bytes / 4`` nao sao guardadas, para que
+    uma exportacao grande nao esvazie o cache.
+    """
+
+    def __init__(self, capacidade_bytes: int, ttl: float = 0.0, intervalo_verificacao: float = 0.0):
+        self.capacidade_bytes = capacidade_bytes
+        self.ttl = ttl
+        self.intervalo_verificacao = intervalo_verificacao
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+        self.verificacoes = 0
+        self.alteracoes_externas = 0
+        self._assinaturas: Dict[Mes, Optional[Hashable]] = {}
+        self._verificado_em: Dict[Mes, float] = {}
+        self._verificado_global: Optional[float] = None
+        self._bytes = 0
+        self._geracao = 0
+        self._versoes_mes: Dict[Mes, int] = {}
+        self._itens: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+        self._observadores: List[Callable[[Set[Mes]], None]] = []
+        self._trava = threading.Lock()
+
+    @property
+    def tamanho_maximo_item(self) -> int:
+        return self.capacidade_bytes // 4
+
+    def chave(
+        self,
+        consulta: str,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        **parametros: Any,
+    ) -> Hashable:
+        """
+        Chave da consulta com a versao atual dos dados do periodo semiaberto [data_inicio, data_fim).
+
+        Deve ser obtida antes de consultar o banco.
+        """
+        return (
+            consulta,
+            data_inicio,
+            data_fim,
+            tuple(sorted(parametros.items())),
+            self._versao(data_inicio, data_fim),
+        )
+
+    def obter(self, chave: Hashable) -> Optional[bytes]:
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None or (self.ttl and item[0] + self.ttl <= time.monotonic()):
+                if item is not None:
+                    self._remover(chave)
+                self.falhas += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item[1]
+
+    def guardar(self, chave: Hashable, conteudo: bytes) -> None:
+        if len(conteudo) > self.tamanho_maximo_item:
+            return
+
+        with self._trava:
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (time.monotonic(), conteudo)
+            self._bytes += len(conteudo)
+            while self._bytes > self.capacidade_bytes:
+                self._remover(next(iter(self._itens)))
+
+    def verificacao_pendente(self, data_inicio: Optional[date], data_fim: Optional[date]) -> bool:
+        """Indica se algum mes do periodo (ou, sem periodo, a tabela) precisa ser verificado no banco."""
+        if self.capacidade_bytes <= 0:
+            return False
+        limite = time.monotonic() - self.intervalo_verificacao
+        meses = _meses_do_periodo(data_inicio, data_fim) if data_inicio and data_fim else None
+        with self._trava:
+            if meses is None:
+                return self._verificado_global is None or self._verificado_global <= limite
+            return any(self._verificado_em.get(mes, float("-inf")) <= limite for mes in meses)
+
+    def sincronizar(
+        self,
+        data_inicio: Optional[date],
+        data_fim: Optional[date],
+        consultar: ConsultaAssinaturas,
+    ) -> None:
+        """
+        Invalida os meses do periodo alterados por outros processos.
+
+        ``consultar(data_inicio, data_fim)`` devolve a assinatura de cada mes com
+        linhas (``MercadoGasRepository.assinaturas_por_mes``); sem periodo, ou
+        com mais de MAXIMO_MESES_POR_CHAVE meses, a tabela inteira e verificada.
+        Um mes visto pela primeira vez apenas tem a assinatura registrada. Deve
+        ser chamada antes de ``chave``, so quando ``verificacao_pendente``.
+        """
+        meses = _meses_do_periodo(data_inicio, data_fim) if data_inicio and data_fim else None
+        global_ = meses is None
+        atuais = consultar(None, None) if global_ else consultar(data_inicio, data_fim)
+        agora = time.monotonic()
+
+        with self._trava:
+            verificados = set(self._assinaturas) | set(atuais) if global_ else set(meses)
+            alterados = set()
+            for mes in verificados:
+                if mes in self._assinaturas:
+                    if self._assinaturas[mes] != atuais.get(mes):
+                        alterados.add(mes)
+                elif global_ and self._verificado_global is not None:
+                    # Mes novo na tabela: muda o resultado das consultas sem periodo.
+                    alterados.add(mes)
+                self._assinaturas[mes] = atuais.get(mes)
+                self._verificado_em[mes] = agora
+            if global_:
+                self._verificado_global = agora
+            self.verificacoes += 1
+            if alterados:
+                self.alteracoes_externas += 1
+
+        self.invalidar_meses(alterados)
+
+    def invalidar_meses(self, meses: Iterable[Mes]) -> None:
+        """Nova versao para os meses alterados (e para as consultas sem periodo)."""
+        meses = set(meses)
+        if not meses:
+            return
+        with self._trava:
+            self._geracao += 1
+            for mes in meses:
+                self._versoes_mes[mes] = self._geracao
+            self.invalidacoes += 1
+            observadores = list(self._observadores)
+
+        for observador in observadores:
+            try:
+                observador(meses)
+            except Exception:
+                logger.warning("Falha ao notificar a alteracao dos meses %s", sorted(meses), exc_info=True)
+
+    def ao_invalidar(self, observador: Callable[[Set[Mes]], None]) -> None:
+        """Registra uma funcao chamada com os meses alterados apos cada commit ou ``sincronizar``."""
+        with self._trava:
+            if observador not in self._observadores:
+                self._observadores.append(observador)
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._itens.clear()
+            self._bytes = 0
+            self.acertos = 0
+            self.falhas = 0
+            self.verificacoes = 0
+            self.alteracoes_externas = 0
+            self._assinaturas.clear()
+            self._verificado_em.clear()
+            self._verificado_global = None
+
+    def estatisticas(self) -> Dict[str, float]:
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "capacidade_bytes": self.capacidade_bytes,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "invalidacoes": self.invalidacoes,
+                "verificacoes": self.verificacoes,
+                "alteracoes_externas": self.alteracoes_externas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
+
+    def _versao(self, data_inicio: Optional[date], data_fim: Optional[date]) -> Hashable:
+        with self._trava:
+            if data_inicio is None or data_fim is None:
+                return self._geracao
+            meses = _meses_do_periodo(data_inicio, data_fim)
+            if meses is None:
+                return self._geracao
+            return tuple(self._versoes_mes.get(mes, 0) for mes in meses)
+
+    def _remover(self, chave: Hashable) -> None:
+        _, conteudo = self._itens.pop(chave)
+        self._bytes -= len(conteudo)
+
+
+def _meses_do_periodo(data_inicio: date, data_fim: date) -> Optional[Tuple[Mes, ...]]:
+    """Meses cobertos por [data_inicio, data_fim), ou None se forem mais que MAXIMO_MESES_POR_CHAVE."""
+    ultimo = data_fim - timedelta(days=1)
+    total = (ultimo.year - data_inicio.year) * 12 + ultimo.month - data_inicio.month + 1
+    if total > MAXIMO_MESES_POR_CHAVE:
+        return None
+    inicio = data_inicio.year * 12 + data_inicio.month - 1
+    return tuple((indice // 12, indice % 12 + 1) for indice in range(inicio, inicio + max(total, 0)))
+
+
+def registrar_alteracao(db: Session, datas: Iterable[date]) -> None:
+    """Anota na sessao os meses das DATAs gravadas; o cache os invalida no commit."""
+    meses: Set[Mes] = db.info.setdefault(CHAVE_MESES_ALTERADOS, set())
+    meses.update((data.year, data.month) for data in datas)
+
+
+cache_leitura = CacheLeitura(
+    settings.GAS_CACHE_MAX_MB * 1024 * 1024,
+    settings.GAS_CACHE_TTL_SEGUNDOS,
+    settings.GAS_CACHE_VERIFICACAO_SEGUNDOS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(sessao: Session) -> None:
+    meses = sessao.info.pop(CHAVE_MESES_ALTERADOS, None)
+    if meses:
+        cache_leitura.invalidar_meses(meses)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_apos_rollback(sessao: Session) -> None:
+    sessao.info.pop(CHAVE_MESES_ALTERADOS, None)
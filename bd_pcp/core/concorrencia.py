@@ -0,0 +1,32 @@
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+from anyio import CapacityLimiter, to_thread
+
+from bd_pcp.core.config import settings
+
+T = TypeVar("T")
+
+_limitador: Optional[CapacityLimiter] = None
+
+
+def obter_limitador() -> CapacityLimiter:
+    """Retorna o limitador compartilhado das threads de acesso ao banco."""
+    global _limitador
+    if _limitador is None:
+        _limitador = CapacityLimiter(settings.DB_THREADS)
+    return _limitador
+
+
+async def executar_em_thread(funcao: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Executa uma funcao bloqueante (Session, parse, escrita de arquivo) fora do event loop.
+
+    Todas as rotas usam o mesmo pool limitado a ``settings.DB_THREADS`` threads,
+    de modo que consultas lentas ou importacoes grandes nao travam o worker e a
+    concorrencia no banco nao excede o tamanho configurado.
+    """
+    return await to_thread.run_sync(
+        partial(funcao, *args, **kwargs),
+        limiter=obter_limitador(),
+    )
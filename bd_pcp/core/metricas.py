@@ -0,0 +1,251 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+MEDIA_TYPE_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+LIMITES_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LIMITES_DB = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+TIPOS_CONSULTA = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "MERGE", "WITH"})
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes: Sequence[str], valores: Sequence[str]) -> str:
+    if not nomes:
+        return ""
+    pares = ",".join(f'{nome}="{_escapar(str(valor))}"' for nome, valor in zip(nomes, valores))
+    return "{" + pares + "}"
+
+
+def _formatar_valor(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor))
+
+
+class Contador:
+    """Contador monotonico com rotulos, exportado como ``counter``."""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._trava = threading.Lock()
+
+    def incrementar(self, valor: float = 1, *rotulos: str) -> None:
+        with self._trava:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+    def amostras(self) -> Iterator[str]:
+        with self._trava:
+            valores = list(self._valores.items())
+        for rotulos, valor in valores:
+            yield f"{self.nome}{_formatar_rotulos(self.rotulos, rotulos)} {_formatar_valor(valor)}"
+
+
+class Histograma:
+    """Histograma com limites fixos e rotulos, exportado como ``histogram``."""
+
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nome: str,
+        descricao: str,
+        rotulos: Sequence[str] = (),
+        limites: Sequence[float] = LIMITES_HTTP,
+    ):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self.limites = tuple(sorted(limites))
+        # Por combinacao de rotulos: contagem por faixa (nao acumulada) e soma.
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._trava = threading.Lock()
+
+    def observar(self, valor: float, *rotulos: str) -> None:
+        faixa = bisect_left(self.limites, valor)
+        with self._trava:
+            serie = self._series.get(rotulos)
+            if serie is None:
+                serie = self._series[rotulos] = ([0] * (len(self.limites) + 1), [0.0])
+            serie[0][faixa] += 1
+            serie[1][0] += valor
+
+    def amostras(self) -> Iterator[str]:
+        with self._trava:
+            series = [(rotulos, list(contagens), soma[0]) for rotulos, (contagens, soma) in self._series.items()]
+
+        nomes_faixa = self.rotulos + ("le",)
+        for rotulos, contagens, soma in series:
+            acumulado = 0
+            for limite, contagem in zip(self.limites + (float("inf"),), contagens):
+                acumulado += contagem
+                rotulos_faixa = _formatar_rotulos(nomes_faixa, rotulos + (_formatar_valor(limite),))
+                yield f"{self.nome}_bucket{rotulos_faixa} {acumulado}"
+            rotulos_serie = _formatar_rotulos(self.rotulos, rotulos)
+            yield f"{self.nome}_sum{rotulos_serie} {_formatar_valor(soma)}"
+            yield f"{self.nome}_count{rotulos_serie} {acumulado}"
+
+
+class ColetorEstatisticas:
+    """
+    Exporta como ``gauge`` os valores numericos de uma funcao de estatisticas.
+
+    Cada chave do dicionario retornado vira uma metrica ``<prefixo>_<chave>``;
+    a funcao so e chamada quando /metrics e consultado.
+    """
+
+    tipo = "gauge"
+
+    def __init__(self, prefixo: str, descricao: str, funcao: Callable[[], Dict[str, float]]):
+        self.prefixo = prefixo
+        self.descricao = descricao
+        self.funcao = funcao
+
+    def exportar(self) -> Iterator[str]:
+        for chave, valor in self.funcao().items():
+            if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                continue
+            nome = f"{self.prefixo}_{chave}"
+            yield f"# HELP {nome} {self.descricao} ({chave})"
+            yield f"# TYPE {nome} {self.tipo}"
+            yield f"{nome} {_formatar_valor(valor)}"
+
+
+class RegistroMetricas:
+    """Conjunto de metricas da aplicacao servido em /metrics."""
+
+    def __init__(self):
+        self._metricas: List = []
+        self._coletores: List[ColetorEstatisticas] = []
+
+    def registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def registrar_coletor(self, coletor: ColetorEstatisticas) -> ColetorEstatisticas:
+        self._coletores.append(coletor)
+        return coletor
+
+    def exportar(self) -> str:
+        """Gera o texto no formato de exposicao do Prometheus (versao 0.0.4)."""
+        linhas: List[str] = []
+        for metrica in self._metricas:
+            linhas.append(f"# HELP {metrica.nome} {metrica.descricao}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.extend(metrica.amostras())
+        for coletor in self._coletores:
+            linhas.extend(coletor.exportar())
+        return "\n".join(linhas) + "\n"
+
+
+registro = RegistroMetricas()
+
+duracao_requisicoes = registro.registrar(Histograma(
+    "pcp_http_requisicao_duracao_segundos",
+    "Latencia das requisicoes HTTP por rota e status.",
+    rotulos=("metodo", "rota", "status"),
+    limites=LIMITES_HTTP,
+))
+duracao_consultas = registro.registrar(Histograma(
+    "pcp_db_consulta_duracao_segundos",
+    "Tempo de execucao das instrucoes SQL por tipo.",
+    rotulos=("tipo",),
+    limites=LIMITES_DB,
+))
+linhas_lidas = registro.registrar(Contador(
+    "pcp_gas_linhas_lidas_total",
+    "Linhas de MercadoGas lidas e validadas pelas importacoes.",
+    rotulos=("origem",),
+))
+linhas_inseridas = registro.registrar(Contador(
+    "pcp_gas_linhas_inseridas_total",
+    "Linhas de MercadoGas inseridas pelas importacoes.",
+    rotulos=("origem",),
+))
+linhas_substituidas = registro.registrar(Contador(
+    "pcp_gas_linhas_substituidas_total",
+    "Linhas de MercadoGas marcadas com ATUALIZADO_EM pelas importacoes.",
+    rotulos=("origem",),
+))
+linhas_inalteradas = registro.registrar(Contador(
+    "pcp_gas_linhas_inalteradas_total",
+    "Linhas de MercadoGas iguais as atuais, mantidas pelas importacoes diferenciais.",
+    rotulos=("origem",),
+))
+
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI que mede a latencia de cada requisicao HTTP.
+
+    A rota e o template registrado no FastAPI (``/api/auth/users/{user_id}``), nunca o
+    caminho bruto, para manter a cardinalidade dos rotulos limitada; caminhos
+    sem rota correspondente sao agrupados em ``desconhecida``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codigo = [500]
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                codigo[0] = mensagem["status"]
+            await send(mensagem)
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            rota = scope.get("route")
+            duracao_requisicoes.observar(
+                time.perf_counter() - inicio,
+                scope["method"],
+                getattr(rota, "path", "desconhecida"),
+                str(codigo[0]),
+            )
+
+
+def _tipo_consulta(instrucao: str) -> str:
+    partes = instrucao.split(None, 1)
+    palavra = partes[0].upper() if partes else ""
+    return palavra if palavra in TIPOS_CONSULTA else "OUTRO"
+
+
+def instrumentar_engine(engine: Engine) -> None:
+    """Registra na engine os eventos que medem o tempo de cada instrucao SQL."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, instrucao, parametros, contexto, executemany):
+        conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _depois(conn, cursor, instrucao, parametros, contexto, executemany):
+        pilha = conn.info.get("metricas_inicio")
+        if pilha:
+            duracao_consultas.observar(time.perf_counter() - pilha.pop(), _tipo_consulta(instrucao))
+
+    @event.listens_for(engine, "handle_error")
+    def _erro(contexto):
+        # Instrucoes com erro nao disparam after_cursor_execute; descarta o inicio pendente.
+        conexao = contexto.connection
+        pilha = conexao.info.get("metricas_inicio") if conexao is not None else None
+        if pilha:
+            pilha.pop()
@@ -1,5 +1,9 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+import hashlib
+import threading
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
@@ -15,6 +19,75 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # Configuração do esquema de autenticação
 security = HTTPBearer()
 
+
+class CacheTokens:
+    """
+    Cache LRU de claims de tokens JWT ja verificados.
+
+    As entradas sao indexadas pelo SHA-256 do token (o token em si nao fica em
+    memoria) e expiram no ``exp`` do proprio token. Tokens sem ``exp`` nao sao
+    armazenados.
+    """
+
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self.acertos = 0
+        self.falhas = 0
+        self._itens: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def _chave(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def obter(self, token: str) -> Optional[dict]:
+        """Retorna uma copia das claims em cache ou None se ausente/expirado."""
+        chave = self._chave(token)
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None or item[0] <= time.time():
+                if item is not None:
+                    del self._itens[chave]
+                self.falhas += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return dict(item[1])
+
+    def guardar(self, token: str, claims: dict) -> None:
+        """Armazena claims verificadas ate o ``exp`` do token."""
+        expira_em = claims.get("exp")
+        if not isinstance(expira_em, (int, float)) or self.capacidade <= 0:
+            return
+
+        chave = self._chave(token)
+        with self._trava:
+            self._itens[chave] = (float(expira_em), dict(claims))
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._itens.clear()
+            self.acertos = 0
+            self.falhas = 0
+
+    def estatisticas(self) -> Dict[str, float]:
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "capacidade": self.capacidade,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
+
+
+cache_tokens = CacheTokens(settings.TOKEN_CACHE_MAX_ITENS)
+
 class SecurityManager:
     """Gerenciador de segurança para autenticação e autorização"""
     
@@ -44,9 +117,14 @@ class SecurityManager:
     
     @staticmethod
     def verify_token(token: str) -> dict:
-        """Verifica e decodifica o token JWT"""
+        """Verifica e decodifica o token JWT, reaproveitando verificacoes em cache"""
+        payload = cache_tokens.obter(token)
+        if payload is not None:
+            return payload
+
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+            cache_tokens.guardar(token, payload)
             return payload
         except JWTError:
             raise HTTPException(
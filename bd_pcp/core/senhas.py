@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+from fastapi import HTTPException, status
+
+from bd_pcp.core.config import settings
+from bd_pcp.core.security import SecurityManager
+
+T = TypeVar("T")
+
+
+class PoolSenhas:
+    """
+    Pool dedicado para hash e verificacao de senhas (bcrypt).
+
+    O bcrypt libera o GIL, entao as threads do pool rodam em paralelo sem
+    ocupar o event loop nem as threads de banco. No maximo ``max_threads``
+    operacoes rodam ao mesmo tempo; as demais aguardam na fila ate o limite de
+    ``max_fila``, acima do qual a requisicao e recusada com 503.
+    """
+
+    def __init__(self, max_threads: int, max_fila: int):
+        self.max_threads = max_threads
+        self.max_fila = max_fila
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="senhas")
+        self._trava = threading.Lock()
+        self._na_fila = 0
+        self._em_execucao = 0
+        self._concluidas = 0
+        self._recusadas = 0
+        self._espera_total = 0.0
+        self._espera_maxima = 0.0
+        self._execucao_total = 0.0
+
+    async def executar(self, funcao: Callable[..., T], *args) -> T:
+        with self._trava:
+            if self._na_fila >= self.max_fila:
+                self._recusadas += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Servico de autenticacao sobrecarregado, tente novamente.",
+                    headers={"Retry-After": "1"},
+                )
+            self._na_fila += 1
+
+        enfileirada_em = time.perf_counter()
+
+        def tarefa() -> T:
+            inicio = time.perf_counter()
+            with self._trava:
+                espera = inicio - enfileirada_em
+                self._na_fila -= 1
+                self._em_execucao += 1
+                self._espera_total += espera
+                self._espera_maxima = max(self._espera_maxima, espera)
+            try:
+                return funcao(*args)
+            finally:
+                with self._trava:
+                    self._em_execucao -= 1
+                    self._concluidas += 1
+                    self._execucao_total += time.perf_counter() - inicio
+
+        return await asyncio.wrap_future(self._executor.submit(tarefa))
+
+    async def verificar(self, senha: str, senha_hash: str) -> bool:
+        """Verifica a senha no pool dedicado"""
+        return await self.executar(SecurityManager.verify_password, senha, senha_hash)
+
+    async def gerar_hash(self, senha: str) -> str:
+        """Gera o hash da senha no pool dedicado"""
+        return await self.executar(SecurityManager.hash_password, senha)
+
+    def estatisticas(self) -> Dict[str, float]:
+        with self._trava:
+            concluidas = self._concluidas
+            return {
+                "max_threads": self.max_threads,
+                "max_fila": self.max_fila,
+                "em_execucao": self._em_execucao,
+                "na_fila": self._na_fila,
+                "concluidas": concluidas,
+                "recusadas": self._recusadas,
+                "espera_media_ms": self._espera_total / concluidas * 1000 if concluidas else 0.0,
+                "espera_maxima_ms": self._espera_maxima * 1000,
+                "execucao_media_ms": self._execucao_total / concluidas * 1000 if concluidas else 0.0,
+            }
+
+
+pool_senhas = PoolSenhas(settings.SENHAS_THREADS, settings.SENHAS_FILA_MAX)
@@ -1,31 +1,124 @@
+import threading
+import time
+from typing import Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
-from bd_pcp.core.config import settings
-from urllib.parse import quote_plus
+from sqlalchemy.pool import QueuePool
+from bd_pcp.core.config import Settings, settings
+from bd_pcp.core.metricas import instrumentar_engine
 from bd_pcp.db.models.model_base import Base
 
 
-connection_string = (
-    "DRIVER={ODBC Driver 17 for SQL Server};"
-    "SERVER=10.117.201.110\ssis;"
-    "PORT=1433;"
-    "DATABASE=BD_DADOS;"
-    "UID=acesso.pcp.dados;"
-    "PWD=!QAZ@werBrava;")
+class MetricasPool:
+    """Contadores acumulados de aquisicao e abertura de conexoes do pool."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.aquisicoes = 0
+        self.aquisicao_total = 0.0
+        self.aquisicao_maxima = 0.0
+        self.esgotamentos = 0
+        self.conexoes_abertas = 0
+        self.conexao_total = 0.0
+        self.conexao_maxima = 0.0
+
+    def registrar_aquisicao(self, duracao: float, esgotado: bool) -> None:
+        with self._trava:
+            if esgotado:
+                self.esgotamentos += 1
+                return
+            self.aquisicoes += 1
+            self.aquisicao_total += duracao
+            self.aquisicao_maxima = max(self.aquisicao_maxima, duracao)
+
+    def registrar_conexao(self, duracao: float) -> None:
+        with self._trava:
+            self.conexoes_abertas += 1
+            self.conexao_total += duracao
+            self.conexao_maxima = max(self.conexao_maxima, duracao)
+
+    def resumo(self) -> Dict[str, float]:
+        with self._trava:
+            return {
+                "aquisicoes": self.aquisicoes,
+                "espera_media_ms": self.aquisicao_total / self.aquisicoes * 1000 if self.aquisicoes else 0.0,
+                "espera_maxima_ms": self.aquisicao_maxima * 1000,
+                "esgotamentos": self.esgotamentos,
+                "conexoes_abertas": self.conexoes_abertas,
+                "latencia_conexao_media_ms": (
+                    self.conexao_total / self.conexoes_abertas * 1000 if self.conexoes_abertas else 0.0
+                ),
+                "latencia_conexao_maxima_ms": self.conexao_maxima * 1000,
+            }
+
+
+class PoolInstrumentado(QueuePool):
+    """
+    QueuePool que mede o tempo de espera por uma conexao e a latencia de conexao.
+
+    A espera inclui a abertura de uma conexao nova quando o pool ainda pode
+    crescer; ``esgotamentos`` conta as esperas que estouraram DB_POOL_TIMEOUT.
+    """
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        # Valor configurado na criacao; o engine pode vir de outro Settings.
+        self.max_overflow = max_overflow
+        self.metricas = MetricasPool()
 
-DATABASE_URL = f"mssql+pyodbc:///?odbc_connect={quote_plus(connection_string)}"
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except PoolTimeoutError:
+            self.metricas.registrar_aquisicao(time.perf_counter() - inicio, esgotado=True)
+            raise
+        self.metricas.registrar_aquisicao(time.perf_counter() - inicio, esgotado=False)
+        return conexao
+
+    def _create_connection(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            self.metricas.registrar_conexao(time.perf_counter() - inicio)
+
+    def recreate(self):
+        # engine.dispose() recria o pool; as metricas acumuladas sao preservadas.
+        novo = super().recreate()
+        novo.metricas = self.metricas
+        return novo
+
+
+def criar_engine(config: Settings = settings) -> Engine:
+    """Cria a engine a partir das configuracoes de banco e de pool, ja instrumentada."""
+    argumentos = {}
+    if config.DB_DRIVER.endswith("+pyodbc"):
+        argumentos["fast_executemany"] = True
+
+    engine = create_engine(
+        config.DATABASE_URL,
+        poolclass=PoolInstrumentado,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        **argumentos,
+    )
+    instrumentar_engine(engine)
+    return engine
 
 
 # Criação da engine para o banco de dados
-engine = create_engine(
-    DATABASE_URL,
-    fast_executemany=True,
-    pool_pre_ping=True,
-)
+engine = criar_engine()
 
 SessionLocal = sessionmaker(
-    autocommit=False, 
-    autoflush=False, 
+    autocommit=False,
+    autoflush=False,
     bind=engine
 )
 
@@ -38,13 +131,29 @@ def get_db():
         db.close()
 
 
+def estatisticas_pool() -> Dict[str, float]:
+    """Retorna a ocupacao atual e as metricas acumuladas do pool de conexoes."""
+    pool = engine.pool
+    return {
+        "tamanho": pool.size(),
+        "em_uso": pool.checkedout(),
+        "ociosas": pool.checkedin(),
+        # overflow() fica negativo enquanto o pool nao atingiu pool_size.
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool.max_overflow,
+        "timeout_s": pool.timeout(),
+        **pool.metricas.resumo(),
+    }
+
+
 def create_tables():
     '''
     Criando todas as tabelas no banco de dados
     Importe a(s) tabela(s) que deseja criar
     '''
     #from bd_pcp.db.models.usuario import Usuario  # Importe suas tabelas aqui
-    from bd_pcp.db.models.mercado_gas import MercadoGas 
+    from bd_pcp.db.models.mercado_gas import MercadoGas, MercadoGasHistorico
+    from bd_pcp.db.models.importacao_gas import ImportacaoGas, RegistroImportacaoGas
     try:
         Base.metadata.create_all(bind=engine)
         print("Tabelas criadas com sucesso!")
@@ -53,5 +162,5 @@ def create_tables():
 
 
 if __name__ == "__main__":
-    # Chama a função para criar as tabelas 
-    create_tables()
\ No newline at end of file
+    # Chama a função para criar as tabelas
+    create_tables()
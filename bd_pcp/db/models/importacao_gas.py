@@ -0,0 +1,56 @@
+from bd_pcp.db.models.model_base import Base
+from sqlalchemy import Boolean, Column, Integer, String, Text, func, DateTime
+
+FASE_NA_FILA = "na_fila"
+FASE_LEITURA = "leitura"
+FASE_SUBSTITUICAO = "substituicao"
+FASE_INSERCAO = "insercao"
+FASE_CONFIRMACAO = "confirmacao"
+FASE_CONCLUIDA = "concluida"
+FASE_ERRO = "erro"
+# Conteudo ja importado (REGISTRO_IMPORTACAO_GAS) e importacao sem forcar: nada e gravado.
+FASE_DUPLICADA = "duplicada"
+FASES_EM_ANDAMENTO = (FASE_LEITURA, FASE_SUBSTITUICAO, FASE_INSERCAO, FASE_CONFIRMACAO)
+
+
+class ImportacaoGas(Base):
+    """Importacao de MercadoGas executada em segundo plano (upload-txt ou upsert)."""
+
+    __tablename__ = "IMPORTACAO_GAS"
+
+    ID = Column(String(32), primary_key=True)
+    TIPO = Column(String(20), nullable=False)
+    ARQUIVO = Column(String(255), nullable=True)
+    MOTOR = Column(String(20), nullable=True)
+    MODO = Column(String(20), nullable=True)
+    USUARIO = Column(String(50), nullable=True)
+    HASH = Column(String(64), nullable=True, index=True)
+    FORCAR = Column(Boolean, nullable=False, default=False)
+    CAMINHO = Column(String(500), nullable=False)
+    FASE = Column(String(20), nullable=False, index=True)
+    LINHAS_LIDAS = Column(Integer, nullable=False, default=0)
+    LINHAS_INSERIDAS = Column(Integer, nullable=False, default=0)
+    LINHAS_SUBSTITUIDAS = Column(Integer, nullable=False, default=0)
+    LINHAS_INALTERADAS = Column(Integer, nullable=False, default=0)
+    # JSON: lista de mensagens de erro e segundos acumulados por fase.
+    ERROS = Column(Text, nullable=True)
+    TEMPOS = Column(Text, nullable=True)
+    CRIADO_EM = Column(DateTime, server_default=func.now())
+    INICIADO_EM = Column(DateTime, nullable=True)
+    # Ultimo sinal de vida do processo que executa a importacao.
+    ATIVIDADE_EM = Column(DateTime, nullable=True)
+    CONCLUIDO_EM = Column(DateTime, nullable=True)
+
+
+class RegistroImportacaoGas(Base):
+    """Conteudo ja importado (upload ou payload do upsert), identificado pelo SHA-256."""
+
+    __tablename__ = "REGISTRO_IMPORTACAO_GAS"
+
+    HASH = Column(String(64), primary_key=True)
+    TIPO = Column(String(20), nullable=False)
+    ARQUIVO = Column(String(255), nullable=True)
+    LINHAS_INSERIDAS = Column(Integer, nullable=False)
+    LINHAS_SUBSTITUIDAS = Column(Integer, nullable=False)
+    IMPORTACOES = Column(Integer, nullable=False, default=1)
+    IMPORTADO_EM = Column(DateTime, nullable=False)
@@ -1,5 +1,8 @@
 from bd_pcp.db.models.model_base import Base
-from sqlalchemy import Column, Integer, String, Float, Date, func, DateTime, Index
+from sqlalchemy import Column, Integer, String, Float, Date, func, DateTime, Index, text
+
+# Indice filtrado das linhas atuais (sem ATUALIZADO_EM), usado pela leitura do retrato atual.
+INDICE_ATUAIS = "ix_mercado_gas_atuais"
 
 
 class MercadoGas(Base):
@@ -11,6 +14,24 @@ class MercadoGas(Base):
             "PLANILHA",
             "ABA",
         ),
+        Index(
+            "ix_mercado_gas_data_id",
+            "DATA",
+            "ID",
+            # So o necessario para versao_periodo; leituras de linhas completas
+            # buscam as demais colunas na tabela (ver migracao 8e41f0a6c2d5).
+            mssql_include=["ATUALIZADO_EM"],
+        ),
+        Index(
+            INDICE_ATUAIS,
+            "DATA",
+            "PLANILHA",
+            "ABA",
+            mssql_where=text("ATUALIZADO_EM IS NULL"),
+            sqlite_where=text("ATUALIZADO_EM IS NULL"),
+            # Cobre as agregacoes; ver migracao e2b95d4c7f18.
+            mssql_include=["PRODUTO", "LOCAL", "EMPRESA", "UNIDADE", "VALOR"],
+        ),
     )
 
     ID = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -23,4 +44,29 @@ class MercadoGas(Base):
     UNIDADE = Column(String(20), nullable=False)
     VALOR = Column(Float, nullable=False)
     CRIADO_EM = Column(DateTime, server_default=func.now())
-    ATUALIZADO_EM = Column(DateTime, onupdate=func.now())
\ No newline at end of file
+    ATUALIZADO_EM = Column(DateTime, onupdate=func.now())
+
+class MercadoGasHistorico(Base):
+    """Versoes substituidas de MERCADO_GAS movidas pelo arquivamento (mantem o ID original)."""
+
+    __tablename__ = "MERCADO_GAS_HISTORICO"
+    __table_args__ = (
+        Index(
+            "ix_mercado_gas_historico_data_id",
+            "DATA",
+            "ID",
+        ),
+    )
+
+    ID = Column(Integer, primary_key=True, autoincrement=False)
+    DATA = Column(Date, nullable=False)
+    PLANILHA = Column(String(100), nullable=False)
+    ABA = Column(String(100), nullable=False)
+    PRODUTO = Column(String(100), nullable=False)
+    LOCAL = Column(String(100), nullable=True)
+    EMPRESA = Column(String(255), nullable=True)
+    UNIDADE = Column(String(20), nullable=False)
+    VALOR = Column(Float, nullable=False)
+    CRIADO_EM = Column(DateTime, nullable=True)
+    ATUALIZADO_EM = Column(DateTime, nullable=False)
+    ARQUIVADO_EM = Column(DateTime, nullable=False)
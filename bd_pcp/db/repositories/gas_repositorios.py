@@ -1,12 +1,92 @@
+from collections import Counter
 from datetime import date, datetime
+from itertools import islice
 from zoneinfo import ZoneInfo
 from sqlalchemy.orm import Session
-from sqlalchemy import extract
-from typing import List
+from sqlalchemy import (
+    ColumnElement,
+    Date,
+    Row,
+    Select,
+    String,
+    and_,
+    delete,
+    extract,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    union_all,
+    update,
+)
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-from bd_pcp.db.models.mercado_gas import MercadoGas
+from bd_pcp.core.cache_leitura import registrar_alteracao
+from bd_pcp.db.models.mercado_gas import INDICE_ATUAIS, MercadoGas, MercadoGasHistorico
 from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
 
+FUSO_FORTALEZA = ZoneInfo("America/Fortaleza")
+# SQL Server aceita ate 2100 parametros por comando; cada chave usa tres.
+TAMANHO_LOTE_CHAVES = 500
+TAMANHO_LOTE_IDS = 2000
+TAMANHO_BLOCO_INSERCAO = 5000
+TAMANHO_LOTE_LEITURA = 1000
+# Abaixo do limite de escalonamento de bloqueios do SQL Server (5000 por instrucao).
+TAMANHO_LOTE_ARQUIVAMENTO = 4000
+
+ChaveMercadoGas = Tuple[date, str, str]
+PosicaoMercadoGas = Tuple[date, int]
+# No SQL Server fixa o indice filtrado das linhas atuais; os demais bancos ignoram a dica.
+DICA_INDICE_ATUAIS = f"WITH (INDEX({INDICE_ATUAIS}))"
+
+DIMENSOES_AGREGACAO = ("PLANILHA", "ABA", "PRODUTO", "LOCAL", "EMPRESA", "UNIDADE")
+GRANULARIDADE_DIA = "dia"
+GRANULARIDADE_MES = "mes"
+GRANULARIDADE_ANO = "ano"
+AGREGACAO_SOMA = "soma"
+FUNCOES_AGREGACAO = {
+    AGREGACAO_SOMA: func.sum,
+    "media": func.avg,
+    "minimo": func.min,
+    "maximo": func.max,
+    "contagem": func.count,
+}
+
+
+def intervalo_mes(mes: int, ano: int) -> Tuple[date, date]:
+    """Converte mes/ano no intervalo semiaberto [primeiro dia, primeiro dia do mes seguinte)."""
+    inicio = date(ano, mes, 1)
+    fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    return inicio, fim
+
+
+def _tabela_chaves(chaves: List[ChaveMercadoGas]):
+    """Tabela derivada (SELECT ... UNION ALL) com as chaves data/planilha/aba informadas."""
+    return union_all(
+        *[
+            select(
+                literal(data, Date).label("DATA"),
+                literal(planilha, String).label("PLANILHA"),
+                literal(aba, String).label("ABA"),
+            )
+            for data, planilha, aba in chaves
+        ]
+    ).subquery("chaves")
+
+
+def _chave_equivalente(chave: ChaveMercadoGas) -> ChaveMercadoGas:
+    """Chave comparavel como na collation padrao do SQL Server (sem maiusculas e espacos a direita)."""
+    data, planilha, aba = chave
+    return data, planilha.rstrip().casefold(), aba.rstrip().casefold()
+
+
+def _em_blocos(itens: Iterable, tamanho: int) -> Iterator[List]:
+    """Agrupa um iteravel em listas de ate ``tamanho`` elementos."""
+    iterador = iter(itens)
+    while bloco := list(islice(iterador, tamanho)):
+        yield bloco
+
 
 class MercadoGasRepository:
     """Repositorio para operacoes CRUD do MercadoGas."""
@@ -20,35 +100,66 @@ class MercadoGasRepository:
         return self.criar_em_lote([dados])[0]
 
     def criar_em_lote(self, dados_lista: List[MercadoGasCriacao]) -> List[MercadoGas]:
-        """Cria vários registros de MercadoGas em uma única operação."""
+        """
+        Cria vários registros de MercadoGas em uma única operação.
+
+        A insercao usa ``inserir_em_lote`` e os registros criados sao lidos de
+        volta por ID em blocos, em vez de um refresh por objeto.
+        """
         if not dados_lista:
             return []
 
-        objetos = [
-            self.model(
-                DATA=dados.DATA,
-                PLANILHA=dados.PLANILHA,
-                ABA=dados.ABA,
-                PRODUTO=dados.PRODUTO,
-                LOCAL=dados.LOCAL,
-                UNIDADE=dados.UNIDADE,
-                VALOR=dados.VALOR,
-                EMPRESA=dados.EMPRESA,
-            )
-            for dados in dados_lista
-        ]
+        ids = self.inserir_em_lote(dados_lista, retornar_ids=True)
+
+        por_id: Dict[int, MercadoGas] = {}
+        for bloco in _em_blocos(ids, TAMANHO_LOTE_IDS):
+            consulta = select(self.model).where(self.model.ID.in_(bloco))
+            por_id.update((objeto.ID, objeto) for objeto in self.db.scalars(consulta))
+
+        return [por_id[id_] for id_ in ids]
+
+    def inserir_em_lote(
+        self,
+        dados_lista: Iterable[MercadoGasCriacao],
+        tamanho_bloco: int = TAMANHO_BLOCO_INSERCAO,
+        retornar_ids: bool = False,
+        confirmar: bool = True,
+    ) -> Union[int, List[int]]:
+        """
+        Insere registros em massa via Core, sem construir objetos ORM.
+
+        Cada bloco de ``tamanho_bloco`` linhas e enviado como um executemany
+        (acelerado por ``fast_executemany`` no pyodbc). Retorna a quantidade
+        inserida ou, com ``retornar_ids=True``, os IDs gerados na ordem dos dados
+        (via OUTPUT/RETURNING). Com ``confirmar=False`` o commit fica a cargo do
+        chamador.
+        """
+        tabela = self.model.__table__
+        comando = insert(tabela)
+        if retornar_ids:
+            comando = comando.returning(tabela.c.ID, sort_by_parameter_order=True)
+
+        total = 0
+        ids: List[int] = []
 
         try:
-            self.db.add_all(objetos)
-            self.db.commit()
+            for bloco in _em_blocos(dados_lista, tamanho_bloco):
+                resultado = self.db.execute(
+                    comando,
+                    [dados.model_dump() for dados in bloco],
+                )
+                registrar_alteracao(self.db, (dados.DATA for dados in bloco))
+                if retornar_ids:
+                    ids.extend(resultado.scalars())
+                total += len(bloco)
+
+            if confirmar:
+                self.db.commit()
         except Exception:
             self.db.rollback()
             raise
 
-        for objeto in objetos:
-            self.db.refresh(objeto)
-
-        return objetos
+        return ids if retornar_ids else total
 
     def atualizar_atualizado_em_por_planilha_aba_data(
         self,
@@ -57,40 +168,479 @@ class MercadoGasRepository:
         aba: str,
     ) -> None:
         """Atualiza ATUALIZADO_EM para registros existentes combinando data/planilha/aba."""
-        
-        fuso_fortaleza = ZoneInfo("America/Fortaleza")
-        
-        count = (
-            self.db.query(self.model)
-            .filter(
-                self.model.DATA == data,
-                self.model.PLANILHA == planilha,
-                self.model.ABA == aba,
+        self.atualizar_atualizado_em_em_lote([(data, planilha, aba)])
+
+    def atualizar_atualizado_em_em_lote(
+        self,
+        chaves: Iterable[ChaveMercadoGas],
+    ) -> Dict[ChaveMercadoGas, int]:
+        """
+        Marca como substituidos os registros atuais de varias chaves data/planilha/aba.
+
+        As chaves sao enviadas como uma tabela derivada (SELECT ... UNION ALL) e
+        aplicadas em um unico UPDATE com JOIN por bloco de chaves, todos com o
+        mesmo carimbo de ATUALIZADO_EM. Retorna quantas linhas cada chave afetou,
+        contadas nas colunas de chave devolvidas pelo proprio UPDATE
+        (OUTPUT/RETURNING). Como a collation pode ignorar maiusculas e espacos a
+        direita, uma linha gravada com outra grafia e atribuida a chave
+        informada equivalente (ver ``_chave_equivalente``).
+        """
+        chaves_unicas = list(dict.fromkeys(chaves))
+        afetados: Counter = Counter({chave: 0 for chave in chaves_unicas})
+        if not chaves_unicas:
+            return dict(afetados)
+
+        equivalentes: Dict[ChaveMercadoGas, ChaveMercadoGas] = {}
+        for chave in chaves_unicas:
+            equivalentes.setdefault(_chave_equivalente(chave), chave)
+
+        atualizado_em = datetime.now(FUSO_FORTALEZA)
+        registrar_alteracao(self.db, (data for data, _, _ in chaves_unicas))
+
+        for bloco in _em_blocos(chaves_unicas, TAMANHO_LOTE_CHAVES):
+            chaves_sql = _tabela_chaves(bloco)
+            comando = (
+                update(self.model)
+                .where(
+                    self.model.DATA == chaves_sql.c.DATA,
+                    self.model.PLANILHA == chaves_sql.c.PLANILHA,
+                    self.model.ABA == chaves_sql.c.ABA,
+                    self.model.ATUALIZADO_EM.is_(None),
+                )
+                .values(ATUALIZADO_EM=atualizado_em)
+                .returning(self.model.DATA, self.model.PLANILHA, self.model.ABA)
+                .execution_options(synchronize_session=False)
+            )
+            for linha in self.db.execute(comando):
+                chave = tuple(linha)
+                if chave not in afetados:
+                    chave = equivalentes.get(_chave_equivalente(chave), chave)
+                afetados[chave] += 1
+
+        return dict(afetados)
+
+    def listar_atuais_por_chaves(self, chaves: Iterable[ChaveMercadoGas]) -> Iterator[Row]:
+        """
+        Retorna os registros atuais (sem ATUALIZADO_EM) de varias chaves data/planilha/aba.
+
+        Cada bloco de chaves e lido em um unico SELECT com JOIN na tabela
+        derivada das chaves. DATA, PLANILHA e ABA vem da chave informada, e nao
+        da linha, para que o chamador agrupe o resultado pelas proprias chaves
+        mesmo quando a collation do banco ignora maiusculas.
+        """
+        chaves_unicas = list(dict.fromkeys(chaves))
+        for bloco in _em_blocos(chaves_unicas, TAMANHO_LOTE_CHAVES):
+            chaves_sql = _tabela_chaves(bloco)
+            consulta = select(
+                self.model.ID,
+                chaves_sql.c.DATA,
+                chaves_sql.c.PLANILHA,
+                chaves_sql.c.ABA,
+                self.model.PRODUTO,
+                self.model.LOCAL,
+                self.model.EMPRESA,
+                self.model.UNIDADE,
+                self.model.VALOR,
+            ).join(
+                chaves_sql,
+                and_(
+                    self.model.DATA == chaves_sql.c.DATA,
+                    self.model.PLANILHA == chaves_sql.c.PLANILHA,
+                    self.model.ABA == chaves_sql.c.ABA,
+                ),
+            ).where(self.model.ATUALIZADO_EM.is_(None))
+            yield from self.db.execute(consulta)
+
+    def atualizar_atualizado_em_por_ids(self, ids: Iterable[int]) -> int:
+        """Marca como substituidos os registros informados, com um unico carimbo de ATUALIZADO_EM."""
+        atualizado_em = datetime.now(FUSO_FORTALEZA)
+        total = 0
+        for bloco in _em_blocos(ids, TAMANHO_LOTE_IDS):
+            comando = (
+                update(self.model)
+                .where(self.model.ID.in_(bloco), self.model.ATUALIZADO_EM.is_(None))
+                .values(ATUALIZADO_EM=atualizado_em)
+                .returning(self.model.DATA)
+                .execution_options(synchronize_session=False)
+            )
+            datas = self.db.execute(comando).scalars().all()
+            registrar_alteracao(self.db, datas)
+            total += len(datas)
+        return total
+
+    def _condicoes_periodo(
+        self,
+        data_inicio: Optional[date],
+        data_fim: Optional[date],
+        coluna_data=None,
+    ) -> List[ColumnElement[bool]]:
+        """Monta predicados semiabertos ``DATA >= data_inicio AND DATA < data_fim``."""
+        coluna_data = self.model.DATA if coluna_data is None else coluna_data
+        condicoes: List[ColumnElement[bool]] = []
+        if data_inicio is not None:
+            condicoes.append(coluna_data >= data_inicio)
+        if data_fim is not None:
+            condicoes.append(coluna_data < data_fim)
+        return condicoes
+
+    def _com_historico(self):
+        """
+        Uniao (UNION ALL) de MERCADO_GAS com MERCADO_GAS_HISTORICO, com as colunas de MERCADO_GAS.
+
+        As linhas arquivadas mantem o ID original, entao (DATA, ID) continua
+        identificando cada registro e a ordenacao/paginacao nao muda.
+        """
+        tabela = self.model.__table__
+        historico = MercadoGasHistorico.__table__
+        return union_all(
+            select(*tabela.columns),
+            select(*[historico.c[coluna.name] for coluna in tabela.columns]),
+        ).subquery("MERCADO_GAS_COM_HISTORICO")
+
+    def listar(
+        self,
+        apenas_sem_atualizacao: bool = False,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        incluir_historico: bool = False,
+    ) -> List[Union[MercadoGas, Row]]:
+        """
+        Retorna registros, opcionalmente filtrando os sem ATUALIZADO_EM.
+
+        O periodo e semiaberto: inclui ``data_inicio`` e exclui ``data_fim``.
+        Com ``incluir_historico`` as versoes arquivadas em MERCADO_GAS_HISTORICO
+        tambem sao retornadas (como linhas, nao objetos ORM); nao se aplica a
+        ``apenas_sem_atualizacao``, pois o historico so tem linhas substituidas.
+        """
+        if incluir_historico and not apenas_sem_atualizacao:
+            return list(self.iterar(data_inicio=data_inicio, data_fim=data_fim, incluir_historico=True))
+
+        consulta = self.db.query(self.model).filter(
+            *self._condicoes_periodo(data_inicio, data_fim)
+        )
+
+        if apenas_sem_atualizacao:
+            consulta = consulta.filter(self.model.ATUALIZADO_EM.is_(None)).with_hint(
+                self.model, DICA_INDICE_ATUAIS, "mssql"
+            )
+
+        return consulta.order_by(self.model.DATA.desc()).all()
+
+    def iterar(
+        self,
+        apenas_sem_atualizacao: bool = False,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        tamanho_lote: int = TAMANHO_LOTE_LEITURA,
+        incluir_historico: bool = False,
+    ) -> Iterator[Row]:
+        """
+        Percorre os registros em fluxo, na mesma ordem de ``listar``.
+
+        Usa um SELECT Core com ``yield_per``: as linhas sao buscadas do cursor em
+        lotes de ``tamanho_lote``, sem materializar objetos ORM nem a lista completa.
+        O periodo e ``incluir_historico`` seguem as mesmas convencoes de ``listar``.
+        """
+        if incluir_historico and not apenas_sem_atualizacao:
+            fonte = self._com_historico()
+            colunas = fonte.c
+        else:
+            fonte = self.model.__table__
+            colunas = self.model
+
+        consulta = select(*fonte.columns).where(
+            *self._condicoes_periodo(data_inicio, data_fim, colunas.DATA)
+        )
+
+        if apenas_sem_atualizacao:
+            consulta = consulta.where(self.model.ATUALIZADO_EM.is_(None)).with_hint(
+                self.model, DICA_INDICE_ATUAIS, "mssql"
+            )
+
+        consulta = consulta.order_by(colunas.DATA.desc(), colunas.ID.desc())
+        yield from self.db.execute(
+            consulta.execution_options(yield_per=tamanho_lote)
+        )
+
+    def consulta_atuais(
+        self,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        planilha: Optional[str] = None,
+        aba: Optional[str] = None,
+    ) -> Select:
+        """
+        SELECT do retrato atual (registros sem ATUALIZADO_EM) pelo indice filtrado.
+
+        O indice ix_mercado_gas_atuais so contem as linhas atuais, entao o custo
+        independe do tamanho do historico: no SQL Server a dica de indice garante
+        o seu uso; no SQLite o indice parcial e escolhido porque o predicado
+        ``ATUALIZADO_EM IS NULL`` e literal. A ordem (DATA, PLANILHA, ABA e ID
+        decrescentes) e a do proprio indice, sem ordenacao adicional.
+        """
+        consulta = (
+            select(*self.model.__table__.columns)
+            .with_hint(self.model, DICA_INDICE_ATUAIS, "mssql")
+            .where(
                 self.model.ATUALIZADO_EM.is_(None),
+                *self._condicoes_periodo(data_inicio, data_fim),
             )
-            .update({self.model.ATUALIZADO_EM: datetime.now(fuso_fortaleza)}, synchronize_session=False)
         )
+        if planilha is not None:
+            consulta = consulta.where(self.model.PLANILHA == planilha)
+        if aba is not None:
+            consulta = consulta.where(self.model.ABA == aba)
 
-        if count:
-            # Garante que a atualizacao seja enviada antes de inserir novos registros.
-            self.db.flush()
+        return consulta.order_by(
+            self.model.DATA.desc(),
+            self.model.PLANILHA.desc(),
+            self.model.ABA.desc(),
+            self.model.ID.desc(),
+        )
 
-    def listar(
+    def listar_atuais(
+        self,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        planilha: Optional[str] = None,
+        aba: Optional[str] = None,
+    ) -> List[Row]:
+        """Retorna o retrato atual; o periodo segue a convencao semiaberta de ``listar``."""
+        return self.db.execute(self.consulta_atuais(data_inicio, data_fim, planilha, aba)).all()
+
+    def iterar_atuais(
+        self,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        planilha: Optional[str] = None,
+        aba: Optional[str] = None,
+        tamanho_lote: int = TAMANHO_LOTE_LEITURA,
+    ) -> Iterator[Row]:
+        """Percorre o retrato atual em fluxo, em lotes de ``tamanho_lote`` linhas."""
+        consulta = self.consulta_atuais(data_inicio, data_fim, planilha, aba)
+        yield from self.db.execute(consulta.execution_options(yield_per=tamanho_lote))
+
+    def agregar(
         self,
+        agrupar: Sequence[str] = (),
+        granularidade: Optional[str] = None,
+        funcoes: Sequence[str] = (AGREGACAO_SOMA,),
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        planilha: Optional[str] = None,
+        aba: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Agrega VALOR do retrato atual em um unico SELECT ... GROUP BY.
+
+        ``agrupar`` sao colunas de DIMENSOES_AGREGACAO, ``granularidade`` agrupa
+        DATA por dia, mes ou ano (PERIODO e o primeiro dia do periodo) e
+        ``funcoes`` sao chaves de FUNCOES_AGREGACAO, devolvidas em maiusculas
+        (SOMA, MEDIA, ...). Le apenas as linhas sem ATUALIZADO_EM pelo indice
+        filtrado, que ja inclui as dimensoes e VALOR. O periodo segue a
+        convencao semiaberta de ``listar``.
+        """
+        if granularidade == GRANULARIDADE_DIA:
+            periodo = [self.model.DATA.label("PERIODO")]
+        elif granularidade == GRANULARIDADE_MES:
+            periodo = [extract("year", self.model.DATA).label("ANO"), extract("month", self.model.DATA).label("MES")]
+        elif granularidade == GRANULARIDADE_ANO:
+            periodo = [extract("year", self.model.DATA).label("ANO")]
+        else:
+            periodo = []
+        grupos = periodo + [getattr(self.model, dimensao) for dimensao in agrupar]
+
+        consulta = (
+            select(
+                *grupos,
+                *[FUNCOES_AGREGACAO[funcao](self.model.VALOR).label(funcao.upper()) for funcao in funcoes],
+            )
+            .with_hint(self.model, DICA_INDICE_ATUAIS, "mssql")
+            .where(
+                self.model.ATUALIZADO_EM.is_(None),
+                *self._condicoes_periodo(data_inicio, data_fim),
+            )
+        )
+        if planilha is not None:
+            consulta = consulta.where(self.model.PLANILHA == planilha)
+        if aba is not None:
+            consulta = consulta.where(self.model.ABA == aba)
+        if grupos:
+            consulta = consulta.group_by(*grupos).order_by(*grupos)
+
+        resultado = []
+        for linha in self.db.execute(consulta).mappings():
+            linha = dict(linha)
+            if granularidade in (GRANULARIDADE_MES, GRANULARIDADE_ANO):
+                linha = {
+                    "PERIODO": date(int(linha.pop("ANO")), int(linha.pop("MES", 1)), 1),
+                    **linha,
+                }
+            resultado.append(linha)
+        return resultado
+
+    def listar_pagina(
+        self,
+        limite: int,
+        apos: Optional[PosicaoMercadoGas] = None,
         apenas_sem_atualizacao: bool = False,
-    ) -> List[MercadoGas]:
-        """Retorna registros, opcionalmente filtrando os sem ATUALIZADO_EM."""
-        consulta = self.db.query(self.model)
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        incluir_historico: bool = False,
+    ) -> Tuple[List[MercadoGas], Optional[PosicaoMercadoGas]]:
+        """
+        Retorna uma pagina ordenada por DATA e ID decrescentes (keyset).
+
+        ``apos`` e a posicao (DATA, ID) do ultimo registro da pagina anterior; a
+        busca parte dela pelo indice ix_mercado_gas_data_id, de modo que o custo
+        independe da profundidade da pagina. Retorna os registros e a posicao
+        para a proxima pagina, ou None quando nao houver mais registros.
+        ``incluir_historico`` segue a mesma convencao de ``listar``.
+        """
+        if incluir_historico and not apenas_sem_atualizacao:
+            colunas = self._com_historico().c
+            consulta = self.db.query(*colunas)
+        else:
+            colunas = self.model
+            consulta = self.db.query(self.model)
+
+        consulta = consulta.filter(*self._condicoes_periodo(data_inicio, data_fim, colunas.DATA))
 
         if apenas_sem_atualizacao:
             consulta = consulta.filter(self.model.ATUALIZADO_EM.is_(None))
 
-        return consulta.order_by(self.model.DATA.desc()).all()
+        if apos is not None:
+            data, id_ = apos
+            consulta = consulta.filter(
+                or_(
+                    colunas.DATA < data,
+                    and_(colunas.DATA == data, colunas.ID < id_),
+                )
+            )
+
+        registros = (
+            consulta.order_by(colunas.DATA.desc(), colunas.ID.desc())
+            .limit(limite + 1)
+            .all()
+        )
+
+        if len(registros) <= limite:
+            return registros, None
+
+        registros = registros[:limite]
+        ultimo = registros[-1]
+        return registros, (ultimo.DATA, ultimo.ID)
+
+    def versao_periodo(self, data_inicio: date, data_fim: date) -> Tuple[int, Optional[int], Optional[datetime]]:
+        """
+        Assinatura dos dados do periodo: quantidade de linhas, maior ID e maior ATUALIZADO_EM.
+
+        Toda gravacao muda ao menos um dos valores (insercao aumenta o ID,
+        substituicao preenche ATUALIZADO_EM com o instante atual e o
+        arquivamento remove linhas), entao a assinatura identifica uma versao
+        dos dados sem ler as linhas. Usa o indice de DATA.
+        """
+        consulta = select(
+            func.count(),
+            func.max(self.model.ID),
+            func.max(self.model.ATUALIZADO_EM),
+        ).where(*self._condicoes_periodo(data_inicio, data_fim))
+        total, maior_id, maior_atualizado_em = self.db.execute(consulta).one()
+        return total, maior_id, maior_atualizado_em
+
+    def assinaturas_por_mes(
+        self,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+    ) -> Dict[Tuple[int, int], Tuple[int, Optional[int], Optional[datetime]]]:
+        """
+        ``versao_periodo`` de cada mes com linhas no periodo, em uma consulta.
+
+        Usada pelo cache de leitura para perceber gravacoes de outros
+        processos; le apenas o indice de DATA (que inclui ATUALIZADO_EM).
+        """
+        ano = extract("year", self.model.DATA)
+        mes = extract("month", self.model.DATA)
+        consulta = (
+            select(
+                ano,
+                mes,
+                func.count(),
+                func.max(self.model.ID),
+                func.max(self.model.ATUALIZADO_EM),
+            )
+            .where(*self._condicoes_periodo(data_inicio, data_fim))
+            .group_by(ano, mes)
+        )
+        return {
+            (int(ano_), int(mes_)): (total, maior_id, maior_atualizado_em)
+            for ano_, mes_, total, maior_id, maior_atualizado_em in self.db.execute(consulta)
+        }
 
     def filtro_mes(self, mes: int, ano: int) -> List[MercadoGas]:
         """Retorna registros filtrando por mês e ano."""
-        consulta = self.db.query(self.model).filter(
-            extract('month', self.model.DATA) == mes,
-            extract('year', self.model.DATA) == ano
+        data_inicio, data_fim = intervalo_mes(mes, ano)
+        return self.listar(data_inicio=data_inicio, data_fim=data_fim)
+
+
+class MercadoGasHistoricoRepository:
+    """Arquivamento das versoes substituidas de MERCADO_GAS em MERCADO_GAS_HISTORICO."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.model = MercadoGasHistorico
+
+    def arquivar_lote(
+        self,
+        substituidos_antes_de: datetime,
+        apos_id: int = 0,
+        tamanho_lote: int = TAMANHO_LOTE_ARQUIVAMENTO,
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Move para o historico ate ``tamanho_lote`` linhas substituidas antes da data de corte.
+
+        O lote sao as primeiras linhas, em ordem de ID, apos ``apos_id``; a copia
+        (INSERT ... SELECT) e a remocao usam o mesmo intervalo de IDs e sao
+        confirmadas juntas, de modo que uma interrupcao nunca deixa linhas
+        duplicadas nem perdidas e basta executar de novo para continuar. Os
+        intervalos sao pequenos para que cada transacao bloqueie poucas linhas.
+        Retorna quantas linhas foram movidas e o ultimo ID do lote, ou
+        ``(0, None)`` quando nao ha mais o que arquivar.
+        """
+        origem = MercadoGas.__table__
+        condicoes = [
+            origem.c.ID > apos_id,
+            origem.c.ATUALIZADO_EM.is_not(None),
+            origem.c.ATUALIZADO_EM < substituidos_antes_de,
+        ]
+        ids_lote = (
+            select(origem.c.ID)
+            .where(*condicoes)
+            .order_by(origem.c.ID)
+            .limit(tamanho_lote)
+            .subquery()
         )
-        return consulta.order_by(self.model.DATA.desc()).all()
+        ultimo_id = self.db.execute(select(func.max(ids_lote.c.ID))).scalar()
+        if ultimo_id is None:
+            return 0, None
+
+        condicoes.append(origem.c.ID <= ultimo_id)
+        colunas = [coluna.name for coluna in origem.columns]
+        try:
+            self.db.execute(
+                insert(self.model.__table__).from_select(
+                    colunas + ["ARQUIVADO_EM"],
+                    select(
+                        *origem.columns,
+                        literal(datetime.now(FUSO_FORTALEZA)).label("ARQUIVADO_EM"),
+                    ).where(*condicoes),
+                )
+            )
+            datas = self.db.execute(delete(origem).where(*condicoes).returning(origem.c.DATA)).scalars().all()
+            registrar_alteracao(self.db, datas)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return len(datas), ultimo_id
@@ -0,0 +1,215 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from typing import Iterable, List, Optional
+
+from bd_pcp.db.models.importacao_gas import (
+    FASE_CONCLUIDA,
+    FASE_DUPLICADA,
+    FASE_ERRO,
+    FASE_NA_FILA,
+    FASES_EM_ANDAMENTO,
+    ImportacaoGas,
+    RegistroImportacaoGas,
+)
+from bd_pcp.db.repositories.gas_repositorios import FUSO_FORTALEZA
+
+
+class ImportacaoGasRepository:
+    """Repositorio das importacoes de MercadoGas em segundo plano."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.model = ImportacaoGas
+
+    def criar(
+        self,
+        id_: str,
+        tipo: str,
+        caminho: str,
+        arquivo: Optional[str] = None,
+        motor: Optional[str] = None,
+        modo: Optional[str] = None,
+        usuario: Optional[str] = None,
+        hash_conteudo: Optional[str] = None,
+        forcar: bool = False,
+    ) -> ImportacaoGas:
+        """Registra uma importacao na fila."""
+        importacao = self.model(
+            ID=id_,
+            TIPO=tipo,
+            CAMINHO=caminho,
+            ARQUIVO=arquivo,
+            MOTOR=motor,
+            MODO=modo,
+            USUARIO=usuario,
+            HASH=hash_conteudo,
+            FORCAR=forcar,
+            FASE=FASE_NA_FILA,
+            LINHAS_LIDAS=0,
+            LINHAS_INSERIDAS=0,
+            LINHAS_SUBSTITUIDAS=0,
+            LINHAS_INALTERADAS=0,
+        )
+        try:
+            self.db.add(importacao)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        self.db.refresh(importacao)
+        return importacao
+
+    def obter(self, id_: str) -> Optional[ImportacaoGas]:
+        """Retorna a importacao pelo ID."""
+        return self.db.get(self.model, id_)
+
+    def obter_em_andamento_por_hash(self, hash_conteudo: str) -> Optional[ImportacaoGas]:
+        """Retorna uma importacao do mesmo conteudo ainda na fila ou em execucao."""
+        consulta = (
+            select(self.model)
+            .where(
+                self.model.HASH == hash_conteudo,
+                self.model.FASE.not_in([FASE_CONCLUIDA, FASE_ERRO, FASE_DUPLICADA]),
+            )
+            .order_by(self.model.CRIADO_EM)
+            .limit(1)
+        )
+        return self.db.execute(consulta).scalars().first()
+
+    def listar_ids_na_fila(self) -> List[str]:
+        """Retorna os IDs das importacoes ainda nao iniciadas, das mais antigas para as mais novas."""
+        consulta = (
+            select(self.model.ID)
+            .where(self.model.FASE == FASE_NA_FILA)
+            .order_by(self.model.CRIADO_EM)
+        )
+        return list(self.db.execute(consulta).scalars())
+
+    def reservar(self, id_: str, fase: str) -> bool:
+        """
+        Passa a importacao de na_fila para ``fase``, registrando o inicio.
+
+        O UPDATE condicional garante que apenas um worker execute cada
+        importacao; retorna False se ela ja tiver sido reservada.
+        """
+        agora = datetime.now(FUSO_FORTALEZA)
+        comando = (
+            update(self.model)
+            .where(self.model.ID == id_, self.model.FASE == FASE_NA_FILA)
+            .values(FASE=fase, INICIADO_EM=agora, ATIVIDADE_EM=agora)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            reservadas = self.db.execute(comando).rowcount
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return reservadas == 1
+
+    def marcar_atividade(self, ids: Iterable[str]) -> None:
+        """Registra o sinal de vida das importacoes em execucao neste processo."""
+        ids = list(ids)
+        if not ids:
+            return
+        comando = (
+            update(self.model)
+            .where(self.model.ID.in_(ids), self.model.FASE.in_(FASES_EM_ANDAMENTO))
+            .values(ATIVIDADE_EM=datetime.now(FUSO_FORTALEZA))
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            self.db.execute(comando)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _condicao_abandonada(self, limite: datetime):
+        return (
+            self.model.FASE.in_(FASES_EM_ANDAMENTO),
+            func.coalesce(self.model.ATIVIDADE_EM, self.model.INICIADO_EM) < limite,
+        )
+
+    def listar_abandonadas(self, limite: datetime) -> List[ImportacaoGas]:
+        """Importacoes em andamento sem sinal de vida desde ``limite`` (processo interrompido)."""
+        consulta = select(self.model).where(*self._condicao_abandonada(limite))
+        return list(self.db.execute(consulta).scalars())
+
+    def encerrar_abandonada(self, id_: str, limite: datetime, erros: str) -> bool:
+        """
+        Marca como erro uma importacao abandonada.
+
+        A condicao e repetida no UPDATE: se o processo dono der sinal de vida
+        entre a consulta e a marcacao, nada muda e o retorno e False.
+        """
+        comando = (
+            update(self.model)
+            .where(self.model.ID == id_, *self._condicao_abandonada(limite))
+            .values(FASE=FASE_ERRO, ERROS=erros, CONCLUIDO_EM=datetime.now(FUSO_FORTALEZA))
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            encerradas = self.db.execute(comando).rowcount
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return encerradas == 1
+
+    def atualizar(self, id_: str, **valores) -> None:
+        """Grava fase, contagens, erros e tempos da importacao."""
+        comando = (
+            update(self.model)
+            .where(self.model.ID == id_)
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            self.db.execute(comando)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+
+class RegistroImportacaoGasRepository:
+    """Repositorio dos conteudos ja importados, consultados pelo SHA-256."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.model = RegistroImportacaoGas
+
+    def obter(self, hash_conteudo: str) -> Optional[RegistroImportacaoGas]:
+        """Busca pela chave primaria: custo constante, independente do tamanho do conteudo."""
+        return self.db.get(self.model, hash_conteudo)
+
+    def registrar(
+        self,
+        hash_conteudo: str,
+        tipo: str,
+        arquivo: Optional[str],
+        linhas_inseridas: int,
+        linhas_substituidas: int,
+    ) -> RegistroImportacaoGas:
+        """
+        Registra (ou, em uma reimportacao forcada, atualiza) o conteudo importado.
+
+        Nao confirma a transacao: o registro deve ser gravado junto com as
+        linhas importadas, no commit do chamador.
+        """
+        registro = self.obter(hash_conteudo)
+        if registro is None:
+            registro = self.model(HASH=hash_conteudo, IMPORTACOES=0)
+            self.db.add(registro)
+
+        registro.TIPO = tipo
+        registro.ARQUIVO = arquivo
+        registro.LINHAS_INSERIDAS = linhas_inseridas
+        registro.LINHAS_SUBSTITUIDAS = linhas_substituidas
+        registro.IMPORTACOES += 1
+        registro.IMPORTADO_EM = datetime.now(FUSO_FORTALEZA)
+        self.db.flush()
+        return registro
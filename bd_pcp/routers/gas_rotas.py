@@ -1,26 +1,180 @@
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
-from io import BytesIO
-from datetime import datetime
-import pandas as pd
-import time
+from starlette.background import BackgroundTask
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Hashable, Iterator, List, Literal, Optional, Tuple, Union
+from datetime import date, datetime, timedelta
+from itertools import chain, islice
+import base64
+import hashlib
+import json
+import os
+import tempfile
 
 
+from bd_pcp.core.cache_leitura import cache_leitura
+from bd_pcp.core.concorrencia import executar_em_thread
+from bd_pcp.core.config import settings
+from bd_pcp.core.metricas import linhas_inalteradas, linhas_inseridas, linhas_lidas, linhas_substituidas
 from bd_pcp.core.security import get_current_user
-from bd_pcp.core.session import get_db
-from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository
+from bd_pcp.core.session import SessionLocal, get_db
+from bd_pcp.db.models.importacao_gas import (
+    FASE_CONFIRMACAO,
+    FASE_INSERCAO,
+    FASE_LEITURA,
+    FASE_SUBSTITUICAO,
+    ImportacaoGas,
+    RegistroImportacaoGas,
+)
+from bd_pcp.db.repositories.gas_repositorios import (
+    AGREGACAO_SOMA,
+    MercadoGasRepository,
+    PosicaoMercadoGas,
+    intervalo_mes,
+)
+from bd_pcp.db.repositories.importacao_repositorios import (
+    ImportacaoGasRepository,
+    RegistroImportacaoGasRepository,
+)
+from bd_pcp.schemas.importacao_schema import ImportacaoDuplicada, ImportacaoGasSaida
 from bd_pcp.schemas.mercado_gas_schema import (
     MercadoGasCriacao,
+    MercadoGasPagina,
     MercadoGasSaida
 )
-from bd_pcp.services.gas_txt_parser import GasTxtParserError, parse_mercado_gas_upload
+from bd_pcp.services.gas_artefatos_excel import artefatos_excel
+from bd_pcp.services.gas_diferencial import MODO_DIFERENCIAL, MODO_SUBSTITUIR, DiferencaMercadoGas
+from bd_pcp.services.gas_exportacao import (
+    COMPRESSAO_NENHUMA,
+    FORMATO_XLSX,
+    FORMATOS_EXPORTACAO,
+    MEDIA_TYPE_EXCEL,
+    ExportacaoIndisponivel,
+    escrever_excel_mercado_gas,
+    extensao_exportacao,
+    gerar_exportacao,
+    validar_exportacao,
+)
+from bd_pcp.services.gas_txt_parser import MOTOR_PYTHON, GasTxtParserError, iterar_mercado_gas_upload
+from bd_pcp.services.importacao_jobs import ProgressoImportacao, fila_importacoes
 
 router = APIRouter(tags=["Gas"], prefix="/api/gas")
 
+LIMITE_PAGINA_PADRAO = 1000
+LIMITE_PAGINA_MAXIMO = 10000
+MEDIA_TYPE_JSON = "application/json"
+MEDIA_TYPE_NDJSON = "application/x-ndjson"
+LINHAS_POR_BLOCO_NDJSON = 1000
+TIPO_UPLOAD_TXT = "upload-txt"
+TIPO_UPSERT = "upsert"
+_LISTA_MERCADO_GAS = TypeAdapter(List[MercadoGasCriacao])
+_LISTA_SAIDA = TypeAdapter(List[MercadoGasSaida])
+TAMANHO_BLOCO_HASH = 1024 * 1024
+TAMANHO_BLOCO_ARQUIVO = 1024 * 1024
+
+
+def _codificar_cursor(posicao: PosicaoMercadoGas) -> str:
+    """Gera um cursor opaco a partir da posicao (DATA, ID)."""
+    data, id_ = posicao
+    bruto = json.dumps([data.isoformat(), id_], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor: str) -> PosicaoMercadoGas:
+    """Recupera a posicao (DATA, ID) de um cursor gerado por _codificar_cursor."""
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        data, id_ = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        return date.fromisoformat(data), int(id_)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginacao invalido.",
+        )
+
+
+def _periodo_consulta(
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+) -> Tuple[Optional[date], Optional[date]]:
+    """Converte o periodo inclusivo da API no intervalo semiaberto do repositorio."""
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="data_inicio deve ser menor ou igual a data_fim.",
+        )
+    return data_inicio, data_fim + timedelta(days=1) if data_fim else None
+
+
+def _serializar_bloco_ndjson(linhas: Iterator[Any]) -> bytes:
+    return b"".join(
+        MercadoGasSaida.model_validate(linha).model_dump_json().encode() + b"\n"
+        for linha in islice(linhas, LINHAS_POR_BLOCO_NDJSON)
+    )
+
+
+async def _gerar_ndjson(
+    consultar: Callable[[MercadoGasRepository], Iterator[Any]],
+) -> AsyncIterator[bytes]:
+    """Serializa em NDJSON, a medida que chegam do banco, as linhas de ``consultar(repositorio)``."""
+    # A sessao da dependencia get_db ja esta fechada quando o corpo e enviado,
+    # por isso o fluxo abre e encerra a propria sessao.
+    db = SessionLocal()
+    try:
+        linhas = consultar(MercadoGasRepository(db))
+        while bloco := await executar_em_thread(_serializar_bloco_ndjson, linhas):
+            yield bloco
+    finally:
+        await executar_em_thread(db.close)
+
+
+def _serializar_json(resultado: Union[MercadoGasPagina, List[MercadoGasSaida]]) -> bytes:
+    if isinstance(resultado, MercadoGasPagina):
+        return resultado.model_dump_json().encode()
+    return _LISTA_SAIDA.dump_json(resultado)
+
+
+async def _chave_cache(
+    db: Session,
+    consulta: str,
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+    **parametros: Any,
+) -> Hashable:
+    """
+    ``cache_leitura.chave`` depois de invalidar os meses alterados por outros processos.
+
+    A verificacao no banco (``assinaturas_por_mes``) roda no maximo uma vez a
+    cada GAS_CACHE_VERIFICACAO_SEGUNDOS; no intervalo, um acerto nao consulta o banco.
+    """
+    if cache_leitura.verificacao_pendente(data_inicio, data_fim):
+        await executar_em_thread(
+            cache_leitura.sincronizar,
+            data_inicio,
+            data_fim,
+            MercadoGasRepository(db).assinaturas_por_mes,
+        )
+    return cache_leitura.chave(consulta, data_inicio, data_fim, **parametros)
+
+
+async def _resposta_em_cache(chave, gerar: Callable[[], bytes], media_type: str = MEDIA_TYPE_JSON) -> Response:
+    """
+    Responde com o conteudo em cache para ``chave`` ou o gera (fora do event loop) e guarda.
+
+    A chave vem de ``_chave_cache``, obtida antes de consultar o banco.
+    """
+    conteudo = cache_leitura.obter(chave)
+    estado = "HIT"
+    if conteudo is None:
+        conteudo = await executar_em_thread(gerar)
+        cache_leitura.guardar(chave, conteudo)
+        estado = "MISS"
+    return Response(conteudo, media_type=media_type, headers={"X-Cache": estado})
+
 
-def validar_payload(dados: List[MercadoGasCriacao]) -> None:
+def validar_payload(dados: List[MercadoGasCriacao], indice_inicio: int = 1) -> None:
     """Valida a lista completa antes de persistir no banco."""
     if not dados:
         raise HTTPException(
@@ -28,7 +182,7 @@ def validar_payload(dados: List[MercadoGasCriacao]) -> None:
             detail="Lista de registros vazia."
         )
 
-    for indice, item in enumerate(dados, start=1):
+    for indice, item in enumerate(dados, start=indice_inicio):
         planilha = item.PLANILHA.strip()
         aba = item.ABA.strip()
         produto = item.PRODUTO.strip()
@@ -41,23 +195,98 @@ def validar_payload(dados: List[MercadoGasCriacao]) -> None:
         )
 
 
-@router.get("/", response_model=List[MercadoGasSaida])
+@router.get(
+    "/",
+    response_model=Union[MercadoGasPagina, List[MercadoGasSaida]],
+    responses={200: {"content": {MEDIA_TYPE_NDJSON: {}}}},
+)
 async def listar_mercado_gas(
+    request: Request,
     apenas_sem_atualizacao: bool = Query(
         False,
         description="Quando verdadeiro, retorna somente registros sem data de atualizacao.",
     ),
+    data_inicio: Optional[date] = Query(None, description="Data inicial do periodo (inclusive)."),
+    data_fim: Optional[date] = Query(None, description="Data final do periodo (inclusive)."),
+    limite: Optional[int] = Query(
+        None,
+        ge=1,
+        le=LIMITE_PAGINA_MAXIMO,
+        description="Tamanho da pagina. Quando informado (ou com cursor), a resposta e paginada.",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Cursor opaco retornado em proximo_cursor pela pagina anterior.",
+    ),
+    formato: Literal["json", "ndjson"] = Query(
+        "json",
+        description="Use ndjson (ou Accept: application/x-ndjson) para receber um registro por linha em fluxo.",
+    ),
+    incluir_historico: bool = Query(
+        False,
+        description="Inclui as versoes substituidas ja arquivadas em MERCADO_GAS_HISTORICO.",
+    ),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
-    """Retorna registros de MercadoGas, com filtro opcional por ATUALIZADO_EM."""
+    """
+    Retorna registros de MercadoGas, com filtro opcional por ATUALIZADO_EM.
+
+    Sem ``limite`` e ``cursor`` devolve a lista completa (comportamento legado);
+    com eles devolve uma pagina ordenada por DATA e ID decrescentes e o
+    ``proximo_cursor`` para continuar a leitura. No formato NDJSON todos os
+    registros sao enviados em fluxo, sem paginacao. As versoes arquivadas so
+    entram com ``incluir_historico=true``.
+
+    As respostas JSON ficam no cache de leitura ate a proxima gravacao nos
+    meses do periodo consultado (cabecalho ``X-Cache``).
+    """
+    inicio, fim = _periodo_consulta(data_inicio, data_fim)
+
+    if formato == "ndjson" or MEDIA_TYPE_NDJSON in request.headers.get("accept", ""):
+        if limite is not None or cursor is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Paginacao nao se aplica ao formato ndjson.",
+            )
+        return StreamingResponse(
+            _gerar_ndjson(
+                lambda repositorio: repositorio.iterar(
+                    apenas_sem_atualizacao=apenas_sem_atualizacao,
+                    data_inicio=inicio,
+                    data_fim=fim,
+                    incluir_historico=incluir_historico,
+                )
+            ),
+            media_type=MEDIA_TYPE_NDJSON,
+        )
+
+    apos = _decodificar_cursor(cursor) if cursor else None
     try:
-        start = time.perf_counter()
-        repositorio = MercadoGasRepository(db)
-        registros = repositorio.listar(apenas_sem_atualizacao=apenas_sem_atualizacao)
-        end = time.perf_counter()
-        print(f"Tempo total da query: {(end - start)*1000:.2f} ms")
-        return [MercadoGasSaida.model_validate(item) for item in registros]
+        chave = await _chave_cache(
+            db,
+            "listar",
+            inicio,
+            fim,
+            apenas_sem_atualizacao=apenas_sem_atualizacao,
+            limite=limite,
+            apos=apos,
+            incluir_historico=incluir_historico,
+        )
+        return await _resposta_em_cache(
+            chave,
+            lambda: _serializar_json(
+                _listar_registros(
+                    db,
+                    apenas_sem_atualizacao=apenas_sem_atualizacao,
+                    data_inicio=inicio,
+                    data_fim=fim,
+                    limite=limite,
+                    apos=apos,
+                    incluir_historico=incluir_historico,
+                )
+            ),
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -67,39 +296,337 @@ async def listar_mercado_gas(
         )
 
 
-@router.post("/upsert", status_code=status.HTTP_200_OK)
+def _listar_registros(
+    db: Session,
+    apenas_sem_atualizacao: bool,
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+    limite: Optional[int],
+    apos: Optional[PosicaoMercadoGas],
+    incluir_historico: bool = False,
+) -> Union[MercadoGasPagina, List[MercadoGasSaida]]:
+    repositorio = MercadoGasRepository(db)
+
+    if limite is None and apos is None:
+        registros = repositorio.listar(
+            apenas_sem_atualizacao=apenas_sem_atualizacao,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            incluir_historico=incluir_historico,
+        )
+        return [MercadoGasSaida.model_validate(item) for item in registros]
+
+    registros, proxima_posicao = repositorio.listar_pagina(
+        limite=limite or LIMITE_PAGINA_PADRAO,
+        apos=apos,
+        apenas_sem_atualizacao=apenas_sem_atualizacao,
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        incluir_historico=incluir_historico,
+    )
+    return MercadoGasPagina(
+        itens=[MercadoGasSaida.model_validate(item) for item in registros],
+        proximo_cursor=_codificar_cursor(proxima_posicao) if proxima_posicao else None,
+    )
+
+
+@router.get(
+    "/atuais",
+    response_model=List[MercadoGasSaida],
+    responses={200: {"content": {MEDIA_TYPE_NDJSON: {}}}},
+)
+async def listar_mercado_gas_atuais(
+    request: Request,
+    data_inicio: Optional[date] = Query(None, description="Data inicial do periodo (inclusive)."),
+    data_fim: Optional[date] = Query(None, description="Data final do periodo (inclusive)."),
+    planilha: Optional[str] = Query(None, description="Filtra por PLANILHA."),
+    aba: Optional[str] = Query(None, description="Filtra por ABA."),
+    formato: Literal["json", "ndjson"] = Query(
+        "json",
+        description="Use ndjson (ou Accept: application/x-ndjson) para receber um registro por linha em fluxo.",
+    ),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Retorna o retrato atual de MercadoGas: apenas registros sem ATUALIZADO_EM.
+
+    A leitura usa o indice filtrado das linhas atuais, de modo que o tempo de
+    resposta depende do retrato e nao do historico de substituicoes. Os
+    registros vem ordenados por DATA, PLANILHA, ABA e ID decrescentes. As
+    respostas JSON usam o cache de leitura, como ``GET /api/gas/``.
+    """
+    inicio, fim = _periodo_consulta(data_inicio, data_fim)
+
+    if formato == "ndjson" or MEDIA_TYPE_NDJSON in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _gerar_ndjson(
+                lambda repositorio: repositorio.iterar_atuais(
+                    data_inicio=inicio,
+                    data_fim=fim,
+                    planilha=planilha,
+                    aba=aba,
+                )
+            ),
+            media_type=MEDIA_TYPE_NDJSON,
+        )
+
+    try:
+        chave = await _chave_cache(db, "atuais", inicio, fim, planilha=planilha, aba=aba)
+        return await _resposta_em_cache(
+            chave,
+            lambda: _serializar_json(_listar_atuais(db, inicio, fim, planilha, aba)),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar dados: {str(e)}",
+        )
+
+
+def _listar_atuais(
+    db: Session,
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+    planilha: Optional[str],
+    aba: Optional[str],
+) -> List[MercadoGasSaida]:
+    registros = MercadoGasRepository(db).listar_atuais(
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        planilha=planilha,
+        aba=aba,
+    )
+    return [MercadoGasSaida.model_validate(item) for item in registros]
+
+
+@router.get("/agregado", response_model=List[Dict[str, Any]])
+async def agregar_mercado_gas(
+    agrupar: List[Literal["PLANILHA", "ABA", "PRODUTO", "LOCAL", "EMPRESA", "UNIDADE"]] = Query(
+        [],
+        description="Dimensoes do agrupamento (repita o parametro para varias).",
+    ),
+    granularidade: Optional[Literal["dia", "mes", "ano"]] = Query(
+        None,
+        description="Agrupa DATA por dia, mes ou ano; sem ela o periodo inteiro forma um unico grupo.",
+    ),
+    funcoes: List[Literal["soma", "media", "minimo", "maximo", "contagem"]] = Query(
+        [AGREGACAO_SOMA],
+        description="Funcoes aplicadas a VALOR (repita o parametro para varias).",
+    ),
+    data_inicio: Optional[date] = Query(None, description="Data inicial do periodo (inclusive)."),
+    data_fim: Optional[date] = Query(None, description="Data final do periodo (inclusive)."),
+    planilha: Optional[str] = Query(None, description="Filtra por PLANILHA."),
+    aba: Optional[str] = Query(None, description="Filtra por ABA."),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Agrega VALOR do retrato atual (registros sem ATUALIZADO_EM) no banco.
+
+    A consulta e um unico GROUP BY pelas dimensoes de ``agrupar`` e pelo
+    PERIODO (primeiro dia do dia/mes/ano, conforme ``granularidade``), sobre o
+    indice filtrado das linhas atuais. Cada grupo traz as dimensoes, o PERIODO
+    e uma coluna por funcao (SOMA, MEDIA, MINIMO, MAXIMO, CONTAGEM). As
+    respostas usam o cache de leitura, como ``GET /api/gas/atuais``.
+    """
+    inicio, fim = _periodo_consulta(data_inicio, data_fim)
+    agrupar = list(dict.fromkeys(agrupar))
+    funcoes = list(dict.fromkeys(funcoes))
+
+    try:
+        chave = await _chave_cache(
+            db,
+            "agregado",
+            inicio,
+            fim,
+            agrupar=tuple(agrupar),
+            granularidade=granularidade,
+            funcoes=tuple(funcoes),
+            planilha=planilha,
+            aba=aba,
+        )
+        return await _resposta_em_cache(
+            chave,
+            lambda: json.dumps(
+                jsonable_encoder(
+                    MercadoGasRepository(db).agregar(
+                        agrupar=agrupar,
+                        granularidade=granularidade,
+                        funcoes=funcoes,
+                        data_inicio=inicio,
+                        data_fim=fim,
+                        planilha=planilha,
+                        aba=aba,
+                    )
+                ),
+                ensure_ascii=False,
+            ).encode(),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao agregar dados: {str(e)}",
+        )
+
+
+@router.post(
+    "/upsert",
+    status_code=status.HTTP_200_OK,
+    responses={202: {"model": ImportacaoGasSaida}},
+)
 async def criar_ou_atualizar_mercado_gas(
     dados: List[MercadoGasCriacao],
+    assincrono: bool = Query(
+        False,
+        description="Quando verdadeiro, responde 202 com o ID da importacao e processa em segundo plano.",
+    ),
+    forcar: bool = Query(
+        False,
+        description="Reimporta mesmo que um payload identico ja tenha sido importado.",
+    ),
+    modo: Optional[Literal["substituir", "diferencial"]] = Query(
+        None,
+        description="substituir ou diferencial (grava so as linhas que mudaram). Padrao: GAS_IMPORTACAO_MODO.",
+    ),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """
     Atualiza ATUALIZADO_EM dos registros existentes com a mesma combinacao
-    data/planilha/aba antes de adicionar novos registros do payload.
+    data/planilha/aba antes de adicionar novos registros do payload. No modo
+    ``diferencial`` apenas as linhas que mudaram sao substituidas e inseridas.
+
+    Um payload identico a um ja importado (mesmo SHA-256) nao e gravado de
+    novo, salvo com ``forcar=true``. Com ``assincrono=true`` o payload e gravado
+    e processado por uma importacao em segundo plano, acompanhada em
+    ``GET /api/gas/jobs/{id}``.
     """
     validar_payload(dados)
+    conteudo = await executar_em_thread(_LISTA_MERCADO_GAS.dump_json, dados)
+    hash_payload, registro = await executar_em_thread(_verificar_importado, db, conteudo, forcar)
+    if registro is not None:
+        return _resposta_duplicada(registro)
+
+    if assincrono:
+        importacao = await executar_em_thread(
+            fila_importacoes.enfileirar,
+            db,
+            TIPO_UPSERT,
+            conteudo,
+            modo=modo,
+            usuario=current_user["user_id"],
+            hash_conteudo=hash_payload,
+            forcar=forcar,
+        )
+        return _resposta_importacao(importacao)
+    return await executar_em_thread(
+        _substituir_e_inserir,
+        db,
+        dados,
+        hash_conteudo=hash_payload,
+        modo=modo or settings.GAS_IMPORTACAO_MODO,
+    )
+
+
+def _hash_conteudo(conteudo: Union[bytes, BinaryIO]) -> str:
+    """SHA-256 (hexadecimal) de um payload ou de um arquivo posicionavel, lido em blocos."""
+    if isinstance(conteudo, bytes):
+        return hashlib.sha256(conteudo).hexdigest()
+
+    digest = hashlib.sha256()
+    conteudo.seek(0)
+    while bloco := conteudo.read(TAMANHO_BLOCO_HASH):
+        digest.update(bloco)
+    conteudo.seek(0)
+    return digest.hexdigest()
+
+
+def _verificar_importado(
+    db: Session,
+    conteudo: Union[bytes, BinaryIO],
+    forcar: bool,
+) -> Tuple[str, Optional[RegistroImportacaoGas]]:
+    """Calcula o hash do conteudo e, sem ``forcar``, busca uma importacao anterior identica."""
+    hash_conteudo = _hash_conteudo(conteudo)
+    if forcar:
+        return hash_conteudo, None
+    return hash_conteudo, RegistroImportacaoGasRepository(db).obter(hash_conteudo)
+
+
+def _resposta_duplicada(registro: RegistroImportacaoGas) -> JSONResponse:
+    """Resposta 200 para conteudo ja importado: nenhuma linha e lida nem gravada."""
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=jsonable_encoder(
+            ImportacaoDuplicada(
+                hash=registro.HASH,
+                arquivo=registro.ARQUIVO,
+                importado_em=registro.IMPORTADO_EM,
+                linhas_importadas=registro.LINHAS_INSERIDAS,
+            )
+        ),
+    )
+
+
+def _registrar_importacao(
+    db: Session,
+    hash_conteudo: Optional[str],
+    tipo: str,
+    arquivo: Optional[str],
+    linhas_inseridas: int,
+    linhas_substituidas: int,
+) -> None:
+    if hash_conteudo:
+        RegistroImportacaoGasRepository(db).registrar(
+            hash_conteudo, tipo, arquivo, linhas_inseridas, linhas_substituidas,
+        )
+
 
+def _substituir_e_inserir(
+    db: Session,
+    dados: List[MercadoGasCriacao],
+    progresso: Optional[ProgressoImportacao] = None,
+    hash_conteudo: Optional[str] = None,
+    modo: str = MODO_SUBSTITUIR,
+) -> Dict[str, int]:
+    progresso = progresso or ProgressoImportacao()
     try:
         repositorio = MercadoGasRepository(db)
-        combos_atualizados = set()
-        registros_para_criacao: List[MercadoGasCriacao] = []
-
-        for item in dados:
-            chave = (item.DATA, item.PLANILHA, item.ABA)
-            if chave not in combos_atualizados:
-                repositorio.atualizar_atualizado_em_por_planilha_aba_data(
-                    data=item.DATA,
-                    planilha=item.PLANILHA,
-                    aba=item.ABA,
+        total_lidos = len(dados)
+        total_inalterados = 0
+        progresso.contar(lidas=total_lidos)
+
+        with progresso.etapa(FASE_SUBSTITUICAO):
+            if modo == MODO_DIFERENCIAL:
+                diferenca = DiferencaMercadoGas(repositorio)
+                dados = diferenca.filtrar(dados)
+                total_inalterados = diferenca.inalterados
+                total_substituidos = repositorio.atualizar_atualizado_em_por_ids(diferenca.ids_substituidos())
+            else:
+                substituidos = repositorio.atualizar_atualizado_em_em_lote(
+                    (item.DATA, item.PLANILHA, item.ABA) for item in dados
                 )
-                combos_atualizados.add(chave)
+                total_substituidos = sum(substituidos.values())
+        progresso.contar(substituidas=total_substituidos, inalteradas=total_inalterados)
 
-            registros_para_criacao.append(item)
+        with progresso.etapa(FASE_INSERCAO):
+            total_processados = repositorio.inserir_em_lote(dados, confirmar=False)
+        progresso.contar(inseridas=total_processados)
 
-        criados = repositorio.criar_em_lote(registros_para_criacao)
-        resultados = [MercadoGasSaida.model_validate(resultado) for resultado in criados]
+        with progresso.etapa(FASE_CONFIRMACAO):
+            _registrar_importacao(db, hash_conteudo, TIPO_UPSERT, None, total_processados, total_substituidos)
+            db.commit()
 
-        return {"total_processados": len(resultados)}
+        linhas_lidas.incrementar(total_lidos, "upsert")
+        linhas_inseridas.incrementar(total_processados, "upsert")
+        linhas_substituidas.incrementar(total_substituidos, "upsert")
+        linhas_inalteradas.incrementar(total_inalterados, "upsert")
+        return {
+            "total_processados": total_processados,
+            "total_substituidos": total_substituidos,
+            "total_inalterados": total_inalterados,
+        }
 
     except HTTPException:
         db.rollback()
@@ -115,47 +642,162 @@ async def criar_ou_atualizar_mercado_gas(
 @router.post(
     "/upload-txt",
     status_code=status.HTTP_201_CREATED,
+    responses={202: {"model": ImportacaoGasSaida}},
 )
 async def importar_mercado_gas_txt(
     arquivo: UploadFile = File(...),
+    motor: Optional[Literal["python", "colunar"]] = Query(
+        None,
+        description="Motor de parse (python ou colunar). Padrao: GAS_PARSER_MOTOR.",
+    ),
+    assincrono: bool = Query(
+        False,
+        description="Quando verdadeiro, grava o arquivo, responde 202 com o ID da importacao e processa em segundo plano.",
+    ),
+    forcar: bool = Query(
+        False,
+        description="Reimporta mesmo que um arquivo identico ja tenha sido importado.",
+    ),
+    modo: Optional[Literal["substituir", "diferencial"]] = Query(
+        None,
+        description="substituir ou diferencial (grava so as linhas que mudaram). Padrao: GAS_IMPORTACAO_MODO.",
+    ),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
-    """Importa registros de MercadoGas a partir de um arquivo texto delimitado."""
+    """
+    Importa registros de MercadoGas a partir de um arquivo texto delimitado.
+
+    O arquivo e lido em fluxo a partir do spool do upload e persistido em lotes
+    dentro de uma unica transacao, que so e confirmada apos o ultimo lote. Com
+    ``assincrono=true`` o arquivo e gravado em disco e importado em segundo
+    plano; o andamento fica em ``GET /api/gas/jobs/{id}``.
+
+    O SHA-256 do arquivo fica registrado com a importacao: um arquivo identico
+    a um ja importado responde 200 sem ser lido de novo, salvo com ``forcar=true``.
+    """
     if not arquivo.filename.lower().endswith(".txt"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="O arquivo deve ter a extensão .txt.",
         )
 
-    conteudo_bruto = await arquivo.read()
+    hash_arquivo, registro = await executar_em_thread(_verificar_importado, db, arquivo.file, forcar)
+    if registro is not None:
+        return _resposta_duplicada(registro)
 
-    try:
-        registros = parse_mercado_gas_upload(conteudo_bruto)
-    except GasTxtParserError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=exc.detail,
+    if assincrono:
+        importacao = await executar_em_thread(
+            fila_importacoes.enfileirar,
+            db,
+            TIPO_UPLOAD_TXT,
+            arquivo.file,
+            arquivo=arquivo.filename,
+            motor=motor,
+            modo=modo,
+            usuario=current_user["user_id"],
+            hash_conteudo=hash_arquivo,
+            forcar=forcar,
         )
+        return _resposta_importacao(importacao)
+
+    resultado = await executar_em_thread(
+        _importar_arquivo,
+        db,
+        arquivo.file,
+        motor or settings.GAS_PARSER_MOTOR,
+        hash_conteudo=hash_arquivo,
+        nome_arquivo=arquivo.filename,
+        modo=modo or settings.GAS_IMPORTACAO_MODO,
+    )
+    return {**resultado, "arquivo": arquivo.filename}
 
-    validar_payload(registros)
 
+def _importar_arquivo(
+    db: Session,
+    arquivo: BinaryIO,
+    motor: str = MOTOR_PYTHON,
+    progresso: Optional[ProgressoImportacao] = None,
+    hash_conteudo: Optional[str] = None,
+    nome_arquivo: Optional[str] = None,
+    modo: str = MODO_SUBSTITUIR,
+) -> Dict[str, int]:
+    progresso = progresso or ProgressoImportacao()
+    lotes = iterar_mercado_gas_upload(
+        arquivo,
+        motor=motor,
+        processos=settings.GAS_PARSER_PROCESSOS or os.cpu_count() or 1,
+        limite_paralelo=settings.GAS_PARSER_LIMITE_PARALELO_MB * 1024 * 1024,
+    )
     try:
         repositorio = MercadoGasRepository(db)
+        diferenca = DiferencaMercadoGas(repositorio) if modo == MODO_DIFERENCIAL else None
         combos_atualizados = set()
+        total_lidos = 0
+        total_processados = 0
+        total_substituidos = 0
 
-        for item in registros:
-            chave = (item.DATA, item.PLANILHA, item.ABA)
-            if chave not in combos_atualizados:
-                repositorio.atualizar_atualizado_em_por_planilha_aba_data(
-                    data=item.DATA,
-                    planilha=item.PLANILHA,
-                    aba=item.ABA,
-                )
-                combos_atualizados.add(chave)
-        criados = repositorio.criar_em_lote(registros)
-        return {"total_processados": len(criados), "arquivo": arquivo.filename}
+        while True:
+            with progresso.etapa(FASE_LEITURA):
+                lote = next(lotes, None)
+                if lote is not None:
+                    # Numera pelas linhas lidas: no modo diferencial nem todas sao inseridas.
+                    validar_payload(lote, indice_inicio=total_lidos + 1)
+            if lote is None:
+                break
+            total_lidos += len(lote)
+            linhas_lidas.incrementar(len(lote), "upload-txt")
+            progresso.contar(lidas=len(lote))
+
+            with progresso.etapa(FASE_SUBSTITUICAO):
+                if diferenca is not None:
+                    # As substituicoes do modo diferencial so sao conhecidas apos o ultimo lote.
+                    inalterados_antes = diferenca.inalterados
+                    lote = diferenca.filtrar(lote)
+                    substituidos_lote = 0
+                    progresso.contar(inalteradas=diferenca.inalterados - inalterados_antes)
+                else:
+                    novas_chaves = {
+                        (item.DATA, item.PLANILHA, item.ABA) for item in lote
+                    } - combos_atualizados
+                    substituidos = repositorio.atualizar_atualizado_em_em_lote(novas_chaves)
+                    combos_atualizados.update(novas_chaves)
+                    substituidos_lote = sum(substituidos.values())
+
+            with progresso.etapa(FASE_INSERCAO):
+                inseridos = repositorio.inserir_em_lote(lote, confirmar=False)
+            total_processados += inseridos
+            total_substituidos += substituidos_lote
+            progresso.contar(inseridas=inseridos, substituidas=substituidos_lote)
+
+        total_inalterados = 0
+        if diferenca is not None:
+            with progresso.etapa(FASE_SUBSTITUICAO):
+                substituidos_lote = repositorio.atualizar_atualizado_em_por_ids(diferenca.ids_substituidos())
+            total_substituidos += substituidos_lote
+            total_inalterados = diferenca.inalterados
+            progresso.contar(substituidas=substituidos_lote)
 
+        with progresso.etapa(FASE_CONFIRMACAO):
+            _registrar_importacao(
+                db, hash_conteudo, TIPO_UPLOAD_TXT, nome_arquivo, total_processados, total_substituidos,
+            )
+            db.commit()
+        linhas_inseridas.incrementar(total_processados, "upload-txt")
+        linhas_substituidas.incrementar(total_substituidos, "upload-txt")
+        linhas_inalteradas.incrementar(total_inalterados, "upload-txt")
+        return {
+            "total_processados": total_processados,
+            "total_substituidos": total_substituidos,
+            "total_inalterados": total_inalterados,
+        }
+
+    except GasTxtParserError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=exc.detail,
+        )
     except HTTPException:
         db.rollback()
         raise
@@ -165,63 +807,324 @@ async def importar_mercado_gas_txt(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao importar arquivo: {str(e)}"
         )
+    finally:
+        # Encerra o parse (e o fluxo sobre o arquivo) antes de o chamador fechar o arquivo.
+        lotes.close()
+
+
+def _executar_upload_txt(db: Session, importacao: ImportacaoGas, progresso: ProgressoImportacao) -> Dict[str, int]:
+    with open(importacao.CAMINHO, "rb") as arquivo:
+        return _importar_arquivo(
+            db,
+            arquivo,
+            importacao.MOTOR or settings.GAS_PARSER_MOTOR,
+            progresso,
+            hash_conteudo=importacao.HASH,
+            nome_arquivo=importacao.ARQUIVO,
+            modo=importacao.MODO or settings.GAS_IMPORTACAO_MODO,
+        )
+
+
+def _executar_upsert(db: Session, importacao: ImportacaoGas, progresso: ProgressoImportacao) -> Dict[str, int]:
+    with open(importacao.CAMINHO, "rb") as arquivo:
+        dados = _LISTA_MERCADO_GAS.validate_json(arquivo.read())
+    return _substituir_e_inserir(
+        db,
+        dados,
+        progresso,
+        hash_conteudo=importacao.HASH,
+        modo=importacao.MODO or settings.GAS_IMPORTACAO_MODO,
+    )
+
+
+fila_importacoes.registrar_tipo(TIPO_UPLOAD_TXT, _executar_upload_txt)
+fila_importacoes.registrar_tipo(TIPO_UPSERT, _executar_upsert)
+
+
+def _resposta_importacao(importacao: ImportacaoGas) -> JSONResponse:
+    """Resposta 202 de uma importacao enfileirada, com o endereco para acompanhamento."""
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder(ImportacaoGasSaida.model_validate(importacao)),
+        headers={"Location": f"{router.prefix}/jobs/{importacao.ID}"},
+    )
+
+
+@router.get("/jobs/{importacao_id}", response_model=ImportacaoGasSaida)
+async def consultar_importacao(
+    importacao_id: str,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user),
+):
+    """
+    Retorna fase, linhas processadas, erros e tempos de uma importacao em segundo plano.
+    """
+    importacao = await executar_em_thread(ImportacaoGasRepository(db).obter, importacao_id)
+    if importacao is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Importacao nao encontrada.",
+        )
+    return ImportacaoGasSaida.model_validate(importacao)
+
 
 @router.get("/exportar-excel", response_model=bytes)
 async def exportar_excel(
-    mes: int = Query(..., ge=1, le=12, description="Mês para filtrar os registros."),
-    ano: int = Query(..., ge=2000, le=datetime.now().year, description="Ano para filtrar os registros."),
+    mes: Optional[int] = Query(None, ge=1, le=12, description="Mês para filtrar os registros."),
+    ano: Optional[int] = Query(None, ge=2000, le=datetime.now().year, description="Ano para filtrar os registros."),
+    data_inicio: Optional[date] = Query(None, description="Data inicial do periodo (inclusive), alternativa a mes/ano."),
+    data_fim: Optional[date] = Query(None, description="Data final do periodo (inclusive), alternativa a mes/ano."),
+    incluir_historico: bool = Query(
+        False,
+        description="Inclui as versoes substituidas ja arquivadas em MERCADO_GAS_HISTORICO.",
+    ),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Exporta os registros filtrados por mês e ano (ou por periodo) para um arquivo Excel.
+
+    As linhas sao lidas do cursor em fluxo e gravadas no modo constant_memory
+    do xlsxwriter. Exportacoes por mes/ano sao servidas do diretorio de
+    artefatos (``GAS_EXCEL_DIR``), gerados uma vez por versao dos dados do mes.
+    Nos periodos, arquivos que cabem no cache de leitura sao guardados nele ate
+    a proxima gravacao nos meses do periodo; os maiores sao enviados em blocos
+    e removidos ao final da resposta.
+    """
+    inicio, fim, sufixo = _periodo_exportacao(mes, ano, data_inicio, data_fim)
+    nome_arquivo = f"mercado_gas_{sufixo}.xlsx"
+    if mes is not None and artefatos_excel.ativo and not incluir_historico:
+        return await _exportar_artefato_mes(db, ano, mes, nome_arquivo)
+
+    chave = await _chave_cache(db, "exportar-excel", inicio, fim, incluir_historico=incluir_historico)
+    conteudo = cache_leitura.obter(chave)
+    estado = "HIT"
+    if conteudo is None:
+        caminho = await executar_em_thread(_gerar_arquivo_excel, db, inicio, fim, incluir_historico)
+        if os.path.getsize(caminho) > cache_leitura.tamanho_maximo_item:
+            return FileResponse(
+                caminho,
+                media_type=MEDIA_TYPE_EXCEL,
+                filename=nome_arquivo,
+                background=BackgroundTask(os.remove, caminho),
+            )
+        conteudo = await executar_em_thread(_ler_e_remover, caminho)
+        cache_leitura.guardar(chave, conteudo)
+        estado = "MISS"
+
+    return Response(
+        conteudo,
+        media_type=MEDIA_TYPE_EXCEL,
+        headers={
+            "Content-Disposition": f'attachment; filename="{nome_arquivo}"',
+            "X-Cache": estado,
+        },
+    )
+
+
+@router.get(
+    "/exportar",
+    responses={200: {"content": {media_type: {} for media_type, _, _ in FORMATOS_EXPORTACAO.values()}}},
+)
+async def exportar(
+    formato: Literal["xlsx", "csv", "parquet", "arrow"] = Query(
+        FORMATO_XLSX,
+        description="Formato do arquivo: xlsx, csv, parquet ou arrow (Arrow IPC em fluxo).",
+    ),
+    compressao: Optional[str] = Query(
+        None,
+        description=(
+            "csv: nenhuma (padrao) ou gzip; parquet: snappy (padrao), zstd, gzip ou nenhuma; "
+            "arrow: nenhuma (padrao), zstd ou lz4."
+        ),
+    ),
+    mes: Optional[int] = Query(None, ge=1, le=12, description="Mês para filtrar os registros."),
+    ano: Optional[int] = Query(None, ge=2000, le=datetime.now().year, description="Ano para filtrar os registros."),
+    data_inicio: Optional[date] = Query(None, description="Data inicial do periodo (inclusive), alternativa a mes/ano."),
+    data_fim: Optional[date] = Query(None, description="Data final do periodo (inclusive), alternativa a mes/ano."),
+    incluir_historico: bool = Query(
+        False,
+        description="Inclui as versoes substituidas ja arquivadas em MERCADO_GAS_HISTORICO.",
+    ),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Exporta os registros filtrados por mês e ano para um arquivo Excel."""
+    """
+    Exporta os registros do mes/ano (ou do periodo) no formato escolhido.
+
+    ``xlsx`` segue o mesmo caminho de ``/exportar-excel``. CSV, Parquet e
+    Arrow sao gerados em fluxo a partir do cursor, em lotes de
+    LINHAS_POR_LOTE_EXPORTACAO linhas (um row group do Parquet, um record
+    batch do Arrow), e cada lote e enviado assim que fica pronto. Parquet e
+    Arrow dependem do pacote opcional pyarrow; sem ele a rota responde 501.
+    """
+    if formato == FORMATO_XLSX:
+        if compressao not in (None, COMPRESSAO_NENHUMA):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="O formato xlsx ja e compactado e nao aceita compressao.",
+            )
+        return await exportar_excel(
+            mes=mes,
+            ano=ano,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            incluir_historico=incluir_historico,
+            db=db,
+            current_user=current_user,
+        )
+
+    try:
+        compressao = validar_exportacao(formato, compressao)
+    except ExportacaoIndisponivel as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    inicio, fim, sufixo = _periodo_exportacao(mes, ano, data_inicio, data_fim)
+    nome_arquivo = f"mercado_gas_{sufixo}.{extensao_exportacao(formato, compressao)}"
+
+    # Como no NDJSON, o fluxo usa uma sessao propria: a de get_db fecha antes do corpo ser enviado.
+    db_fluxo = SessionLocal()
+    try:
+        linhas = MercadoGasRepository(db_fluxo).iterar(
+            data_inicio=inicio,
+            data_fim=fim,
+            incluir_historico=incluir_historico,
+        )
+        primeira = await executar_em_thread(next, linhas, None)
+    except Exception as e:
+        await executar_em_thread(db_fluxo.close)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao exportar dados: {str(e)}"
+        )
+
+    if primeira is None:
+        await executar_em_thread(db_fluxo.close)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nenhum registro encontrado para o período especificado."
+        )
+
+    media_type, _, _ = FORMATOS_EXPORTACAO[formato]
+    return StreamingResponse(
+        _enviar_exportacao(db_fluxo, gerar_exportacao(chain([primeira], linhas), formato, compressao)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'},
+    )
+
+
+async def _enviar_exportacao(db: Session, blocos: Iterator[bytes]) -> AsyncIterator[bytes]:
+    try:
+        while (bloco := await executar_em_thread(next, blocos, None)) is not None:
+            yield bloco
+    finally:
+        await executar_em_thread(db.close)
+
+
+def _periodo_exportacao(
+    mes: Optional[int],
+    ano: Optional[int],
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+) -> Tuple[date, date, str]:
+    """Periodo semiaberto das exportacoes e o sufixo do nome do arquivo."""
+    if mes is not None or ano is not None:
+        if mes is None or ano is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Informe mes e ano juntos.",
+            )
+        inicio, fim = intervalo_mes(mes, ano)
+        return inicio, fim, f"{mes}_{ano}"
+    if data_inicio and data_fim:
+        inicio, fim = _periodo_consulta(data_inicio, data_fim)
+        return inicio, fim, f"{data_inicio.isoformat()}_{data_fim.isoformat()}"
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Informe mes e ano ou data_inicio e data_fim.",
+    )
+
+
+async def _exportar_artefato_mes(db: Session, ano: int, mes: int, nome_arquivo: str) -> StreamingResponse:
+    try:
+        arquivo, acerto = await executar_em_thread(artefatos_excel.obter, db, ano, mes)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao exportar dados: {str(e)}"
+        )
+
+    if arquivo is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nenhum registro encontrado para o período especificado."
+        )
+
+    # Envia pelo descritor aberto em obter: o arquivo pode ser removido do
+    # diretorio (nova versao, limpeza) antes ou durante a resposta.
+    return StreamingResponse(
+        _enviar_arquivo(arquivo),
+        media_type=MEDIA_TYPE_EXCEL,
+        headers={
+            "Content-Disposition": f'attachment; filename="{nome_arquivo}"',
+            "Content-Length": str(os.fstat(arquivo.fileno()).st_size),
+            "X-Cache": "HIT" if acerto else "MISS",
+        },
+    )
+
+
+async def _enviar_arquivo(arquivo: BinaryIO) -> AsyncIterator[bytes]:
+    try:
+        while bloco := await executar_em_thread(arquivo.read, TAMANHO_BLOCO_ARQUIVO):
+            yield bloco
+    finally:
+        arquivo.close()
+
+
+def _ler_e_remover(caminho: str) -> bytes:
+    try:
+        with open(caminho, "rb") as arquivo:
+            return arquivo.read()
+    finally:
+        os.remove(caminho)
+
+
+def _gerar_arquivo_excel(
+    db: Session,
+    data_inicio: date,
+    data_fim: date,
+    incluir_historico: bool = False,
+) -> str:
+    """Grava o periodo em um xlsx temporario e retorna o caminho do arquivo."""
+    caminho = None
     try:
         repositorio = MercadoGasRepository(db)
-        registros = repositorio.filtro_mes(mes=mes, ano=ano)
+        linhas = repositorio.iterar(
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            incluir_historico=incluir_historico,
+        )
+        primeira = next(linhas, None)
 
-        if not registros:
+        if primeira is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Nenhum registro encontrado para o mês e ano especificados."
+                detail="Nenhum registro encontrado para o período especificado."
             )
 
-        dados_lista = [
-            {
-                "ID": item.ID,
-                "DATA": item.DATA,
-                "PLANILHA": item.PLANILHA,
-                "ABA": item.ABA,
-                "PRODUTO": item.PRODUTO,
-                "LOCAL": item.LOCAL,
-                "EMPRESA": item.EMPRESA,
-                "UNIDADE": item.UNIDADE,
-                "VALOR": item.VALOR,
-                "CRIADO_EM": item.CRIADO_EM,
-                "ATUALIZADO_EM": item.ATUALIZADO_EM,
-            }
-            for item in registros
-        ]
-
-        df = pd.DataFrame(dados_lista)
-
-        output = BytesIO()
-
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='MercadoGas')
-            
-        output.seek(0)
+        descritor, caminho = tempfile.mkstemp(prefix="mercado_gas_", suffix=".xlsx")
+        os.close(descritor)
+        escrever_excel_mercado_gas(chain([primeira], linhas), caminho)
+        return caminho
 
     except HTTPException:
         raise
     except Exception as e:
+        if caminho:
+            os.remove(caminho)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao exportar dados: {str(e)}"
         )
-    
-    return StreamingResponse(
-        output,
-        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        headers={
-            'Content-Disposition': f'attachment; filename="mercado_gas_{mes}_{ano}.xlsx"'
-        }
-    )
\ No newline at end of file
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends
+
+from bd_pcp.core.cache_leitura import cache_leitura
+from bd_pcp.core.security import cache_tokens, get_current_user
+from bd_pcp.core.senhas import pool_senhas
+from bd_pcp.core.session import estatisticas_pool
+from bd_pcp.services.gas_artefatos_excel import artefatos_excel
+
+router = APIRouter(tags=["Monitoramento"], prefix="/api/monitoramento")
+
+
+@router.get("/token-cache")
+async def estatisticas_cache_tokens(current_user = Depends(get_current_user)):
+    """
+    Retorna acertos, falhas e ocupacao do cache de tokens verificados
+    """
+    return cache_tokens.estatisticas()
+
+
+@router.get("/gas-cache")
+async def estatisticas_cache_leitura(current_user = Depends(get_current_user)):
+    """
+    Retorna acertos, falhas, invalidacoes e ocupacao do cache de leituras de MercadoGas
+    """
+    return cache_leitura.estatisticas()
+
+
+@router.get("/gas-excel")
+async def estatisticas_artefatos_excel(current_user = Depends(get_current_user)):
+    """
+    Retorna arquivos, ocupacao, acertos e regeneracoes das exportacoes Excel mensais em disco
+    """
+    return artefatos_excel.estatisticas()
+
+
+@router.get("/senhas")
+async def estatisticas_pool_senhas(current_user = Depends(get_current_user)):
+    """
+    Retorna ocupacao, fila e tempos de espera do pool de hash de senhas
+    """
+    return pool_senhas.estatisticas()
+
+
+@router.get("/pool")
+async def estatisticas_pool_conexoes(current_user = Depends(get_current_user)):
+    """
+    Retorna conexoes em uso, overflow, tempo de espera e latencia de conexao do pool
+    """
+    return estatisticas_pool()
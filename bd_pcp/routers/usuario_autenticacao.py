@@ -4,8 +4,10 @@ from fastapi.security import HTTPBasic
 from sqlalchemy.orm import Session
 from typing import List
 
+from bd_pcp.core.concorrencia import executar_em_thread
 from bd_pcp.core.session import get_db
 from bd_pcp.core.security import SecurityManager, get_current_user
+from bd_pcp.core.senhas import pool_senhas
 from bd_pcp.core.config import settings
 from bd_pcp.schemas.auth_schema import LoginRequest, TokenResponse, UserCreate, UserResponse, UserUpdate
 from bd_pcp.services.user_service import UserService
@@ -23,9 +25,9 @@ async def login(
     """
     Endpoint de login que retorna um token JWT
     """
-    # Autenticar usuário no banco de dados
-    user = UserService.authenticate_user(db, login_data.username, login_data.password)
-    if not user:
+    # Autenticar usuário no banco de dados; o bcrypt roda no pool dedicado de senhas
+    user = await executar_em_thread(UserService.get_user_by_username, db, login_data.username)
+    if not user or not await pool_senhas.verificar(login_data.password, user.PASSWORD_HASH):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciais inválidas",
@@ -85,7 +87,8 @@ async def create_user(
     """
     Cria um novo usuário
     """
-    return UserService.create_user(db, user_data)
+    password_hash = await pool_senhas.gerar_hash(user_data.password)
+    return await executar_em_thread(UserService.create_user, db, user_data, password_hash)
 
 @router.get("/users", response_model=List[UserResponse])
 async def list_users(
@@ -97,7 +100,7 @@ async def list_users(
     """
     Lista todos os usuários
     """
-    return UserService.get_all_users(db, skip=skip, limit=limit)
+    return await executar_em_thread(UserService.get_all_users, db, skip=skip, limit=limit)
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user(
@@ -108,7 +111,7 @@ async def get_user(
     """
     Busca usuário por ID
     """
-    user = UserService.get_user_by_id(db, user_id)
+    user = await executar_em_thread(UserService.get_user_by_id, db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -126,7 +129,8 @@ async def update_user(
     """
     Atualiza um usuário
     """
-    return UserService.update_user(db, user_id, user_data)
+    password_hash = await pool_senhas.gerar_hash(user_data.password) if user_data.password else None
+    return await executar_em_thread(UserService.update_user, db, user_id, user_data, password_hash)
 
 @router.delete("/users/{user_id}")
 async def delete_user(
@@ -137,5 +141,5 @@ async def delete_user(
     """
     Remove um usuário
     """
-    UserService.delete_user(db, user_id)
+    await executar_em_thread(UserService.delete_user, db, user_id)
     return {"message": "Usuário removido com sucesso"}
\ No newline at end of file
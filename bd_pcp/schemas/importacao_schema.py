@@ -0,0 +1,46 @@
+import json
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class ImportacaoGasSaida(BaseModel):
+    """Schema para resposta de importacao em segundo plano"""
+    ID: str = Field(..., description="ID da importacao")
+    TIPO: str = Field(..., description="upload-txt ou upsert")
+    ARQUIVO: Optional[str] = Field(None, description="Nome do arquivo enviado")
+    MODO: Optional[str] = Field(None, description="substituir ou diferencial (nulo: GAS_IMPORTACAO_MODO)")
+    HASH: Optional[str] = Field(None, description="SHA-256 do conteudo importado")
+    FASE: str = Field(
+        ...,
+        description="na_fila, leitura, substituicao, insercao, confirmacao, concluida, duplicada ou erro",
+    )
+    LINHAS_LIDAS: int = Field(..., description="Linhas lidas e validadas ate o momento")
+    LINHAS_INSERIDAS: int = Field(..., description="Linhas inseridas (confirmadas apenas em concluida)")
+    LINHAS_SUBSTITUIDAS: int = Field(..., description="Linhas marcadas com ATUALIZADO_EM")
+    LINHAS_INALTERADAS: int = Field(0, description="Linhas iguais as atuais, mantidas no modo diferencial")
+    ERROS: Optional[List[str]] = Field(None, description="Mensagens de erro quando a fase e erro")
+    TEMPOS: Dict[str, float] = Field(default_factory=dict, description="Segundos acumulados por fase")
+    CRIADO_EM: Optional[datetime] = Field(None, description="Data de recebimento")
+    INICIADO_EM: Optional[datetime] = Field(None, description="Inicio do processamento")
+    CONCLUIDO_EM: Optional[datetime] = Field(None, description="Fim do processamento")
+
+    model_config = {"from_attributes": True}
+
+    @field_validator("ERROS", "TEMPOS", mode="before")
+    @classmethod
+    def carregar_json(cls, valor, info):
+        if valor is None:
+            return {} if info.field_name == "TEMPOS" else None
+        return json.loads(valor) if isinstance(valor, str) else valor
+
+
+class ImportacaoDuplicada(BaseModel):
+    """Schema para resposta de conteudo ja importado (sem forcar=true)"""
+    total_processados: int = Field(0, description="Linhas inseridas por esta requisicao (sempre 0)")
+    total_substituidos: int = Field(0, description="Linhas substituidas por esta requisicao (sempre 0)")
+    total_inalterados: int = Field(0, description="Linhas mantidas por esta requisicao (sempre 0)")
+    duplicado: bool = Field(True, description="Conteudo identico ja importado; nada foi gravado")
+    hash: str = Field(..., description="SHA-256 do conteudo")
+    arquivo: Optional[str] = Field(None, description="Arquivo da importacao original")
+    importado_em: datetime = Field(..., description="Data da importacao original")
+    linhas_importadas: int = Field(..., description="Linhas inseridas pela importacao original")
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 
 class MercadoGasBase(BaseModel):
     """Schema base para MercadoGas"""
@@ -34,4 +34,9 @@ class MercadoGasSaida(MercadoGasBase):
     CRIADO_EM: datetime = Field(..., description="Data de criação")
     ATUALIZADO_EM: Optional[datetime] = Field(None, description="Data da última atualização")
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+class MercadoGasPagina(BaseModel):
+    """Schema para resposta paginada de MercadoGas"""
+    itens: List[MercadoGasSaida] = Field(..., description="Registros da pagina")
+    proximo_cursor: Optional[str] = Field(None, description="Cursor da proxima pagina; nulo na ultima")
\ No newline at end of file
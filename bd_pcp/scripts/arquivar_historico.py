@@ -0,0 +1,78 @@
+"""
+Script para arquivar versoes substituidas de MERCADO_GAS em MERCADO_GAS_HISTORICO
+
+Move, em lotes pequenos e cada um na sua transacao, as linhas com
+ATUALIZADO_EM anterior a janela de retencao. Pode ser interrompido a qualquer
+momento: os lotes ja confirmados ficam no historico e uma nova execucao
+continua do ponto em que parou (``--apos-id`` evita reler o inicio da tabela).
+
+Uso:
+    python -m bd_pcp.scripts.arquivar_historico --dias 90 --tamanho-lote 4000 --pausa 0.5
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from bd_pcp.core.config import settings
+from bd_pcp.core.session import SessionLocal
+from bd_pcp.db.repositories.gas_repositorios import (
+    FUSO_FORTALEZA,
+    TAMANHO_LOTE_ARQUIVAMENTO,
+    MercadoGasHistoricoRepository,
+)
+
+
+def arquivar_historico(
+    dias: int,
+    tamanho_lote: int = TAMANHO_LOTE_ARQUIVAMENTO,
+    pausa: float = 0.0,
+    apos_id: int = 0,
+    max_lotes: Optional[int] = None,
+) -> int:
+    """Arquiva as linhas substituidas ha mais de ``dias`` dias e retorna quantas foram movidas."""
+    corte = datetime.now(FUSO_FORTALEZA) - timedelta(days=dias)
+    print(f"Arquivando linhas substituidas antes de {corte:%Y-%m-%d %H:%M:%S}...")
+
+    db = SessionLocal()
+    total = 0
+    lotes = 0
+    try:
+        repositorio = MercadoGasHistoricoRepository(db)
+        while max_lotes is None or lotes < max_lotes:
+            movidas, ultimo_id = repositorio.arquivar_lote(corte, apos_id, tamanho_lote)
+            if ultimo_id is None:
+                break
+            apos_id = ultimo_id
+            total += movidas
+            lotes += 1
+            print(f"Lote {lotes}: {movidas} linhas (ate ID {ultimo_id}, total {total})")
+            if pausa:
+                # Libera o banco para as importacoes e consultas entre um lote e outro.
+                time.sleep(pausa)
+    finally:
+        db.close()
+
+    print(f"Arquivamento concluido: {total} linhas em {lotes} lotes. Ultimo ID: {apos_id}")
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--dias",
+        type=int,
+        default=settings.GAS_HISTORICO_RETENCAO_DIAS,
+        help="Retencao em dias: arquiva linhas substituidas ha mais tempo (padrao: GAS_HISTORICO_RETENCAO_DIAS).",
+    )
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_ARQUIVAMENTO, help="Linhas por transacao.")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Segundos de espera entre os lotes.")
+    parser.add_argument("--apos-id", type=int, default=0, help="Retoma a partir do ultimo ID informado por uma execucao anterior.")
+    parser.add_argument("--max-lotes", type=int, default=None, help="Para apos N lotes (execucoes em janelas curtas).")
+    args = parser.parse_args(argv)
+
+    arquivar_historico(args.dias, args.tamanho_lote, args.pausa, args.apos_id, args.max_lotes)
+
+
+if __name__ == "__main__":
+    main()
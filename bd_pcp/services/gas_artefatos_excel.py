@@ -0,0 +1,284 @@
+"""
+Exportacoes Excel mensais de MercadoGas pre-geradas em disco.
+
+Cada mes exportado fica em ``GAS_EXCEL_DIR`` como
+``mercado_gas_<ano>_<mes>_<versao>.xlsx``, em que a versao e um hash da
+assinatura dos dados do mes (``MercadoGasRepository.versao_periodo``). A
+assinatura vem do banco, entao os arquivos valem para todos os processos da
+API e continuam validos apos uma reinicializacao; um download le apenas a
+assinatura e, se o arquivo da versao existir, ele e enviado direto do disco.
+
+Depois do commit de uma gravacao, os meses alterados que ja tinham arquivo sao
+regerados por uma thread em segundo plano, de modo que o proximo download nao
+espera o xlsx. O diretorio e limitado a ``GAS_EXCEL_MAX_MB``: os arquivos usados
+ha mais tempo (data de modificacao, atualizada a cada download) sao removidos.
+
+``obter`` devolve o arquivo ja aberto, sob a trava do mes: uma regeneracao ou
+limpeza que remova o xlsx durante o envio apaga apenas a entrada do diretorio,
+e a resposta continua lendo o conteudo pelo descritor aberto. No Windows um
+arquivo aberto nao pode ser removido; ele fica para a proxima limpeza.
+
+Os temporarios ``.gerando_*`` deixados por um processo interrompido durante a
+geracao sao removidos na inicializacao e a cada limpeza, quando tem mais de
+IDADE_MAXIMA_TEMPORARIO segundos (mais que qualquer geracao em andamento em
+outro processo).
+"""
+import glob
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import BinaryIO, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from bd_pcp.core.cache_leitura import Mes
+from bd_pcp.core.config import settings
+from bd_pcp.core.session import SessionLocal
+from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository, intervalo_mes
+from bd_pcp.services.gas_exportacao import escrever_excel_mercado_gas
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_ARTEFATO = "mercado_gas_"
+EXTENSAO_ARTEFATO = ".xlsx"
+PREFIXO_TEMPORARIO = ".gerando_"
+IDADE_MAXIMA_TEMPORARIO = 6 * 60 * 60
+
+
+class ArtefatosExcel:
+    """
+    Diretorio de xlsx mensais identificados por (ano, mes, versao dos dados).
+
+    Downloads simultaneos do mesmo mes geram o arquivo uma unica vez; o xlsx e
+    escrito em um arquivo temporario do mesmo diretorio e renomeado ao final,
+    entao nenhum processo ve um arquivo incompleto.
+    """
+
+    def __init__(self, diretorio: str, capacidade_bytes: int, fabrica_sessao=SessionLocal):
+        self.diretorio = diretorio
+        self.capacidade_bytes = capacidade_bytes
+        self.fabrica_sessao = fabrica_sessao
+        self.acertos = 0
+        self.falhas = 0
+        self.regeneracoes = 0
+        self.remocoes = 0
+        self._travas_mes: Dict[Mes, threading.Lock] = {}
+        # Remocoes do diretorio e a publicacao de um arquivo novo (rename + open).
+        self._trava_limpeza = threading.Lock()
+        self._pendentes: Set[Mes] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._trava = threading.Lock()
+
+    @property
+    def ativo(self) -> bool:
+        return self.capacidade_bytes > 0
+
+    def obter(self, db: Session, ano: int, mes: int) -> Tuple[Optional[BinaryIO], bool]:
+        """
+        Retorna o xlsx atual do mes aberto para leitura e se ele ja existia em disco.
+
+        Gera o arquivo quando a versao atual ainda nao foi exportada; retorna
+        ``(None, False)`` se o mes nao tiver registros. Quem chama fecha o arquivo.
+        """
+        with self._trava_mes((ano, mes)):
+            versao = self._versao(db, ano, mes)
+            caminho = self._caminho(ano, mes, versao)
+            try:
+                arquivo = open(caminho, "rb")
+            except FileNotFoundError:
+                pass
+            else:
+                try:
+                    # Marca o uso para a limpeza por LRU.
+                    os.utime(caminho)
+                except FileNotFoundError:
+                    pass
+                with self._trava:
+                    self.acertos += 1
+                return arquivo, True
+
+            with self._trava:
+                self.falhas += 1
+            return self._gerar(db, ano, mes, caminho), False
+
+    def agendar_regeneracao(self, meses: Iterable[Mes]) -> None:
+        """
+        Coloca na fila de regeneracao os meses alterados que ja possuem arquivo.
+
+        Registrada em ``cache_leitura.ao_invalidar``; roda no commit, entao so
+        lista o diretorio e delega a geracao a thread dos artefatos.
+        """
+        if not self.ativo:
+            return
+        with self._trava:
+            novos = [
+                mes for mes in meses
+                if mes not in self._pendentes and self._arquivos_do_mes(*mes)
+            ]
+            if not novos:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artefatos_excel")
+            for mes in novos:
+                self._pendentes.add(mes)
+                self._executor.submit(self._regenerar, mes)
+
+    def encerrar(self) -> None:
+        """Encerra a thread de regeneracao; meses ainda na fila sao gerados no proximo download."""
+        with self._trava:
+            executor, self._executor = self._executor, None
+            self._pendentes.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def remover_temporarios_antigos(self, idade_maxima: float = IDADE_MAXIMA_TEMPORARIO) -> int:
+        """Remove os temporarios de geracoes interrompidas, modificados ha mais de ``idade_maxima`` segundos."""
+        limite = time.time() - idade_maxima
+        removidos = 0
+        with self._trava_limpeza:
+            padrao = os.path.join(self.diretorio, f"{PREFIXO_TEMPORARIO}*{EXTENSAO_ARTEFATO}")
+            for caminho in glob.glob(padrao):
+                try:
+                    antigo = os.path.getmtime(caminho) < limite
+                except FileNotFoundError:
+                    continue
+                if antigo and self._remover(caminho):
+                    removidos += 1
+        return removidos
+
+    def estatisticas(self) -> Dict[str, float]:
+        arquivos = self._listar_arquivos()
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                "arquivos": len(arquivos),
+                "bytes": sum(tamanho for _, _, tamanho in arquivos),
+                "capacidade_bytes": self.capacidade_bytes,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "regeneracoes": self.regeneracoes,
+                "pendentes": len(self._pendentes),
+                "remocoes": self.remocoes,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
+
+    def _regenerar(self, mes: Mes) -> None:
+        with self._trava:
+            # Um commit durante a geracao agenda o mes de novo.
+            self._pendentes.discard(mes)
+
+        db = self.fabrica_sessao()
+        try:
+            with self._trava_mes(mes):
+                ano, mes_ = mes
+                caminho = self._caminho(ano, mes_, self._versao(db, ano, mes_))
+                if not os.path.exists(caminho):
+                    arquivo = self._gerar(db, ano, mes_, caminho)
+                    if arquivo is not None:
+                        arquivo.close()
+                    with self._trava:
+                        self.regeneracoes += 1
+        except Exception:
+            logger.warning("Falha ao regerar a exportacao Excel de %02d/%d", mes[1], mes[0], exc_info=True)
+        finally:
+            db.close()
+
+    def _gerar(self, db: Session, ano: int, mes: int, caminho: str) -> Optional[BinaryIO]:
+        """
+        Grava o xlsx em ``caminho`` e remove as versoes anteriores do mes.
+
+        O arquivo e renomeado para ``caminho`` e aberto sob a trava da limpeza,
+        entao uma limpeza disparada por outro mes nao o tira de quem o gerou.
+        """
+        data_inicio, data_fim = intervalo_mes(mes, ano)
+        linhas = MercadoGasRepository(db).iterar(data_inicio=data_inicio, data_fim=data_fim)
+        primeira = next(linhas, None)
+        if primeira is None:
+            self._remover_versoes(ano, mes, manter=None)
+            return None
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, prefix=PREFIXO_TEMPORARIO, suffix=EXTENSAO_ARTEFATO)
+        os.close(descritor)
+        try:
+            escrever_excel_mercado_gas(chain([primeira], linhas), temporario)
+            with self._trava_limpeza:
+                os.replace(temporario, caminho)
+                arquivo = open(caminho, "rb")
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+        self._remover_versoes(ano, mes, manter=caminho)
+        self._limpar(manter=caminho)
+        return arquivo
+
+    def _limpar(self, manter: str) -> None:
+        """Remove os arquivos usados ha mais tempo ate o diretorio caber em ``capacidade_bytes``."""
+        with self._trava_limpeza:
+            arquivos = sorted(self._listar_arquivos())
+            total = sum(tamanho for _, _, tamanho in arquivos)
+            for _, caminho, tamanho in arquivos:
+                if total <= self.capacidade_bytes:
+                    break
+                if caminho == manter:
+                    continue
+                if self._remover(caminho):
+                    total -= tamanho
+        self.remover_temporarios_antigos()
+
+    def _remover_versoes(self, ano: int, mes: int, manter: Optional[str]) -> None:
+        with self._trava_limpeza:
+            for caminho in self._arquivos_do_mes(ano, mes):
+                if caminho != manter:
+                    self._remover(caminho)
+
+    def _remover(self, caminho: str) -> bool:
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            return False
+        except PermissionError:
+            # Windows: o arquivo esta sendo enviado; sai na proxima limpeza.
+            logger.debug("Exportacao Excel em uso mantida: %s", caminho)
+            return False
+        with self._trava:
+            self.remocoes += 1
+        return True
+
+    def _listar_arquivos(self):
+        """(modificado_em, caminho, tamanho) de cada xlsx pronto do diretorio."""
+        arquivos = []
+        for caminho in glob.glob(os.path.join(self.diretorio, f"{PREFIXO_ARTEFATO}*{EXTENSAO_ARTEFATO}")):
+            try:
+                estado = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            arquivos.append((estado.st_mtime, caminho, estado.st_size))
+        return arquivos
+
+    def _arquivos_do_mes(self, ano: int, mes: int):
+        return glob.glob(os.path.join(self.diretorio, f"{PREFIXO_ARTEFATO}{ano}_{mes:02d}_*{EXTENSAO_ARTEFATO}"))
+
+    def _caminho(self, ano: int, mes: int, versao: str) -> str:
+        return os.path.join(self.diretorio, f"{PREFIXO_ARTEFATO}{ano}_{mes:02d}_{versao}{EXTENSAO_ARTEFATO}")
+
+    def _versao(self, db: Session, ano: int, mes: int) -> str:
+        assinatura = MercadoGasRepository(db).versao_periodo(*intervalo_mes(mes, ano))
+        return hashlib.sha1(repr(assinatura).encode()).hexdigest()[:16]
+
+    def _trava_mes(self, mes: Mes) -> threading.Lock:
+        with self._trava:
+            return self._travas_mes.setdefault(mes, threading.Lock())
+
+
+artefatos_excel = ArtefatosExcel(
+    settings.GAS_EXCEL_DIR,
+    settings.GAS_EXCEL_MAX_MB * 1024 * 1024,
+)
@@ -0,0 +1,88 @@
+"""
+Importacao diferencial de MercadoGas.
+
+No modo ``substituir`` todas as linhas atuais (sem ATUALIZADO_EM) de cada
+chave DATA/PLANILHA/ABA do conteudo sao marcadas como substituidas e o
+conteudo e inserido por inteiro, mesmo quando quase nada mudou. No modo
+``diferencial`` as linhas atuais das chaves sao carregadas e comparadas, por
+hash, pelo conteudo (PRODUTO, LOCAL, EMPRESA, UNIDADE, VALOR): linhas iguais
+permanecem como estao, apenas as novas sao inseridas e apenas as atuais que
+nao aparecem no conteudo sao substituidas. Linhas repetidas no conteudo sao
+consideradas uma unica vez. Ao final, as linhas atuais de cada chave sao as
+mesmas que o modo substituir deixaria, sem as repeticoes.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bd_pcp.db.repositories.gas_repositorios import ChaveMercadoGas, MercadoGasRepository
+from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
+
+MODO_SUBSTITUIR = "substituir"
+MODO_DIFERENCIAL = "diferencial"
+
+ConteudoMercadoGas = Tuple[str, Optional[str], Optional[str], str, float]
+# Por conteudo: IDs das linhas atuais ainda nao encontradas no conteudo recebido,
+# ou None quando o conteudo ja foi recebido (mantido ou inserido).
+EstadoChave = Dict[ConteudoMercadoGas, Optional[List[int]]]
+
+
+def _conteudo(linha) -> ConteudoMercadoGas:
+    return (linha.PRODUTO, linha.LOCAL, linha.EMPRESA, linha.UNIDADE, linha.VALOR)
+
+
+class DiferencaMercadoGas:
+    """
+    Compara lotes de um conteudo com as linhas atuais das chaves que eles tocam.
+
+    ``filtrar`` pode ser chamado lote a lote (upload em fluxo): as linhas atuais
+    de uma chave sao lidas uma unica vez, na primeira vez que ela aparece, e as
+    de varias chaves novas vem no mesmo SELECT. Como as linhas de uma chave
+    podem chegar em lotes diferentes, as substituicoes so sao conhecidas depois
+    do ultimo lote, em ``ids_substituidos``.
+    """
+
+    def __init__(self, repositorio: MercadoGasRepository):
+        self.repositorio = repositorio
+        self.inalterados = 0
+        self.repetidos = 0
+        self._chaves: Dict[ChaveMercadoGas, EstadoChave] = {}
+        self._excedentes: List[int] = []
+
+    def filtrar(self, lote: Iterable[MercadoGasCriacao]) -> List[MercadoGasCriacao]:
+        """Retorna as linhas do lote que precisam ser inseridas."""
+        lote = list(lote)
+        self._carregar_chaves({(item.DATA, item.PLANILHA, item.ABA) for item in lote})
+
+        inserir: List[MercadoGasCriacao] = []
+        for item in lote:
+            estado = self._chaves[(item.DATA, item.PLANILHA, item.ABA)]
+            conteudo = _conteudo(item)
+            if conteudo not in estado:
+                inserir.append(item)
+            elif estado[conteudo] is None:
+                self.repetidos += 1
+                continue
+            else:
+                # Linhas atuais repetidas: uma permanece, as demais sao substituidas.
+                self._excedentes.extend(estado[conteudo][1:])
+                self.inalterados += 1
+            estado[conteudo] = None
+        return inserir
+
+    def ids_substituidos(self) -> List[int]:
+        """IDs das linhas atuais que nao aparecem no conteudo recebido."""
+        ids = list(self._excedentes)
+        for estado in self._chaves.values():
+            for pendentes in estado.values():
+                if pendentes:
+                    ids.extend(pendentes)
+        return ids
+
+    def _carregar_chaves(self, chaves: Iterable[ChaveMercadoGas]) -> None:
+        novas = [chave for chave in chaves if chave not in self._chaves]
+        if not novas:
+            return
+        for chave in novas:
+            self._chaves[chave] = {}
+        for linha in self.repositorio.listar_atuais_por_chaves(novas):
+            estado = self._chaves[(linha.DATA, linha.PLANILHA, linha.ABA)]
+            estado.setdefault(_conteudo(linha), []).append(linha.ID)
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import csv
+import io
+import zlib
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import xlsxwriter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependencia opcional (parquet e arrow)
+    pa = None
+    pq = None
+
+COLUNAS_EXPORTACAO: Sequence[str] = (
+    "ID",
+    "DATA",
+    "PLANILHA",
+    "ABA",
+    "PRODUTO",
+    "LOCAL",
+    "EMPRESA",
+    "UNIDADE",
+    "VALOR",
+    "CRIADO_EM",
+    "ATUALIZADO_EM",
+)
+NOME_ABA_EXCEL = "MercadoGas"
+MEDIA_TYPE_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+FORMATO_XLSX = "xlsx"
+FORMATO_CSV = "csv"
+FORMATO_PARQUET = "parquet"
+FORMATO_ARROW = "arrow"
+COMPRESSAO_NENHUMA = "nenhuma"
+# Formato: (media type, extensao do arquivo, compressoes aceitas; a primeira e a padrao)
+FORMATOS_EXPORTACAO: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    FORMATO_XLSX: (MEDIA_TYPE_EXCEL, "xlsx", (COMPRESSAO_NENHUMA,)),
+    FORMATO_CSV: ("text/csv; charset=utf-8", "csv", (COMPRESSAO_NENHUMA, "gzip")),
+    FORMATO_PARQUET: ("application/vnd.apache.parquet", "parquet", ("snappy", "zstd", "gzip", COMPRESSAO_NENHUMA)),
+    FORMATO_ARROW: ("application/vnd.apache.arrow.stream", "arrow", (COMPRESSAO_NENHUMA, "zstd", "lz4")),
+}
+FORMATOS_PYARROW = (FORMATO_PARQUET, FORMATO_ARROW)
+# Linhas por lote: um row group no Parquet, um record batch no Arrow, um bloco enviado no CSV.
+LINHAS_POR_LOTE_EXPORTACAO = 65_536
+
+
+def escrever_excel_mercado_gas(linhas: Iterable[Any], caminho: str) -> int:
+    """
+    Grava registros de MercadoGas em um arquivo xlsx e retorna quantos foram escritos.
+
+    O workbook usa o modo ``constant_memory`` do xlsxwriter: cada linha e
+    descarregada no disco assim que a proxima comeca, entao ``linhas`` pode ser
+    um cursor em fluxo de qualquer tamanho. Cada linha deve expor os atributos
+    listados em COLUNAS_EXPORTACAO.
+    """
+    workbook = xlsxwriter.Workbook(
+        caminho,
+        {"constant_memory": True, "remove_timezone": True},
+    )
+    try:
+        planilha = workbook.add_worksheet(NOME_ABA_EXCEL)
+        formato_cabecalho = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+        formato_data = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        formato_data_hora = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+
+        planilha.write_row(0, 0, COLUNAS_EXPORTACAO, formato_cabecalho)
+
+        total = 0
+        for total, linha in enumerate(linhas, start=1):
+            for coluna, nome in enumerate(COLUNAS_EXPORTACAO):
+                valor = getattr(linha, nome)
+                if valor is None:
+                    continue
+                if isinstance(valor, datetime):
+                    planilha.write_datetime(total, coluna, valor, formato_data_hora)
+                elif isinstance(valor, date):
+                    planilha.write_datetime(total, coluna, valor, formato_data)
+                else:
+                    planilha.write(total, coluna, valor)
+    finally:
+        workbook.close()
+
+    return total
+
+
+class ExportacaoIndisponivel(Exception):
+    """O formato pedido depende de um pacote opcional nao instalado."""
+
+
+def extensao_exportacao(formato: str, compressao: str) -> str:
+    _, extensao, _ = FORMATOS_EXPORTACAO[formato]
+    if formato == FORMATO_CSV and compressao == "gzip":
+        return f"{extensao}.gz"
+    return extensao
+
+
+def validar_exportacao(formato: str, compressao: Optional[str]) -> str:
+    """
+    Confere formato e compressao e retorna a compressao efetiva.
+
+    Levanta ValueError para combinacoes invalidas e ExportacaoIndisponivel
+    quando parquet/arrow sao pedidos sem o pyarrow instalado.
+    """
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportacao desconhecido: '{formato}'.")
+    _, _, compressoes = FORMATOS_EXPORTACAO[formato]
+    compressao = compressao or compressoes[0]
+    if compressao not in compressoes:
+        raise ValueError(
+            f"Compressao '{compressao}' nao se aplica ao formato {formato}. "
+            f"Use uma de: {', '.join(compressoes)}."
+        )
+    if formato in FORMATOS_PYARROW and pa is None:
+        raise ExportacaoIndisponivel(
+            f"O formato {formato} requer o pacote opcional pyarrow, que nao esta instalado."
+        )
+    return compressao
+
+
+def gerar_exportacao(
+    linhas: Iterable[Any],
+    formato: str,
+    compressao: Optional[str] = None,
+    linhas_por_lote: int = LINHAS_POR_LOTE_EXPORTACAO,
+) -> Iterator[bytes]:
+    """
+    Serializa registros de MercadoGas em CSV, Parquet ou Arrow IPC, em fluxo.
+
+    As linhas (com os atributos de COLUNAS_EXPORTACAO) sao consumidas em lotes
+    de ``linhas_por_lote`` e cada lote e convertido e devolvido antes da
+    leitura do proximo, entao a memoria usada depende do lote e nao do
+    periodo. Os escritores do pyarrow gravam apenas de forma sequencial (o
+    rodape do Parquet vai no ultimo bloco), o que permite enviar cada bloco a
+    medida que e produzido.
+    """
+    compressao = validar_exportacao(formato, compressao)
+    if formato == FORMATO_CSV:
+        escritor = _EscritorCsv(compressao)
+    elif formato == FORMATO_PARQUET:
+        escritor = _EscritorParquet(compressao)
+    elif formato == FORMATO_ARROW:
+        escritor = _EscritorArrow(compressao)
+    else:
+        raise ValueError(f"O formato {formato} nao e gerado em fluxo.")
+
+    linhas = iter(linhas)
+    while lote := list(islice(linhas, linhas_por_lote)):
+        bloco = escritor.escrever(lote)
+        if bloco:
+            yield bloco
+    bloco = escritor.finalizar()
+    if bloco:
+        yield bloco
+
+
+class _EscritorCsv:
+    """CSV com cabecalho, separador virgula e datas ISO; opcionalmente em gzip."""
+
+    def __init__(self, compressao: str):
+        self._texto = io.StringIO()
+        self._csv = csv.writer(self._texto, lineterminator="\n")
+        self._csv.writerow(COLUNAS_EXPORTACAO)
+        # wbits=31: fluxo gzip (cabecalho e CRC) produzido incrementalmente.
+        self._gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compressao == "gzip" else None
+
+    def escrever(self, lote: List[Any]) -> bytes:
+        self._csv.writerows(
+            [
+                "" if valor is None else valor.isoformat() if isinstance(valor, date) else valor
+                for valor in (getattr(linha, nome) for nome in COLUNAS_EXPORTACAO)
+            ]
+            for linha in lote
+        )
+        return self._esvaziar()
+
+    def finalizar(self) -> bytes:
+        bloco = self._esvaziar()
+        if self._gzip is not None:
+            bloco += self._gzip.flush()
+        return bloco
+
+    def _esvaziar(self) -> bytes:
+        bloco = self._texto.getvalue().encode("utf-8")
+        self._texto.seek(0)
+        self._texto.truncate()
+        if self._gzip is not None:
+            return self._gzip.compress(bloco)
+        return bloco
+
+
+class _SaidaSequencial(io.RawIOBase):
+    """Destino somente de escrita para o pyarrow; ``esvaziar`` devolve o que foi gravado desde a ultima chamada."""
+
+    def __init__(self):
+        super().__init__()
+        self._partes: List[bytes] = []
+        self._posicao = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        dados = bytes(dados)
+        self._partes.append(dados)
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def esvaziar(self) -> bytes:
+        bloco = b"".join(self._partes)
+        self._partes.clear()
+        return bloco
+
+
+def _esquema_arrow():
+    return pa.schema([
+        ("ID", pa.int64()),
+        ("DATA", pa.date32()),
+        ("PLANILHA", pa.string()),
+        ("ABA", pa.string()),
+        ("PRODUTO", pa.string()),
+        ("LOCAL", pa.string()),
+        ("EMPRESA", pa.string()),
+        ("UNIDADE", pa.string()),
+        ("VALOR", pa.float64()),
+        ("CRIADO_EM", pa.timestamp("us")),
+        ("ATUALIZADO_EM", pa.timestamp("us")),
+    ])
+
+
+def _lote_arrow(lote: List[Any], esquema) -> "pa.RecordBatch":
+    colunas = {nome: [getattr(linha, nome) for linha in lote] for nome in COLUNAS_EXPORTACAO}
+    return pa.RecordBatch.from_pydict(colunas, schema=esquema)
+
+
+class _EscritorParquet:
+    """Parquet com um row group por lote."""
+
+    def __init__(self, compressao: str):
+        self._esquema = _esquema_arrow()
+        self._saida = _SaidaSequencial()
+        self._escritor = pq.ParquetWriter(
+            self._saida,
+            self._esquema,
+            compression="none" if compressao == COMPRESSAO_NENHUMA else compressao,
+        )
+
+    def escrever(self, lote: List[Any]) -> bytes:
+        self._escritor.write_batch(_lote_arrow(lote, self._esquema), row_group_size=len(lote))
+        return self._saida.esvaziar()
+
+    def finalizar(self) -> bytes:
+        self._escritor.close()
+        return self._saida.esvaziar()
+
+
+class _EscritorArrow:
+    """Arrow IPC no formato de fluxo (streaming format), um record batch por lote."""
+
+    def __init__(self, compressao: str):
+        self._esquema = _esquema_arrow()
+        self._saida = _SaidaSequencial()
+        opcoes = pa.ipc.IpcWriteOptions(
+            compression=None if compressao == COMPRESSAO_NENHUMA else compressao,
+        )
+        self._escritor = pa.ipc.new_stream(self._saida, self._esquema, options=opcoes)
+
+    def escrever(self, lote: List[Any]) -> bytes:
+        self._escritor.write_batch(_lote_arrow(lote, self._esquema))
+        return self._saida.esvaziar()
+
+    def finalizar(self) -> bytes:
+        self._escritor.close()
+        return self._saida.esvaziar()
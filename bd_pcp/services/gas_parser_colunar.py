@@ -0,0 +1,233 @@
+"""
+Motor colunar para uploads delimitados de MercadoGas.
+
+O texto e lido em blocos pelo leitor CSV do pandas e cada coluna e convertida
+de uma vez: o cabecalho e normalizado uma unica vez, DATA e convertida apenas
+para os valores distintos do bloco e VALOR passa por operacoes vetorizadas de
+string antes da conversao numerica. Os registros de um bloco sao validados em
+uma unica chamada ao pydantic.
+
+Qualquer linha que o caminho vetorizado nao consiga converter e reprocessada
+pelas funcoes do parser linha a linha, de modo que registros e mensagens
+``Linha N: ...`` sao identicos aos do motor ``python``. Blocos com linhas so de
+espacos (que o pandas descarta e o modulo csv nao), com caracteres nulos ou que
+o pandas nao consiga ler sao convertidos inteiramente pelo caminho linha a
+linha.
+"""
+from __future__ import annotations
+
+import csv
+import re
+from datetime import date
+from io import StringIO
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+import numpy as np
+import pandas as pd
+from pydantic import TypeAdapter, ValidationError
+
+from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
+from bd_pcp.services.gas_txt_parser import (
+    ResultadoLinha,
+    converter_data,
+    converter_linha,
+    detectar_delimitador,
+    ler_blocos,
+    separar_resultados,
+    validar_cabecalho,
+)
+
+TAMANHO_BLOCO = 4 * 1024 * 1024
+CAMPOS = ("DATA", "PLANILHA", "ABA", "PRODUTO", "LOCAL", "EMPRESA", "UNIDADE", "VALOR")
+_LINHA_SO_ESPACOS = re.compile(r"^[ \t]+\r?$", re.MULTILINE)
+_VALIDADOR = TypeAdapter(List[MercadoGasCriacao])
+
+
+def parse_csv_colunar(texto: str) -> Tuple[List[MercadoGasCriacao], List[str]]:
+    """Equivalente colunar de ``_parse_csv``: retorna registros e erros por linha."""
+    delimitador = detectar_delimitador(texto)
+    fluxo = StringIO(texto)
+    leitor = csv.DictReader(fluxo, delimiter=delimitador)
+    validar_cabecalho(leitor.fieldnames)
+    return separar_resultados(converter_csv_colunar(fluxo, leitor.fieldnames, delimitador), indice_inicio=2)
+
+
+def converter_csv_colunar(
+    fluxo: TextIO,
+    fieldnames: Sequence[Optional[str]],
+    delimitador: str,
+    tamanho_bloco: int = TAMANHO_BLOCO,
+) -> Iterator[ResultadoLinha]:
+    """
+    Converte as linhas de dados restantes em ``fluxo`` (cabecalho ja consumido).
+
+    Produz um resultado por linha, na ordem do arquivo, no mesmo formato do
+    parser linha a linha.
+    """
+    posicoes = _posicoes_colunas(fieldnames)
+    return chain.from_iterable(
+        _converter_bloco(bloco, fieldnames, posicoes, delimitador)
+        for bloco in ler_blocos(fluxo, tamanho_bloco)
+    )
+
+
+def _posicoes_colunas(fieldnames: Sequence[Optional[str]]) -> Dict[str, int]:
+    # Mesma normalizacao de _normalizar_linha: em nomes repetidos prevalece a ultima coluna.
+    posicoes: Dict[str, int] = {}
+    for posicao, nome in enumerate(fieldnames):
+        if not nome:
+            continue
+        normalizado = nome.strip().strip('"').strip("'").upper()
+        if normalizado:
+            posicoes[normalizado] = posicao
+    return posicoes
+
+
+def _tem_linha_so_espacos(bloco: str) -> bool:
+    # Busca de substring antes da regex: a maioria dos blocos nao tem linha iniciada por espaco.
+    if "\n " not in bloco and "\n\t" not in bloco and not bloco.startswith((" ", "\t")):
+        return False
+    return _LINHA_SO_ESPACOS.search(bloco) is not None
+
+
+def _converter_bloco_linha_a_linha(
+    bloco: str,
+    fieldnames: Sequence[Optional[str]],
+    delimitador: str,
+) -> List[ResultadoLinha]:
+    leitor = csv.DictReader(StringIO(bloco, newline=""), fieldnames=list(fieldnames), delimiter=delimitador)
+    return [converter_linha(linha) for linha in leitor]
+
+
+def _converter_bloco(
+    bloco: str,
+    fieldnames: Sequence[Optional[str]],
+    posicoes: Dict[str, int],
+    delimitador: str,
+) -> List[ResultadoLinha]:
+    if _tem_linha_so_espacos(bloco) or "\x00" in bloco:
+        return _converter_bloco_linha_a_linha(bloco, fieldnames, delimitador)
+
+    colunas = range(len(fieldnames))
+    try:
+        quadro = pd.read_csv(
+            StringIO(bloco),
+            sep=delimitador,
+            header=None,
+            names=colunas,
+            usecols=colunas,
+            dtype=object,
+            na_filter=False,
+            skip_blank_lines=True,
+            engine="c",
+        )
+    except (pd.errors.ParserError, pd.errors.EmptyDataError):
+        return _converter_bloco_linha_a_linha(bloco, fieldnames, delimitador)
+
+    total = len(quadro)
+    if not total:
+        return []
+
+    def coluna(nome: str) -> np.ndarray:
+        posicao = posicoes.get(nome)
+        if posicao is None:
+            return np.full(total, "", dtype=object)
+        return quadro[posicao].to_numpy(dtype=object)
+
+    datas, invalidas = _converter_datas(coluna("DATA"))
+    valores, valores_invalidos = _converter_valores(coluna("VALOR"))
+    invalidas |= valores_invalidos
+
+    linhas = zip(
+        datas.tolist(),
+        _converter_textos(coluna("PLANILHA")).tolist(),
+        _converter_textos(coluna("ABA")).tolist(),
+        _converter_textos(coluna("PRODUTO")).tolist(),
+        _converter_textos(coluna("LOCAL"), opcional=True).tolist(),
+        _converter_textos(coluna("EMPRESA"), opcional=True).tolist(),
+        _converter_textos(coluna("UNIDADE")).tolist(),
+        valores.tolist(),
+    )
+    indices_validos = np.flatnonzero(~invalidas).tolist()
+    dicionarios = [dict(zip(CAMPOS, linha)) for linha, invalida in zip(linhas, invalidas.tolist()) if not invalida]
+
+    resultados: List[Optional[ResultadoLinha]] = [None] * total
+    for indice, registro in zip(indices_validos, _validar(dicionarios)):
+        resultados[indice] = registro
+
+    # Linhas rejeitadas (ou recusadas pelo pydantic) refazem o caminho linha a linha
+    # para reproduzir exatamente a mensagem de erro do motor python.
+    for indice, resultado in enumerate(resultados):
+        if resultado is None:
+            linha = {nome: quadro[posicao].iat[indice] for nome, posicao in posicoes.items()}
+            resultados[indice] = converter_linha(linha)
+
+    return resultados
+
+
+def _validar(dicionarios: List[Dict[str, object]]) -> List[Optional[MercadoGasCriacao]]:
+    try:
+        return _VALIDADOR.validate_python(dicionarios)
+    except ValidationError as exc:
+        recusados = {erro["loc"][0] for erro in exc.errors()}
+        return [
+            None if indice in recusados else MercadoGasCriacao.model_validate(dicionario)
+            for indice, dicionario in enumerate(dicionarios)
+        ]
+
+
+def _data_ou_none(valor: str) -> Optional[date]:
+    try:
+        return converter_data(valor)
+    except ValueError:
+        return None
+
+
+def _converter_textos(textos: np.ndarray, opcional: bool = False) -> np.ndarray:
+    # Colunas de texto repetem poucos valores: aplica strip uma vez por valor distinto.
+    codigos, distintos = pd.factorize(textos)
+    convertidos = [texto.strip() for texto in distintos]
+    if opcional:
+        convertidos = [texto or None for texto in convertidos]
+    return np.array(convertidos + [None], dtype=object)[codigos]
+
+
+def _converter_datas(textos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Poucas datas distintas por arquivo: converte cada texto uma unica vez.
+    codigos, distintos = pd.factorize(textos)
+    convertidas = [_data_ou_none(texto) for texto in distintos]
+    invalidas = np.fromiter((data is None for data in convertidas), dtype=bool, count=len(convertidas))
+    return np.array(convertidas + [None], dtype=object)[codigos], invalidas[codigos]
+
+
+def _converter_valores(textos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Aplica as regras de _converter_valor a coluna inteira."""
+    textos = np.char.replace(np.char.strip(textos.astype(str)), " ", "")
+    virgula = np.char.rfind(textos, ",")
+    ponto = np.char.rfind(textos, ".")
+
+    # Virgula decimal ("1.234,5" ou "12,5") ou virgula de milhar ("1,234.5").
+    virgula_decimal = (virgula >= 0) & ((ponto < 0) | (virgula > ponto))
+    virgula_milhar = (virgula >= 0) & (ponto > virgula)
+    if virgula_decimal.any():
+        textos[virgula_decimal] = np.char.replace(
+            np.char.replace(textos[virgula_decimal], ".", ""), ",", "."
+        )
+    if virgula_milhar.any():
+        textos[virgula_milhar] = np.char.replace(textos[virgula_milhar], ",", "")
+    textos[textos == ""] = "0"
+
+    brutos = textos.astype(object)
+    try:
+        # A conversao de objetos do numpy chama float() em cada texto, como _converter_valor.
+        return brutos.astype(np.float64), np.zeros(len(brutos), dtype=bool)
+    except ValueError:
+        valores = np.zeros(len(brutos), dtype=np.float64)
+        invalidos = np.zeros(len(brutos), dtype=bool)
+        for indice, texto in enumerate(brutos):
+            try:
+                valores[indice] = float(texto)
+            except ValueError:
+                invalidos[indice] = True
+        return valores, invalidos
@@ -0,0 +1,127 @@
+"""
+Parse paralelo de uploads delimitados de MercadoGas.
+
+As linhas de dados (apos o cabecalho) sao divididas em blocos terminados em
+quebra de linha fora de aspas e cada bloco e convertido, pelo motor escolhido,
+em um processo do ProcessPoolExecutor. Os resultados voltam na ordem do
+arquivo, um por linha e no mesmo formato do parser linha a linha; quem consome
+o iterador numera as linhas como no caminho sequencial, de modo que as
+mensagens ``Linha N: ...`` usam a numeracao global do arquivo.
+
+No maximo ``BLOCOS_POR_PROCESSO`` blocos por processo ficam em andamento, o
+que limita a memoria do upload em fluxo. O pool e criado no primeiro uso e
+compartilhado pelos uploads simultaneos.
+"""
+from __future__ import annotations
+
+import csv
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
+from typing import Deque, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
+from bd_pcp.services.gas_txt_parser import (
+    MOTOR_COLUNAR,
+    ResultadoLinha,
+    converter_linhas,
+    detectar_delimitador,
+    ler_blocos,
+    separar_resultados,
+    validar_cabecalho,
+)
+
+TAMANHO_BLOCO_PARALELO = 4 * 1024 * 1024
+BLOCOS_POR_PROCESSO = 2
+
+_executor: Optional[ProcessPoolExecutor] = None
+_trava_executor = threading.Lock()
+
+
+def obter_executor(processos: int) -> ProcessPoolExecutor:
+    """Retorna o pool de processos do parser, criado no primeiro uso com ``processos`` processos."""
+    global _executor
+    with _trava_executor:
+        if _executor is None:
+            # spawn: o processo da API tem threads (event loop, pool de banco) e fork nao e seguro.
+            _executor = ProcessPoolExecutor(
+                max_workers=processos,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def encerrar_executor() -> None:
+    """Encerra o pool de processos; o proximo upload paralelo cria um novo."""
+    global _executor
+    with _trava_executor:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_csv_paralelo(
+    texto: str,
+    motor: str,
+    processos: int,
+) -> Tuple[List[MercadoGasCriacao], List[str]]:
+    """Equivalente paralelo de ``_parse_csv``: retorna registros e erros por linha."""
+    delimitador = detectar_delimitador(texto)
+    fluxo = StringIO(texto)
+    leitor = csv.DictReader(fluxo, delimiter=delimitador)
+    validar_cabecalho(leitor.fieldnames)
+    return separar_resultados(
+        converter_csv_paralelo(fluxo, leitor.fieldnames, delimitador, motor, processos),
+        indice_inicio=2,
+    )
+
+
+def converter_csv_paralelo(
+    fluxo: TextIO,
+    fieldnames: Sequence[Optional[str]],
+    delimitador: str,
+    motor: str,
+    processos: int,
+    tamanho_bloco: int = TAMANHO_BLOCO_PARALELO,
+) -> Iterator[ResultadoLinha]:
+    """
+    Converte em paralelo as linhas de dados restantes em ``fluxo`` (cabecalho ja consumido).
+
+    Produz um resultado por linha, na ordem do arquivo.
+    """
+    executor = obter_executor(processos)
+    fieldnames = list(fieldnames)
+    pendentes: Deque[Future] = deque()
+    try:
+        for bloco in ler_blocos(fluxo, tamanho_bloco):
+            pendentes.append(executor.submit(_converter_bloco, bloco, fieldnames, delimitador, motor))
+            if len(pendentes) >= processos * BLOCOS_POR_PROCESSO:
+                yield from pendentes.popleft().result()
+        while pendentes:
+            yield from pendentes.popleft().result()
+    except BrokenProcessPool:
+        # Um processo morreu (ex.: falta de memoria); o pool nao aceita novas tarefas.
+        encerrar_executor()
+        raise
+    finally:
+        for pendente in pendentes:
+            pendente.cancel()
+
+
+def _converter_bloco(
+    bloco: str,
+    fieldnames: List[Optional[str]],
+    delimitador: str,
+    motor: str,
+) -> List[ResultadoLinha]:
+    """Executado nos processos do pool: converte um bloco de linhas de dados."""
+    if motor == MOTOR_COLUNAR:
+        from bd_pcp.services.gas_parser_colunar import converter_csv_colunar
+
+        return list(converter_csv_colunar(StringIO(bloco), fieldnames, delimitador))
+
+    leitor = csv.DictReader(StringIO(bloco, newline=""), fieldnames=fieldnames, delimiter=delimitador)
+    return list(converter_linhas(leitor))
@@ -1,15 +1,33 @@
 from __future__ import annotations
 
+import codecs
 import csv
 import json
+import os
+from collections import Counter
 from datetime import date, datetime
-from io import StringIO
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from functools import lru_cache, partial
+from io import StringIO, TextIOWrapper
+from itertools import chain, islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
 
 from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
 
 ENCODINGS: Sequence[str] = ("utf-8-sig", "latin-1", "cp1258")
 REQUIRED_COLUMNS = {"DATA", "PLANILHA", "ABA", "PRODUTO", "UNIDADE", "VALOR"}
+TAMANHO_AMOSTRA = 64 * 1024
+TAMANHO_LOTE = 5000
+MOTOR_PYTHON = "python"
+MOTOR_COLUNAR = "colunar"
+MOTORES_PARSER: Sequence[str] = (MOTOR_PYTHON, MOTOR_COLUNAR)
+FORMATOS_DATA: Sequence[str] = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y")
+TAMANHO_AMOSTRA_FORMATOS = 200
+LIMITE_MEMO_DATAS = 10000
+# Uploads a partir deste tamanho (bytes) usam o parse paralelo quando processos > 1.
+LIMITE_PARALELO = 16 * 1024 * 1024
+
+# Resultado da conversao de uma linha: o registro ou a mensagem de erro.
+ResultadoLinha = Union[MercadoGasCriacao, str]
 
 
 class GasTxtParserError(ValueError):
@@ -20,13 +38,203 @@ class GasTxtParserError(ValueError):
         self.detail = detail
 
 
-def parse_mercado_gas_upload(conteudo_bruto: bytes) -> List[MercadoGasCriacao]:
-    """Converte bytes de upload em registros MercadoGasCriacao."""
+class ConversorFormatos:
+    """
+    Conversores de DATA e VALOR especializados para um arquivo.
+
+    Dentro de um arquivo todas as linhas usam o mesmo formato de data e a
+    mesma convencao decimal; ambos sao inferidos de uma amostra de linhas. As
+    datas ja vistas ficam em memoria (ha poucas datas distintas por arquivo).
+    Valores que nao se encaixam no formato inferido seguem pelos conversores
+    genericos, de modo que resultados e mensagens de erro nao mudam.
+    """
+
+    def __init__(self, formato_data: Optional[str] = None, separador_decimal: Optional[str] = None):
+        self.formato_data = formato_data
+        self.separador_decimal = separador_decimal
+        self._datas: Dict[str, date] = {}
+
+    @classmethod
+    def inferir(cls, linhas: Iterable[Dict[str, Any]]) -> "ConversorFormatos":
+        """Infere os formatos a partir de linhas ja normalizadas."""
+        formatos: Counter = Counter()
+        separadores: Counter = Counter()
+        for linha in linhas:
+            data = linha.get("DATA")
+            if isinstance(data, str):
+                formatos[_identificar_formato_data(data.strip())] += 1
+            valor = linha.get("VALOR")
+            if isinstance(valor, str):
+                separadores[_identificar_separador_decimal(valor)] += 1
+
+        formatos.pop(None, None)
+        separadores.pop(None, None)
+        return cls(
+            formato_data=formatos.most_common(1)[0][0] if formatos else None,
+            separador_decimal=separadores.most_common(1)[0][0] if separadores else None,
+        )
+
+    def converter_data(self, data_str: Optional[str]) -> date:
+        if not isinstance(data_str, str):
+            return converter_data(data_str)
+
+        data = self._datas.get(data_str)
+        if data is not None:
+            return data
+
+        data = None
+        if self.formato_data:
+            # Os formatos aceitos sao mutuamente exclusivos: se o inferido
+            # reconhece o texto, o conversor generico chegaria a mesma data.
+            try:
+                data = datetime.strptime(data_str.strip(), self.formato_data).date()
+            except ValueError:
+                pass
+        if data is None:
+            data = converter_data(data_str)
+
+        if len(self._datas) < LIMITE_MEMO_DATAS:
+            self._datas[data_str] = data
+        return data
+
+    def converter_valor(self, valor_bruto: Optional[Any]) -> float:
+        if isinstance(valor_bruto, str) and self.separador_decimal:
+            texto = valor_bruto.strip()
+            # Sem espacos internos e sem o outro separador, as regras genericas
+            # se reduzem a trocar a virgula decimal por ponto.
+            if texto and " " not in texto:
+                if self.separador_decimal == "," and "." not in texto:
+                    return float(texto.replace(",", "."))
+                if self.separador_decimal == "." and "," not in texto:
+                    return float(texto)
+        return _converter_valor(valor_bruto)
+
+
+def parse_mercado_gas_upload(
+    conteudo_bruto: bytes,
+    motor: str = MOTOR_PYTHON,
+    processos: int = 1,
+    limite_paralelo: int = LIMITE_PARALELO,
+) -> List[MercadoGasCriacao]:
+    """
+    Converte bytes de upload em registros MercadoGasCriacao.
+
+    ``motor`` escolhe a conversao dos arquivos delimitados: ``python`` (linha a
+    linha) ou ``colunar`` (pandas, ver gas_parser_colunar). Arquivos
+    delimitados com pelo menos ``limite_paralelo`` bytes sao divididos em
+    blocos convertidos em ``processos`` processos (ver gas_parser_paralelo).
+    Uploads JSON usam sempre o caminho linha a linha.
+    """
+    _validar_motor(motor)
     texto = _decode_upload(conteudo_bruto)
-    registros = _parse_texto_para_registros(texto)
+    if len(conteudo_bruto) < limite_paralelo:
+        processos = 1
+    registros = _parse_texto_para_registros(texto, motor, processos)
     return registros
 
 
+def iterar_mercado_gas_upload(
+    arquivo: BinaryIO,
+    tamanho_lote: int = TAMANHO_LOTE,
+    motor: str = MOTOR_PYTHON,
+    processos: int = 1,
+    limite_paralelo: int = LIMITE_PARALELO,
+) -> Iterator[List[MercadoGasCriacao]]:
+    """
+    Le um upload binario posicionavel em fluxo e produz lotes de registros.
+
+    A codificacao e a primeira de ENCODINGS que decodifica o arquivo inteiro
+    (como em parse_mercado_gas_upload), verificada em uma leitura previa em
+    blocos; o delimitador vem de uma amostra inicial. O arquivo e entao
+    decodificado de forma incremental, de modo que o uso de memoria depende
+    do tamanho do lote e nao do arquivo. Apos o
+    primeiro erro de linha nenhum lote novo e produzido; as mensagens sao
+    acumuladas e levantadas em um GasTxtParserError ao final da leitura.
+
+    Arquivos com pelo menos ``limite_paralelo`` bytes sao convertidos em
+    ``processos`` processos, com os lotes produzidos na ordem do arquivo.
+    """
+    _validar_motor(motor)
+    paralelo = processos > 1 and arquivo.seek(0, os.SEEK_END) >= limite_paralelo
+    encoding, amostra, arquivo_completo = _detectar_encoding(arquivo)
+
+    if arquivo_completo and not amostra.strip():
+        raise GasTxtParserError("Arquivo vazio.")
+
+    if amostra.lstrip().startswith(("[", "{")):
+        # JSON nao e lido em fluxo; mantem o caminho em memoria.
+        registros = parse_mercado_gas_upload(arquivo.read(), motor, limite_paralelo=limite_paralelo)
+        for inicio in range(0, len(registros), tamanho_lote):
+            yield registros[inicio:inicio + tamanho_lote]
+        return
+
+    fluxo = TextIOWrapper(arquivo, encoding=encoding, newline="")
+    try:
+        delimitador = detectar_delimitador(amostra)
+        leitor = csv.DictReader(fluxo, delimiter=delimitador)
+        validar_cabecalho(leitor.fieldnames)
+        if paralelo:
+            from bd_pcp.services.gas_parser_paralelo import converter_csv_paralelo
+
+            resultados = converter_csv_paralelo(fluxo, leitor.fieldnames, delimitador, motor, processos)
+        elif motor == MOTOR_COLUNAR:
+            from bd_pcp.services.gas_parser_colunar import converter_csv_colunar
+
+            resultados = converter_csv_colunar(fluxo, leitor.fieldnames, delimitador)
+        else:
+            resultados = converter_linhas(leitor)
+        yield from _agrupar_em_lotes(resultados, indice_inicio=2, tamanho_lote=tamanho_lote)
+    except UnicodeDecodeError as exc:
+        raise GasTxtParserError(
+            "Nao foi possivel decodificar o arquivo. Utilize UTF-8 ou Latin-1."
+        ) from exc
+    finally:
+        fluxo.detach()
+
+
+def _validar_motor(motor: str) -> None:
+    if motor not in MOTORES_PARSER:
+        raise ValueError(f"Motor de parse desconhecido: '{motor}'.")
+
+
+def _detectar_encoding(arquivo: BinaryIO) -> Tuple[str, str, bool]:
+    """
+    Retorna a codificacao, a amostra inicial decodificada e se ela cobre o arquivo.
+
+    Um byte invalido pode estar em qualquer ponto do arquivo, e os lotes ja
+    produzidos nao podem ser refeitos com outra codificacao; por isso cada
+    candidata e verificada no arquivo inteiro, em blocos, antes da leitura.
+    """
+    arquivo.seek(0)
+    if not arquivo.read(1):
+        raise GasTxtParserError("Arquivo vazio.")
+
+    for encoding in ENCODINGS:
+        arquivo.seek(0)
+        decodificador = codecs.getincrementaldecoder(encoding)()
+        amostra: Optional[str] = None
+        arquivo_completo = False
+        try:
+            while True:
+                bloco = arquivo.read(TAMANHO_AMOSTRA)
+                texto = decodificador.decode(bloco, final=not bloco)
+                if amostra is None:
+                    amostra = texto
+                    arquivo_completo = len(bloco) < TAMANHO_AMOSTRA
+                elif arquivo_completo:
+                    amostra += texto
+                if not bloco:
+                    break
+        except UnicodeDecodeError:
+            continue
+        arquivo.seek(0)
+        return encoding, amostra, arquivo_completo
+
+    raise GasTxtParserError(
+        "Nao foi possivel decodificar o arquivo. Utilize UTF-8 ou Latin-1."
+    )
+
+
 def _decode_upload(conteudo_bruto: bytes) -> str:
     if not conteudo_bruto:
         raise GasTxtParserError("Arquivo vazio.")
@@ -42,7 +250,11 @@ def _decode_upload(conteudo_bruto: bytes) -> str:
     )
 
 
-def _parse_texto_para_registros(texto: str) -> List[MercadoGasCriacao]:
+def _parse_texto_para_registros(
+    texto: str,
+    motor: str = MOTOR_PYTHON,
+    processos: int = 1,
+) -> List[MercadoGasCriacao]:
     texto_limpo = texto.strip()
     if not texto_limpo:
         raise GasTxtParserError("Arquivo vazio.")
@@ -53,7 +265,16 @@ def _parse_texto_para_registros(texto: str) -> List[MercadoGasCriacao]:
             raise GasTxtParserError(erros_json)
         return registros_json
 
-    registros_csv, erros_csv = _parse_csv(texto)
+    if processos > 1:
+        from bd_pcp.services.gas_parser_paralelo import parse_csv_paralelo
+
+        registros_csv, erros_csv = parse_csv_paralelo(texto, motor, processos)
+    elif motor == MOTOR_COLUNAR:
+        from bd_pcp.services.gas_parser_colunar import parse_csv_colunar
+
+        registros_csv, erros_csv = parse_csv_colunar(texto)
+    else:
+        registros_csv, erros_csv = _parse_csv(texto)
     if erros_csv:
         raise GasTxtParserError(erros_csv)
     return registros_csv
@@ -85,21 +306,9 @@ def _tentar_parse_json(texto_limpo: str) -> Tuple[Optional[List[MercadoGasCriaca
 
 
 def _parse_csv(texto: str) -> Tuple[List[MercadoGasCriacao], List[str]]:
-    delimitador = _detectar_delimitador(texto)
+    delimitador = detectar_delimitador(texto)
     leitor = csv.DictReader(StringIO(texto), delimiter=delimitador)
-    if not leitor.fieldnames:
-        raise GasTxtParserError("Cabecalho nao identificado no arquivo.")
-
-    mapeamento_cabecalho = _normalizar_cabecalho(leitor.fieldnames)
-    ausentes = REQUIRED_COLUMNS.difference(mapeamento_cabecalho.keys())
-    if ausentes:
-        print(texto)
-        cabecalho_original = [nome or "<vazio>" for nome in leitor.fieldnames or []]
-        raise GasTxtParserError(
-            f"Colunas obrigatorias ausentes: {', '.join(sorted(ausentes))}."
-             f"Cabecalho encontrado: {cabecalho_original}"
-             f"{mapeamento_cabecalho}"
-        )
+    validar_cabecalho(leitor.fieldnames)
 
     try:
         registros, erros = _converter_dicts_para_registros(
@@ -113,7 +322,24 @@ def _parse_csv(texto: str) -> Tuple[List[MercadoGasCriacao], List[str]]:
     return registros, erros
 
 
-def _detectar_delimitador(conteudo: str) -> str:
+def validar_cabecalho(fieldnames: Optional[Sequence[Optional[str]]]) -> None:
+    """Levanta GasTxtParserError se o cabecalho nao tiver as colunas obrigatorias."""
+    if not fieldnames:
+        raise GasTxtParserError("Cabecalho nao identificado no arquivo.")
+
+    mapeamento_cabecalho = _normalizar_cabecalho(fieldnames)
+    ausentes = REQUIRED_COLUMNS.difference(mapeamento_cabecalho.keys())
+    if ausentes:
+        cabecalho_original = [nome or "<vazio>" for nome in fieldnames]
+        raise GasTxtParserError(
+            f"Colunas obrigatorias ausentes: {', '.join(sorted(ausentes))}."
+             f"Cabecalho encontrado: {cabecalho_original}"
+             f"{mapeamento_cabecalho}"
+        )
+
+
+def detectar_delimitador(conteudo: str) -> str:
+    """Retorna o separador mais frequente no conteudo (``;`` se nenhum aparecer)."""
     candidatos = [";", "\t", "|", ","]
     contagens = {sep: conteudo.count(sep) for sep in candidatos}
     if any(contagens.values()):
@@ -138,22 +364,33 @@ def _normalizar_linha(dados: Dict[Optional[str], Any]) -> Dict[str, Any]:
     for chave, valor in (dados or {}).items():
         if not chave:
             continue
-        normalizado = chave.strip().strip('"').strip("'").upper()
+        normalizado = _normalizar_chave(chave)
         if normalizado:
             resultado[normalizado] = valor
     return resultado
 
 
-def _linha_para_schema(linha: Dict[str, Any]) -> MercadoGasCriacao:
+@lru_cache(maxsize=256)
+def _normalizar_chave(chave: str) -> str:
+    # As mesmas chaves do cabecalho se repetem em todas as linhas do arquivo.
+    return chave.strip().strip('"').strip("'").upper()
+
+
+def _linha_para_schema(
+    linha: Dict[str, Any],
+    conversor: Optional[ConversorFormatos] = None,
+) -> MercadoGasCriacao:
+    conversor_data = conversor.converter_data if conversor else converter_data
+    conversor_valor = conversor.converter_valor if conversor else _converter_valor
     return MercadoGasCriacao(
-        DATA=_converter_data(linha.get("DATA")),
+        DATA=conversor_data(linha.get("DATA")),
         PLANILHA=(linha.get("PLANILHA") or "").strip(),
         ABA=(linha.get("ABA") or "").strip(),
         PRODUTO=(linha.get("PRODUTO") or "").strip(),
         LOCAL=_normalizar_campo_texto(linha.get("LOCAL")),
         EMPRESA=_normalizar_campo_texto(linha.get("EMPRESA")),
         UNIDADE=(linha.get("UNIDADE") or "").strip(),
-        VALOR=_converter_valor(linha.get("VALOR")),
+        VALOR=conversor_valor(linha.get("VALOR")),
     )
 
 
@@ -204,16 +441,111 @@ def _converter_dicts_para_registros(
         )
 
     registros: List[MercadoGasCriacao] = []
+    conversor = ConversorFormatos.inferir(normalizados[:TAMANHO_AMOSTRA_FORMATOS])
 
     for offset, linha in enumerate(normalizados):
         try:
-            registros.append(_linha_para_schema(linha))
+            registros.append(_linha_para_schema(linha, conversor))
         except Exception as exc:
             erros.append(f"Linha {indice_inicio + offset}: {exc}")
 
     return registros, erros
 
 
+def converter_linha(
+    linha: Dict[Optional[str], Any],
+    conversor: Optional[ConversorFormatos] = None,
+) -> ResultadoLinha:
+    """Converte uma linha do csv.DictReader no registro ou na mensagem de erro."""
+    try:
+        return _linha_para_schema(_normalizar_linha(linha), conversor)
+    except Exception as exc:
+        return str(exc)
+
+
+def converter_linhas(leitor: Iterable[Dict[Optional[str], Any]]) -> Iterator[ResultadoLinha]:
+    """Converte linhas do csv.DictReader com os formatos inferidos das primeiras linhas."""
+    linhas = iter(leitor)
+    amostra = list(islice(linhas, TAMANHO_AMOSTRA_FORMATOS))
+    conversor = ConversorFormatos.inferir(_normalizar_linha(linha) for linha in amostra)
+    return map(partial(converter_linha, conversor=conversor), chain(amostra, linhas))
+
+
+def separar_resultados(
+    resultados: Iterable[ResultadoLinha],
+    indice_inicio: int,
+) -> Tuple[List[MercadoGasCriacao], List[str]]:
+    """Separa registros e mensagens ``Linha N: ...`` de uma sequencia de resultados por linha."""
+    registros: List[MercadoGasCriacao] = []
+    erros: List[str] = []
+    total_linhas = 0
+    for total_linhas, resultado in enumerate(resultados, start=1):
+        if isinstance(resultado, str):
+            erros.append(f"Linha {indice_inicio + total_linhas - 1}: {resultado}")
+        else:
+            registros.append(resultado)
+
+    if not total_linhas:
+        raise GasTxtParserError("Arquivo sem registros de dados.")
+    return registros, erros
+
+
+def ler_blocos(fluxo: TextIO, tamanho_bloco: int) -> Iterator[str]:
+    """Le o fluxo em blocos terminados em quebra de linha fora de aspas."""
+    pendente = ""
+    while True:
+        parte = fluxo.read(tamanho_bloco)
+        if not parte:
+            if pendente:
+                yield pendente
+            return
+
+        texto = pendente + parte
+        corte = texto.rfind("\n") + 1
+        aspas_abertas = texto.count('"', 0, corte) % 2
+        while corte and aspas_abertas:
+            anterior = texto.rfind("\n", 0, corte - 1) + 1
+            aspas_abertas ^= texto.count('"', anterior, corte) % 2
+            corte = anterior
+
+        if corte:
+            yield texto[:corte]
+            pendente = texto[corte:]
+        else:
+            pendente = texto
+
+
+def _agrupar_em_lotes(
+    resultados: Iterable[ResultadoLinha],
+    indice_inicio: int,
+    tamanho_lote: int,
+) -> Iterator[List[MercadoGasCriacao]]:
+    lote: List[MercadoGasCriacao] = []
+    erros: List[str] = []
+    total_linhas = 0
+
+    for offset, registro in enumerate(resultados):
+        total_linhas += 1
+        if isinstance(registro, str):
+            erros.append(f"Linha {indice_inicio + offset}: {registro}")
+            continue
+
+        if erros:
+            continue
+
+        lote.append(registro)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+
+    if not total_linhas:
+        raise GasTxtParserError("Arquivo sem registros de dados.")
+    if erros:
+        raise GasTxtParserError(erros)
+    if lote:
+        yield lote
+
+
 def _normalizar_campo_texto(valor: Optional[str]) -> Optional[str]:
     if valor is None:
         return None
@@ -221,14 +553,14 @@ def _normalizar_campo_texto(valor: Optional[str]) -> Optional[str]:
     return texto or None
 
 
-def _converter_data(data_str: Optional[str]) -> date:
+def converter_data(data_str: Optional[str]) -> date:
+    """Converte DATA em qualquer um dos FORMATOS_DATA."""
     if not data_str:
         raise ValueError("Campo DATA nao pode ser vazio.")
 
     texto = str(data_str).strip()
-    formatos = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y")
 
-    for formato in formatos:
+    for formato in FORMATOS_DATA:
         try:
             return datetime.strptime(texto, formato).date()
         except ValueError:
@@ -260,3 +592,23 @@ def _converter_valor(valor_bruto: Optional[Any]) -> float:
         texto = texto.replace(",", ".")
 
     return float(texto)
+
+
+def _identificar_formato_data(texto: str) -> Optional[str]:
+    for formato in FORMATOS_DATA:
+        try:
+            datetime.strptime(texto, formato)
+            return formato
+        except ValueError:
+            continue
+    return None
+
+
+def _identificar_separador_decimal(valor: str) -> Optional[str]:
+    """Retorna o separador decimal aparente de um valor ou None se nao houver."""
+    texto = valor.strip().replace(" ", "")
+    virgula = texto.rfind(",")
+    ponto = texto.rfind(".")
+    if virgula < 0 and ponto < 0:
+        return None
+    return "," if virgula > ponto else "."
@@ -0,0 +1,420 @@
+"""
+Importacoes de MercadoGas em segundo plano.
+
+A requisicao grava o arquivo (ou o payload do upsert) em disco, registra a
+importacao no IMPORTACAO_GAS e responde com o ID; uma thread da fila em
+processo faz o parse, a substituicao e a insercao, publicando fase, contagens,
+erros e tempos na mesma tabela para consulta em ``GET /api/gas/jobs/{id}``.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Union
+
+from fastapi import HTTPException
+
+from bd_pcp.core.config import settings
+from bd_pcp.core.session import SessionLocal
+from bd_pcp.db.models.importacao_gas import (
+    FASE_CONCLUIDA,
+    FASE_DUPLICADA,
+    FASE_ERRO,
+    FASE_LEITURA,
+    FASE_NA_FILA,
+    ImportacaoGas,
+)
+from bd_pcp.db.repositories.gas_repositorios import FUSO_FORTALEZA
+from bd_pcp.db.repositories.importacao_repositorios import (
+    ImportacaoGasRepository,
+    RegistroImportacaoGasRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+# Intervalo minimo (segundos) entre gravacoes de andamento de uma importacao.
+INTERVALO_PROGRESSO = 1.0
+# Intervalo (segundos) do sinal de vida das importacoes em execucao e da busca por abandonadas.
+INTERVALO_ATIVIDADE = 30.0
+MENSAGEM_ABANDONADA = "Importacao interrompida: o processo que a executava parou. Envie o conteudo novamente."
+
+ExecutorImportacao = Callable[..., Dict[str, int]]
+
+
+class ProgressoImportacao:
+    """
+    Fase atual, contagens e tempo acumulado por fase de uma importacao.
+
+    Esta classe apenas acumula os valores em memoria (importacoes sincronas);
+    ProgressoJob tambem grava o andamento no IMPORTACAO_GAS.
+    """
+
+    def __init__(self):
+        self.fase = FASE_NA_FILA
+        self.linhas_lidas = 0
+        self.linhas_inseridas = 0
+        self.linhas_substituidas = 0
+        self.linhas_inalteradas = 0
+        self.tempos: Dict[str, float] = {}
+
+    @contextmanager
+    def etapa(self, fase: str) -> Iterator[None]:
+        """Marca ``fase`` como atual e soma a duracao do bloco ao tempo da fase."""
+        self.fase = fase
+        self.publicar()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tempos[fase] = self.tempos.get(fase, 0.0) + time.perf_counter() - inicio
+
+    def contar(self, lidas: int = 0, inseridas: int = 0, substituidas: int = 0, inalteradas: int = 0) -> None:
+        self.linhas_lidas += lidas
+        self.linhas_inseridas += inseridas
+        self.linhas_substituidas += substituidas
+        self.linhas_inalteradas += inalteradas
+        self.publicar()
+
+    def publicar(self, forcar: bool = False) -> None:
+        """Ponto de extensao para persistir o andamento; aqui nao faz nada."""
+
+
+class ProgressoJob(ProgressoImportacao):
+    """
+    Progresso gravado no IMPORTACAO_GAS por uma sessao propria.
+
+    A importacao roda em uma unica transacao, ainda nao confirmada; o andamento
+    usa outra sessao para ficar visivel a quem consulta o job. As gravacoes
+    intermediarias sao limitadas a uma por ``intervalo`` segundos e falhas nelas
+    nao interrompem a importacao.
+    """
+
+    def __init__(self, importacao_id: str, fabrica_sessao=SessionLocal, intervalo: float = INTERVALO_PROGRESSO):
+        super().__init__()
+        self.importacao_id = importacao_id
+        self.fabrica_sessao = fabrica_sessao
+        self.intervalo = intervalo
+        self._ultima_gravacao = 0.0
+
+    def publicar(self, forcar: bool = False, **valores) -> None:
+        agora = time.monotonic()
+        if not forcar and agora - self._ultima_gravacao < self.intervalo:
+            return
+        self._ultima_gravacao = agora
+
+        db = self.fabrica_sessao()
+        try:
+            ImportacaoGasRepository(db).atualizar(
+                self.importacao_id,
+                FASE=self.fase,
+                LINHAS_LIDAS=self.linhas_lidas,
+                LINHAS_INSERIDAS=self.linhas_inseridas,
+                LINHAS_SUBSTITUIDAS=self.linhas_substituidas,
+                LINHAS_INALTERADAS=self.linhas_inalteradas,
+                ATIVIDADE_EM=datetime.now(FUSO_FORTALEZA),
+                TEMPOS=json.dumps({fase: round(segundos, 3) for fase, segundos in self.tempos.items()}),
+                **valores,
+            )
+        except Exception:
+            if forcar:
+                raise
+            logger.warning("Falha ao gravar andamento da importacao %s", self.importacao_id, exc_info=True)
+        finally:
+            db.close()
+
+    def finalizar(self, erros: Optional[List[str]] = None, fase: Optional[str] = None) -> None:
+        """Grava o resultado final (concluida, erro ou a ``fase`` informada)."""
+        self.fase = fase or (FASE_ERRO if erros else FASE_CONCLUIDA)
+        self.publicar(
+            forcar=True,
+            ERROS=json.dumps(erros, ensure_ascii=False) if erros else None,
+            CONCLUIDO_EM=datetime.now(FUSO_FORTALEZA),
+        )
+
+
+class FilaImportacoes:
+    """
+    Fila em processo das importacoes em segundo plano, sem broker externo.
+
+    Cada tipo de importacao (``upload-txt``, ``upsert``) e associado por
+    ``registrar_tipo`` a uma funcao ``(db, importacao, progresso) -> resumo``.
+    As threads reservam a importacao com um UPDATE condicional antes de
+    executa-la, de modo que ``retomar_pendentes`` pode ser chamado por todos
+    os processos da API na inicializacao sem que uma importacao rode duas vezes.
+
+    Uma thread de vigia grava, a cada INTERVALO_ATIVIDADE segundos, o sinal de
+    vida (ATIVIDADE_EM) das importacoes em execucao no processo e encerra como
+    erro as que estao em andamento sem sinal ha mais de ``abandono`` segundos,
+    isto e, as que pertenciam a um processo interrompido; os arquivos delas
+    sao removidos.
+    """
+
+    def __init__(
+        self,
+        diretorio: str,
+        max_threads: int,
+        fabrica_sessao=SessionLocal,
+        abandono: float = settings.GAS_IMPORTACOES_ABANDONO_SEGUNDOS,
+    ):
+        self.diretorio = diretorio
+        self.max_threads = max_threads
+        self.fabrica_sessao = fabrica_sessao
+        self.abandono = abandono
+        self._executores: Dict[str, ExecutorImportacao] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._vigia: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+        self._trava = threading.Lock()
+        self._ativas: Set[str] = set()
+        self._na_fila = 0
+        self._em_execucao = 0
+        self._concluidas = 0
+        self._falhas = 0
+        self._abandonadas = 0
+
+    def registrar_tipo(self, tipo: str, funcao: ExecutorImportacao) -> None:
+        self._executores[tipo] = funcao
+
+    def enfileirar(
+        self,
+        db,
+        tipo: str,
+        conteudo: Union[BinaryIO, bytes],
+        arquivo: Optional[str] = None,
+        motor: Optional[str] = None,
+        modo: Optional[str] = None,
+        usuario: Optional[str] = None,
+        hash_conteudo: Optional[str] = None,
+        forcar: bool = False,
+    ) -> ImportacaoGas:
+        """
+        Grava o conteudo em disco, registra a importacao e a coloca na fila.
+
+        Sem ``forcar``, um conteudo identico (mesmo ``hash_conteudo``) ainda na
+        fila ou em execucao nao gera outra importacao: a existente e retornada.
+        """
+        if tipo not in self._executores:
+            raise ValueError(f"Tipo de importacao desconhecido: '{tipo}'.")
+
+        if hash_conteudo and not forcar:
+            existente = ImportacaoGasRepository(db).obter_em_andamento_por_hash(hash_conteudo)
+            if existente is not None:
+                return existente
+
+        id_ = uuid.uuid4().hex
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = os.path.join(self.diretorio, f"{id_}.dat")
+        with open(caminho, "wb") as destino:
+            if isinstance(conteudo, bytes):
+                destino.write(conteudo)
+            else:
+                conteudo.seek(0)
+                shutil.copyfileobj(conteudo, destino)
+
+        try:
+            importacao = ImportacaoGasRepository(db).criar(
+                id_,
+                tipo,
+                caminho,
+                arquivo=arquivo,
+                motor=motor,
+                modo=modo,
+                usuario=usuario,
+                hash_conteudo=hash_conteudo,
+                forcar=forcar,
+            )
+        except Exception:
+            os.remove(caminho)
+            raise
+
+        self._submeter(id_)
+        return importacao
+
+    def retomar_pendentes(self) -> int:
+        """
+        Recoloca na fila as importacoes registradas e ainda nao iniciadas.
+
+        Antes encerra as importacoes abandonadas por um processo interrompido
+        e inicia a thread de vigia.
+        """
+        self.encerrar_abandonadas()
+        self._iniciar_vigia()
+        db = self.fabrica_sessao()
+        try:
+            ids = ImportacaoGasRepository(db).listar_ids_na_fila()
+        finally:
+            db.close()
+        for id_ in ids:
+            self._submeter(id_)
+        return len(ids)
+
+    def encerrar_abandonadas(self) -> int:
+        """Marca como erro as importacoes em andamento sem sinal de vida e remove os arquivos delas."""
+        limite = datetime.now(FUSO_FORTALEZA) - timedelta(seconds=self.abandono)
+        with self._trava:
+            ativas = set(self._ativas)
+
+        db = self.fabrica_sessao()
+        encerradas = 0
+        try:
+            repositorio = ImportacaoGasRepository(db)
+            abandonadas = [
+                (importacao.ID, importacao.CAMINHO)
+                for importacao in repositorio.listar_abandonadas(limite)
+                if importacao.ID not in ativas
+            ]
+            for id_, caminho in abandonadas:
+                if not repositorio.encerrar_abandonada(id_, limite, json.dumps([MENSAGEM_ABANDONADA])):
+                    continue
+                encerradas += 1
+                logger.warning("Importacao %s abandonada marcada como erro", id_)
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+        finally:
+            db.close()
+
+        with self._trava:
+            self._abandonadas += encerradas
+        return encerradas
+
+    def encerrar(self) -> None:
+        """
+        Encerra as threads da fila; importacoes nao iniciadas ficam na_fila no banco.
+
+        As tarefas ainda nao iniciadas sao canceladas e saem da contagem
+        ``na_fila`` das estatisticas; as em execucao terminam normalmente.
+        """
+        with self._trava:
+            executor, self._executor = self._executor, None
+            self._vigia = None
+            self._parar.set()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def estatisticas(self) -> Dict[str, float]:
+        with self._trava:
+            return {
+                "max_threads": self.max_threads,
+                "na_fila": self._na_fila,
+                "em_execucao": self._em_execucao,
+                "concluidas": self._concluidas,
+                "falhas": self._falhas,
+                "abandonadas": self._abandonadas,
+            }
+
+    def _submeter(self, id_: str) -> None:
+        self._iniciar_vigia()
+        with self._trava:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix="importacoes")
+            self._na_fila += 1
+            futuro = self._executor.submit(self._executar, id_)
+        futuro.add_done_callback(self._descontar_cancelada)
+
+    def _descontar_cancelada(self, futuro: Future) -> None:
+        # Tarefas canceladas por encerrar nunca chegam a _executar, que desconta a fila.
+        if futuro.cancelled():
+            with self._trava:
+                self._na_fila -= 1
+
+    def _iniciar_vigia(self) -> None:
+        with self._trava:
+            if self._vigia is not None:
+                return
+            self._parar = threading.Event()
+            self._vigia = threading.Thread(
+                target=self._vigiar,
+                args=(self._parar,),
+                name="importacoes_vigia",
+                daemon=True,
+            )
+            self._vigia.start()
+
+    def _vigiar(self, parar: threading.Event) -> None:
+        while not parar.wait(INTERVALO_ATIVIDADE):
+            try:
+                with self._trava:
+                    ativas = list(self._ativas)
+                if ativas:
+                    db = self.fabrica_sessao()
+                    try:
+                        ImportacaoGasRepository(db).marcar_atividade(ativas)
+                    finally:
+                        db.close()
+                self.encerrar_abandonadas()
+            except Exception:
+                logger.warning("Falha ao registrar a atividade das importacoes", exc_info=True)
+
+    def _executar(self, id_: str) -> None:
+        with self._trava:
+            self._na_fila -= 1
+            self._em_execucao += 1
+
+        db = self.fabrica_sessao()
+        erros: Optional[List[str]] = None
+        caminho = None
+        reservada = False
+        try:
+            repositorio = ImportacaoGasRepository(db)
+            if not repositorio.reservar(id_, FASE_LEITURA):
+                return
+            reservada = True
+            with self._trava:
+                self._ativas.add(id_)
+            importacao = repositorio.obter(id_)
+            caminho = importacao.CAMINHO
+            progresso = ProgressoJob(id_, self.fabrica_sessao)
+            if self._ja_importado(db, importacao):
+                progresso.finalizar(fase=FASE_DUPLICADA)
+                return
+            try:
+                self._executores[importacao.TIPO](db, importacao, progresso)
+            except HTTPException as exc:
+                erros = _mensagens_erro(exc.detail)
+            except Exception as exc:
+                logger.exception("Falha na importacao %s", id_)
+                erros = [f"Erro ao importar arquivo: {exc}"]
+            progresso.finalizar(erros)
+        except Exception as exc:
+            logger.exception("Falha ao executar a importacao %s", id_)
+            erros = erros or [f"Falha ao executar a importacao: {exc}"]
+            if reservada:
+                # Ja reservada: sem gravar o erro ela ficaria em andamento para sempre.
+                try:
+                    ProgressoJob(id_, self.fabrica_sessao).finalizar(erros)
+                except Exception:
+                    logger.exception("Falha ao gravar o erro da importacao %s", id_)
+        finally:
+            db.close()
+            if caminho is not None and os.path.exists(caminho):
+                os.remove(caminho)
+            with self._trava:
+                self._em_execucao -= 1
+                self._ativas.discard(id_)
+                if reservada:
+                    if erros:
+                        self._falhas += 1
+                    else:
+                        self._concluidas += 1
+
+    @staticmethod
+    def _ja_importado(db, importacao: ImportacaoGas) -> bool:
+        # O mesmo conteudo pode ter sido importado enquanto esta importacao aguardava na fila.
+        if not importacao.HASH or importacao.FORCAR:
+            return False
+        return RegistroImportacaoGasRepository(db).obter(importacao.HASH) is not None
+
+
+def _mensagens_erro(detalhe: Any) -> List[str]:
+    if isinstance(detalhe, list):
+        return [str(item) for item in detalhe]
+    return [str(detalhe)]
+
+
+fila_importacoes = FilaImportacoes(settings.GAS_IMPORTACOES_DIR, settings.GAS_IMPORTACOES_THREADS)
@@ -11,8 +11,8 @@ class UserService:
     """Serviço para operações com usuários"""
 
     @staticmethod
-    def create_user(db: Session, user_data: UserCreate) -> Usuario:
-        """Cria um novo usuário"""
+    def create_user(db: Session, user_data: UserCreate, password_hash: Optional[str] = None) -> Usuario:
+        """Cria um novo usuário; ``password_hash`` dispensa o hash da senha aqui"""
         try:
             # Verificar se usuário já existe
             existing_user = db.query(Usuario).filter(
@@ -38,7 +38,10 @@ class UserService:
                 EMAIL=user_data.email,
                 IS_ACTIVE=user_data.is_active
             )
-            db_user.set_password(user_data.password)
+            if password_hash:
+                db_user.PASSWORD_HASH = password_hash
+            else:
+                db_user.set_password(user_data.password)
             
             db.add(db_user)
             db.commit()
@@ -69,8 +72,13 @@ class UserService:
         return db.query(Usuario).offset(skip).limit(limit).all()
 
     @staticmethod
-    def update_user(db: Session, user_id: int, user_data: UserUpdate) -> Usuario:
-        """Atualiza um usuário"""
+    def update_user(
+        db: Session,
+        user_id: int,
+        user_data: UserUpdate,
+        password_hash: Optional[str] = None,
+    ) -> Usuario:
+        """Atualiza um usuário; ``password_hash`` dispensa o hash da nova senha aqui"""
         db_user = UserService.get_user_by_id(db, user_id)
         if not db_user:
             raise HTTPException(
@@ -82,7 +90,11 @@ class UserService:
         update_data = user_data.dict(exclude_unset=True)
         
         if "password" in update_data:
-            db_user.set_password(update_data.pop("password"))
+            password = update_data.pop("password")
+            if password_hash:
+                db_user.PASSWORD_HASH = password_hash
+            else:
+                db_user.set_password(password)
         
         for field, value in update_data.items():
             if field == "username":
@@ -0,0 +1,123 @@
+"""
+Mede a leitura do retrato atual (linhas sem ATUALIZADO_EM) contra o tamanho do historico.
+
+Para cada quantidade de versoes popula um SQLite temporario com o mesmo
+retrato atual de ``--linhas`` registros e ``versoes - 1`` copias anteriores ja
+substituidas (ATUALIZADO_EM preenchido), como acontece apos varias
+importacoes das mesmas planilhas. Em cada banco mede, com e sem o indice
+filtrado ix_mercado_gas_atuais, ``MercadoGasRepository.listar_atuais`` sobre o
+retrato inteiro e sobre um mes, e imprime o plano de execucao. Com o indice o
+tempo acompanha o retrato e nao o historico.
+
+Uso:
+    python -m benchmarks.bench_atuais --linhas 20000 --versoes 1 10 50
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.bench_filtro_data import plano
+from benchmarks.dados_sinteticos import DATA_INICIAL, gerar_registros, popular_sqlite
+from bd_pcp.db.models.mercado_gas import INDICE_ATUAIS
+from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository, intervalo_mes
+
+
+def gerar_historico(linhas: int, versoes: int) -> Iterator[Dict[str, Any]]:
+    """Gera ``versoes - 1`` copias substituidas do retrato e, por ultimo, o retrato atual."""
+    substituido_em = datetime(2024, 1, 1)
+    for versao in range(versoes):
+        atual = versao == versoes - 1
+        for registro in gerar_registros(linhas, semente=versao):
+            registro["ATUALIZADO_EM"] = None if atual else substituido_em + timedelta(days=versao)
+            yield registro
+
+
+def cronometrar(repositorio: MercadoGasRepository, repeticoes: int, **filtros) -> tuple[float, int]:
+    tempos = []
+    total = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        total = len(repositorio.listar_atuais(**filtros))
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000, total
+
+
+def medir(caminho: str, linhas: int, versoes: int, repeticoes: int) -> List[Dict[str, Any]]:
+    engine = popular_sqlite(caminho, linhas * versoes, registros=gerar_historico(linhas, versoes))
+    data_inicio, data_fim = intervalo_mes(DATA_INICIAL.month, DATA_INICIAL.year)
+    cenarios = (
+        ("retrato", {}),
+        ("mes", {"data_inicio": data_inicio, "data_fim": data_fim}),
+    )
+    resultados = []
+    try:
+        Sessao = sessionmaker(bind=engine)
+        for indice in (True, False):
+            if not indice:
+                with engine.begin() as conexao:
+                    conexao.execute(text(f"DROP INDEX {INDICE_ATUAIS}"))
+                # Novas conexoes: o cache de instrucoes do sqlite3 manteria os planos antigos.
+                engine.dispose()
+            with Sessao() as db:
+                repositorio = MercadoGasRepository(db)
+                for nome, filtros in cenarios:
+                    with engine.connect() as conexao:
+                        linhas_plano = plano(conexao, repositorio.consulta_atuais(**filtros))
+                    mediana, total = cronometrar(repositorio, repeticoes, **filtros)
+                    resultados.append({
+                        "versoes": versoes,
+                        "linhas_tabela": linhas * versoes,
+                        "indice": indice,
+                        "cenario": nome,
+                        "linhas": total,
+                        "mediana_ms": mediana,
+                        "plano": linhas_plano,
+                    })
+    finally:
+        engine.dispose()
+    return resultados
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=20_000, help="Linhas do retrato atual.")
+    parser.add_argument("--versoes", type=int, nargs="+", default=[1, 10, 50],
+                        help="Versoes de cada linha na tabela (1 = sem historico).")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for versoes in args.versoes:
+        descritor, caminho = tempfile.mkstemp(suffix=".db")
+        os.close(descritor)
+        print(f"Populando SQLite com {args.linhas * versoes} linhas ({versoes} versoes)...")
+        try:
+            resultados.extend(medir(caminho, args.linhas, versoes, args.repeticoes))
+        finally:
+            os.remove(caminho)
+
+    print(f"\n{'versoes':>8} {'tabela':>10} {'indice':>7} {'cenario':>8} {'linhas':>8} {'mediana':>12}")
+    for resultado in resultados:
+        print(
+            f"{resultado['versoes']:>8} {resultado['linhas_tabela']:>10} "
+            f"{'sim' if resultado['indice'] else 'nao':>7} {resultado['cenario']:>8} "
+            f"{resultado['linhas']:>8} {resultado['mediana_ms']:>9.1f} ms"
+        )
+    for resultado in resultados:
+        if resultado["versoes"] == args.versoes[-1]:
+            print(f"\n== plano {resultado['cenario']}, indice {'sim' if resultado['indice'] else 'nao'}:")
+            for linha in resultado["plano"]:
+                print(f"   {linha}")
+
+
+if __name__ == "__main__":
+    main()
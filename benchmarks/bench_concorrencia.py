@@ -0,0 +1,103 @@
+"""
+Mede a latencia de requisicoes independentes durante uma importacao grande.
+
+Dispara um POST /api/gas/upload-txt com um arquivo sintetico e, enquanto ele
+roda, faz chamadas repetidas a /api/auth/me (sem banco) e a /api/gas/ paginado
+(com banco). Com o acesso ao banco fora do event loop, essas chamadas seguem
+respondendo em milissegundos; se alguma rota voltar a bloquear o loop, o
+maximo passa a acompanhar a duracao da importacao.
+
+Usa um SQLite temporario no lugar do SQL Server e ignora a autenticacao.
+
+Uso:
+    python -m benchmarks.bench_concorrencia --linhas 200000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.dados_sinteticos import gerar_txt, popular_sqlite
+from bd_pcp.app import app
+from bd_pcp.core.security import get_current_user
+from bd_pcp.core.session import get_db
+
+
+async def medir(linhas: int, intervalo: float) -> Dict[str, List[float]]:
+    conteudo = gerar_txt(linhas)
+    latencias: Dict[str, List[float]] = {"/api/auth/me": [], "/api/gas/?limite=50": []}
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        inicio_importacao = time.perf_counter()
+        importacao = asyncio.create_task(
+            cliente.post("/api/gas/upload-txt", files={"arquivo": ("bench.txt", conteudo)})
+        )
+        await asyncio.sleep(0)
+
+        while not importacao.done():
+            for rota in latencias:
+                inicio = time.perf_counter()
+                resposta = await cliente.get(rota)
+                resposta.raise_for_status()
+                latencias[rota].append((time.perf_counter() - inicio) * 1000)
+            await asyncio.sleep(intervalo)
+
+        resposta = await importacao
+        resposta.raise_for_status()
+        duracao = (time.perf_counter() - inicio_importacao) * 1000
+
+    print(f"Importacao: {resposta.json()} em {duracao:.0f} ms")
+    return latencias
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=200_000)
+    parser.add_argument("--intervalo", type=float, default=0.05, help="Pausa entre sondagens, em segundos.")
+    args = parser.parse_args()
+
+    descritor, caminho = tempfile.mkstemp(suffix=".db")
+    os.close(descritor)
+    engine = popular_sqlite(caminho, 10_000)
+    Sessao = sessionmaker(bind=engine, autoflush=False)
+
+    def obter_db_sqlite():
+        db = Sessao()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = obter_db_sqlite
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": "bench"}
+
+    try:
+        latencias = asyncio.run(medir(args.linhas, args.intervalo))
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+        os.remove(caminho)
+
+    for rota, valores in latencias.items():
+        if not valores:
+            print(f"{rota}: nenhuma resposta durante a importacao")
+            continue
+        valores.sort()
+        p95 = valores[int(len(valores) * 0.95) - 1] if len(valores) >= 20 else valores[-1]
+        print(
+            f"{rota}: {len(valores)} respostas, mediana {statistics.median(valores):.1f} ms, "
+            f"p95 {p95:.1f} ms, max {valores[-1]:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
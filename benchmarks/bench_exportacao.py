@@ -0,0 +1,113 @@
+"""
+Compara os formatos de exportacao de MercadoGas: tamanho, tempo de geracao e de carga.
+
+Gera ``--linhas`` registros sinteticos com as colunas da exportacao e, para
+cada formato/compressao, mede o tempo de ``escrever_excel_mercado_gas`` ou
+``gerar_exportacao``, o tamanho do arquivo e o tempo para carrega-lo em um
+DataFrame do pandas (o que os jobs de BI fazem com o download). Parquet e
+Arrow so sao medidos com o pyarrow instalado.
+
+Uso:
+    python -m benchmarks.bench_exportacao --linhas 100000
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import gerar_registros
+from bd_pcp.services.gas_exportacao import (
+    FORMATO_ARROW,
+    FORMATO_CSV,
+    FORMATO_PARQUET,
+    FORMATOS_PYARROW,
+    escrever_excel_mercado_gas,
+    gerar_exportacao,
+    pa,
+)
+
+CASOS = (
+    (FORMATO_CSV, "nenhuma"),
+    (FORMATO_CSV, "gzip"),
+    (FORMATO_PARQUET, "snappy"),
+    (FORMATO_PARQUET, "zstd"),
+    (FORMATO_ARROW, "nenhuma"),
+    (FORMATO_ARROW, "zstd"),
+)
+
+
+def gerar_linhas(total: int) -> List[SimpleNamespace]:
+    criado_em = datetime(2024, 1, 1, 8, 0, 0)
+    return [
+        SimpleNamespace(ID=indice, CRIADO_EM=criado_em, ATUALIZADO_EM=None, **registro)
+        for indice, registro in enumerate(gerar_registros(total), start=1)
+    ]
+
+
+def carregar(formato: str, compressao: str, conteudo: bytes) -> pd.DataFrame:
+    if formato == FORMATO_CSV:
+        return pd.read_csv(io.BytesIO(conteudo), compression="gzip" if compressao == "gzip" else None)
+    if formato == FORMATO_PARQUET:
+        return pd.read_parquet(io.BytesIO(conteudo))
+    return pa.ipc.open_stream(conteudo).read_all().to_pandas()
+
+
+def medir_xlsx(linhas: List[SimpleNamespace]) -> Dict[str, Any]:
+    descritor, caminho = tempfile.mkstemp(suffix=".xlsx")
+    os.close(descritor)
+    try:
+        inicio = time.perf_counter()
+        escrever_excel_mercado_gas(linhas, caminho)
+        geracao = time.perf_counter() - inicio
+        tamanho = os.path.getsize(caminho)
+        inicio = time.perf_counter()
+        pd.read_excel(caminho)
+        carga = time.perf_counter() - inicio
+    finally:
+        os.remove(caminho)
+    return {"formato": "xlsx", "compressao": "-", "bytes": tamanho, "geracao_s": geracao, "carga_s": carga}
+
+
+def medir(linhas: List[SimpleNamespace], formato: str, compressao: str) -> Dict[str, Any]:
+    inicio = time.perf_counter()
+    conteudo = b"".join(gerar_exportacao(linhas, formato, compressao))
+    geracao = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    carregar(formato, compressao, conteudo)
+    carga = time.perf_counter() - inicio
+    return {"formato": formato, "compressao": compressao, "bytes": len(conteudo), "geracao_s": geracao, "carga_s": carga}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--sem-xlsx", action="store_true", help="Nao mede o xlsx (lento com muitas linhas).")
+    args = parser.parse_args(argv)
+
+    linhas = gerar_linhas(args.linhas)
+    resultados = [] if args.sem_xlsx else [medir_xlsx(linhas)]
+    for formato, compressao in CASOS:
+        if formato in FORMATOS_PYARROW and pa is None:
+            print(f"{formato}: pyarrow nao instalado, ignorado.")
+            continue
+        resultados.append(medir(linhas, formato, compressao))
+
+    print(f"\n{'formato':>8} {'compressao':>10} {'tamanho':>12} {'geracao':>10} {'carga':>10}")
+    for resultado in resultados:
+        print(
+            f"{resultado['formato']:>8} {resultado['compressao']:>10} "
+            f"{resultado['bytes'] / 1024 / 1024:>9.2f} MB "
+            f"{resultado['geracao_s']:>8.2f} s {resultado['carga_s']:>8.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
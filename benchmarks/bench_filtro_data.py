@@ -0,0 +1,117 @@
+"""
+Compara o filtro legado por extract(month/year) com o filtro por periodo.
+
+Por padrao popula um SQLite temporario com dados sinteticos; com ``--url``
+usa um banco existente (ex.: SQL Server de homologacao). Para cada consulta
+imprime o plano de execucao (EXPLAIN QUERY PLAN no SQLite, SHOWPLAN_TEXT no
+SQL Server) e a mediana do tempo de execucao.
+
+Uso:
+    python -m benchmarks.bench_filtro_data --linhas 500000 --mes 6 --ano 2024
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from sqlalchemy import create_engine, extract, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import Select
+
+from benchmarks.dados_sinteticos import popular_sqlite
+from bd_pcp.db.models.mercado_gas import MercadoGas
+from bd_pcp.db.repositories.gas_repositorios import intervalo_mes
+
+
+def consulta_legada(mes: int, ano: int) -> Select:
+    return (
+        select(*MercadoGas.__table__.columns)
+        .where(
+            extract("month", MercadoGas.DATA) == mes,
+            extract("year", MercadoGas.DATA) == ano,
+        )
+        .order_by(MercadoGas.DATA.desc())
+    )
+
+
+def consulta_periodo(mes: int, ano: int) -> Select:
+    data_inicio, data_fim = intervalo_mes(mes, ano)
+    return (
+        select(*MercadoGas.__table__.columns)
+        .where(MercadoGas.DATA >= data_inicio, MercadoGas.DATA < data_fim)
+        .order_by(MercadoGas.DATA.desc(), MercadoGas.ID.desc())
+    )
+
+
+def plano(conexao: Connection, consulta: Select) -> List[str]:
+    compilada = consulta.compile(conexao, compile_kwargs={"literal_binds": True})
+    if conexao.dialect.name == "sqlite":
+        linhas = conexao.execute(text(f"EXPLAIN QUERY PLAN {compilada}"))
+        return [linha[-1] for linha in linhas]
+
+    if conexao.dialect.name == "mssql":
+        conexao.exec_driver_sql("SET SHOWPLAN_TEXT ON")
+        try:
+            resultado = conexao.exec_driver_sql(str(compilada))
+            linhas = [linha[0] for linha in resultado]
+            while resultado.cursor.nextset():
+                linhas.extend(linha[0] for linha in resultado.cursor.fetchall())
+            return linhas
+        finally:
+            conexao.exec_driver_sql("SET SHOWPLAN_TEXT OFF")
+
+    return [f"(plano nao suportado para {conexao.dialect.name})"]
+
+
+def cronometrar(engine: Engine, consulta: Select, repeticoes: int) -> tuple[float, int]:
+    tempos = []
+    total = 0
+    for _ in range(repeticoes):
+        with engine.connect() as conexao:
+            inicio = time.perf_counter()
+            total = len(conexao.execute(consulta).all())
+            tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000, total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=500_000, help="Linhas sinteticas (somente SQLite).")
+    parser.add_argument("--mes", type=int, default=6)
+    parser.add_argument("--ano", type=int, default=2024)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--url", help="URL SQLAlchemy de um banco existente.")
+    args = parser.parse_args()
+
+    caminho = None
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        descritor, caminho = tempfile.mkstemp(suffix=".db")
+        os.close(descritor)
+        print(f"Populando SQLite com {args.linhas} linhas...")
+        engine = popular_sqlite(caminho, args.linhas)
+
+    try:
+        for nome, consulta in (
+            ("extract(month/year)", consulta_legada(args.mes, args.ano)),
+            ("DATA >= x AND DATA < y", consulta_periodo(args.mes, args.ano)),
+        ):
+            with engine.connect() as conexao:
+                linhas_plano = plano(conexao, consulta)
+            mediana, total = cronometrar(engine, consulta, args.repeticoes)
+            print(f"\n== {nome}: {total} linhas, mediana {mediana:.1f} ms")
+            for linha in linhas_plano:
+                print(f"   {linha}")
+    finally:
+        engine.dispose()
+        if caminho:
+            os.remove(caminho)
+
+
+if __name__ == "__main__":
+    main()
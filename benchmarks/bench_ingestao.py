@@ -0,0 +1,265 @@
+"""
+Benchmark do pipeline de ingestao de MERCADO_GAS com baselines em JSON.
+
+Para cada tamanho (padrao 10k, 100k e 1M linhas) gera um TXT e um JSON
+sinteticos no layout real e mede, sobre um SQLite local:
+
+- parse_txt / parse_json: ``parse_mercado_gas_upload``;
+- parse_txt_colunar: o mesmo TXT pelo motor colunar (pandas);
+- parse_txt_paralelo: o mesmo TXT dividido em blocos entre todos os nucleos;
+- validar_payload: validacao das rotas antes de persistir;
+- substituir: marcacao de ATUALIZADO_EM das chaves data/planilha/aba ja
+  existentes (tabela pre-populada com as mesmas linhas; a transacao e desfeita
+  a cada repeticao);
+- criar_em_lote: insercao ORM usada pelo upsert original;
+- inserir_em_lote: insercao em bloco usada pelo upload.
+
+O resultado (mediana e minimo de cada caso) e gravado em JSON. Com
+``--comparar`` (ou o subcomando ``comparar``) os casos sao confrontados com um
+baseline e o processo termina com codigo 1 se algum ficar mais lento que o
+limite.
+
+Uso:
+    python -m benchmarks.bench_ingestao executar --saida benchmarks/resultados/base.json
+    python -m benchmarks.bench_ingestao executar --linhas 10000 --comparar benchmarks/resultados/base.json
+    python -m benchmarks.bench_ingestao comparar base.json atual.json --limite 0.15
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import sqlalchemy
+from sqlalchemy import delete
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.dados_sinteticos import gerar_json, gerar_txt, popular_sqlite
+from bd_pcp.db.models.mercado_gas import MercadoGas
+from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository
+from bd_pcp.routers.gas_rotas import validar_payload
+from bd_pcp.services.gas_txt_parser import MOTOR_COLUNAR, parse_mercado_gas_upload
+
+TAMANHOS_PADRAO = (10_000, 100_000, 1_000_000)
+CASOS = (
+    "parse_txt",
+    "parse_txt_colunar",
+    "parse_txt_paralelo",
+    "parse_json",
+    "validar_payload",
+    "substituir",
+    "criar_em_lote",
+    "inserir_em_lote",
+)
+LIMITE_REGRESSAO_PADRAO = 0.10
+# Acima deste tamanho cada caso roda uma unica vez, salvo --repeticoes explicito.
+LINHAS_REPETICAO_UNICA = 1_000_000
+
+
+def cronometrar(
+    funcao: Callable[[], Any],
+    repeticoes: int,
+    preparar: Optional[Callable[[], None]] = None,
+    finalizar: Optional[Callable[[], None]] = None,
+) -> Dict[str, float]:
+    """Executa ``funcao`` varias vezes; preparar/finalizar ficam fora da medicao."""
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+        if finalizar:
+            finalizar()
+    return {"mediana_s": statistics.median(tempos), "minimo_s": min(tempos), "repeticoes": repeticoes}
+
+
+def medir_tamanho(linhas: int, casos: List[str], repeticoes: int, diretorio: str) -> Dict[str, Dict[str, float]]:
+    resultados: Dict[str, Dict[str, float]] = {}
+
+    def registrar(caso: str, medicao: Dict[str, float]) -> None:
+        medicao["linhas_por_s"] = linhas / medicao["mediana_s"] if medicao["mediana_s"] else 0.0
+        resultados[f"{caso}/{linhas}"] = medicao
+        print(f"  {caso:<18} {medicao['mediana_s'] * 1000:>10.1f} ms  {medicao['linhas_por_s']:>12,.0f} linhas/s")
+
+    conteudo_txt = gerar_txt(linhas)
+    registros = parse_mercado_gas_upload(conteudo_txt)
+
+    if "parse_txt" in casos:
+        registrar("parse_txt", cronometrar(lambda: parse_mercado_gas_upload(conteudo_txt), repeticoes))
+
+    if "parse_txt_colunar" in casos:
+        registrar(
+            "parse_txt_colunar",
+            cronometrar(lambda: parse_mercado_gas_upload(conteudo_txt, MOTOR_COLUNAR), repeticoes),
+        )
+
+    if "parse_txt_paralelo" in casos:
+        processos = os.cpu_count() or 1
+        # Aquece o pool de processos fora da medicao.
+        parse_mercado_gas_upload(conteudo_txt, processos=processos, limite_paralelo=0)
+        registrar(
+            "parse_txt_paralelo",
+            cronometrar(
+                lambda: parse_mercado_gas_upload(conteudo_txt, processos=processos, limite_paralelo=0),
+                repeticoes,
+            ),
+        )
+
+    if "parse_json" in casos:
+        conteudo_json = gerar_json(linhas)
+        registrar("parse_json", cronometrar(lambda: parse_mercado_gas_upload(conteudo_json), repeticoes))
+        del conteudo_json
+
+    if "validar_payload" in casos:
+        registrar("validar_payload", cronometrar(lambda: validar_payload(registros), repeticoes))
+
+    if "substituir" in casos:
+        engine = popular_sqlite(os.path.join(diretorio, f"substituir_{linhas}.db"), linhas)
+        sessao = sessionmaker(bind=engine, autoflush=False)()
+        chaves = [(item.DATA, item.PLANILHA, item.ABA) for item in registros]
+        try:
+            registrar(
+                "substituir",
+                cronometrar(
+                    lambda: MercadoGasRepository(sessao).atualizar_atualizado_em_em_lote(chaves),
+                    repeticoes,
+                    finalizar=sessao.rollback,
+                ),
+            )
+        finally:
+            sessao.close()
+            engine.dispose()
+
+    insercoes = {
+        "criar_em_lote": lambda sessao: MercadoGasRepository(sessao).criar_em_lote(registros),
+        "inserir_em_lote": lambda sessao: MercadoGasRepository(sessao).inserir_em_lote(registros),
+    }
+    for caso, inserir in insercoes.items():
+        if caso not in casos:
+            continue
+        engine = popular_sqlite(os.path.join(diretorio, f"{caso}_{linhas}.db"), 0)
+        sessao = sessionmaker(bind=engine, autoflush=False)()
+
+        def limpar() -> None:
+            sessao.execute(delete(MercadoGas))
+            sessao.commit()
+            sessao.expunge_all()
+
+        try:
+            registrar(caso, cronometrar(lambda: inserir(sessao), repeticoes, preparar=limpar))
+        finally:
+            sessao.close()
+            engine.dispose()
+
+    return resultados
+
+
+def executar(args: argparse.Namespace) -> int:
+    resultados: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_ingestao_") as diretorio:
+        for linhas in args.linhas:
+            repeticoes = args.repeticoes or (1 if linhas >= LINHAS_REPETICAO_UNICA else 3)
+            print(f"\n== {linhas} linhas ({repeticoes} repeticoes)")
+            resultados.update(medir_tamanho(linhas, args.casos, repeticoes, diretorio))
+
+    relatorio = {
+        "ambiente": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "processador": platform.processor() or platform.machine(),
+            "sqlalchemy": sqlalchemy.__version__,
+        },
+        "resultados": resultados,
+    }
+
+    if args.saida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nResultados gravados em {args.saida}")
+
+    if args.comparar:
+        return comparar_relatorios(carregar(args.comparar), relatorio, args.limite)
+    return 0
+
+
+def carregar(caminho: str) -> Dict[str, Any]:
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def comparar_relatorios(base: Dict[str, Any], atual: Dict[str, Any], limite: float) -> int:
+    """Imprime a variacao de cada caso e retorna 1 se houver regressao acima do limite."""
+    if base.get("ambiente", {}).get("plataforma") != atual.get("ambiente", {}).get("plataforma"):
+        print("\nAviso: baseline gerado em outra plataforma; compare com cautela.")
+
+    regressoes = 0
+    print(f"\n{'caso':<28} {'base ms':>10} {'atual ms':>10} {'variacao':>9}")
+    # Somente os casos da execucao atual; um baseline completo serve para rodadas parciais.
+    for chave, corrente in sorted(atual["resultados"].items()):
+        anterior = base["resultados"].get(chave)
+        if anterior is None:
+            print(f"{chave:<28} {'-':>10} {corrente['mediana_s'] * 1000:>10.1f} {'':>9}  novo")
+            continue
+
+        variacao = corrente["mediana_s"] / anterior["mediana_s"] - 1 if anterior["mediana_s"] else 0.0
+        if variacao > limite:
+            situacao = "REGRESSAO"
+            regressoes += 1
+        elif variacao < -limite:
+            situacao = "melhora"
+        else:
+            situacao = "ok"
+        print(
+            f"{chave:<28} {anterior['mediana_s'] * 1000:>10.1f} {corrente['mediana_s'] * 1000:>10.1f} "
+            f"{variacao:>+8.1%}  {situacao}"
+        )
+
+    if regressoes:
+        print(f"\n{regressoes} caso(s) acima do limite de {limite:.0%}.")
+        return 1
+    print(f"\nNenhuma regressao acima de {limite:.0%}.")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    parser_executar = subparsers.add_parser("executar", help="Roda o benchmark e grava/compara o resultado.")
+    parser_executar.add_argument("--linhas", type=int, nargs="+", default=list(TAMANHOS_PADRAO))
+    parser_executar.add_argument("--casos", nargs="+", choices=CASOS, default=list(CASOS))
+    parser_executar.add_argument(
+        "--repeticoes",
+        type=int,
+        help=f"Repeticoes por caso (padrao 3; 1 a partir de {LINHAS_REPETICAO_UNICA} linhas).",
+    )
+    parser_executar.add_argument("--saida", help="Arquivo JSON para gravar os resultados.")
+    parser_executar.add_argument("--comparar", help="Baseline JSON para comparar apos a execucao.")
+    parser_executar.add_argument("--limite", type=float, default=LIMITE_REGRESSAO_PADRAO)
+
+    parser_comparar = subparsers.add_parser("comparar", help="Compara dois arquivos de resultado.")
+    parser_comparar.add_argument("base")
+    parser_comparar.add_argument("atual")
+    parser_comparar.add_argument("--limite", type=float, default=LIMITE_REGRESSAO_PADRAO)
+
+    args = parser.parse_args()
+    if args.comando == "executar":
+        sys.exit(executar(args))
+    sys.exit(comparar_relatorios(carregar(args.base), carregar(args.atual), args.limite))
+
+
+if __name__ == "__main__":
+    main()
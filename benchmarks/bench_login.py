@@ -0,0 +1,117 @@
+"""
+Mede a vazao de POST /api/auth/login sob concorrencia.
+
+Dispara ``--logins`` logins com ``--concorrencia`` requisicoes simultaneas e,
+em paralelo, sonda /api/auth/me para medir quanto o event loop fica travado.
+``--modo loop`` reproduz o comportamento anterior (bcrypt executado no proprio
+event loop); ``--modo pool`` usa o pool dedicado de senhas. Rode os dois para
+comparar.
+
+Uso:
+    python -m benchmarks.bench_login --modo loop
+    python -m benchmarks.bench_login --modo pool
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from bd_pcp.app import app
+from bd_pcp.core.security import get_current_user
+from bd_pcp.core.senhas import pool_senhas
+from bd_pcp.core.session import get_db
+from bd_pcp.db.models.model_base import Base
+from bd_pcp.db.models.usuario import Usuario
+from bd_pcp.schemas.auth_schema import UserCreate
+from bd_pcp.services.user_service import UserService
+
+USUARIO = "bench"
+SENHA = "senha-bench"
+
+
+async def _executar_no_loop(funcao, *args):
+    return funcao(*args)
+
+
+async def medir(logins: int, concorrencia: int) -> None:
+    latencias_me: List[float] = []
+    vagas = asyncio.Semaphore(concorrencia)
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+
+        async def login() -> None:
+            async with vagas:
+                resposta = await cliente.post("/api/auth/login", json={"username": USUARIO, "password": SENHA})
+                resposta.raise_for_status()
+
+        async def sondar(parar: asyncio.Event) -> None:
+            while not parar.is_set():
+                inicio = time.perf_counter()
+                await cliente.get("/api/auth/me")
+                latencias_me.append((time.perf_counter() - inicio) * 1000)
+                await asyncio.sleep(0.01)
+
+        parar = asyncio.Event()
+        sonda = asyncio.create_task(sondar(parar))
+        inicio = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        await sonda
+
+    print(f"{logins} logins em {duracao:.2f} s ({logins / duracao:.1f} logins/s)")
+    latencias_me.sort()
+    print(
+        f"/api/auth/me durante os logins: {len(latencias_me)} respostas, "
+        f"mediana {statistics.median(latencias_me):.1f} ms, max {latencias_me[-1]:.1f} ms"
+    )
+    print(f"Pool de senhas: {pool_senhas.estatisticas()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modo", choices=("loop", "pool"), default="pool")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concorrencia", type=int, default=16)
+    args = parser.parse_args()
+
+    descritor, caminho = tempfile.mkstemp(suffix=".db")
+    os.close(descritor)
+    engine = create_engine(f"sqlite:///{caminho}")
+    Base.metadata.create_all(engine, tables=[Usuario.__table__])
+    Sessao = sessionmaker(bind=engine, autoflush=False)
+    with Sessao() as db:
+        UserService.create_user(db, UserCreate(username=USUARIO, password=SENHA))
+
+    def obter_db_sqlite():
+        db = Sessao()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = obter_db_sqlite
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": "bench"}
+    if args.modo == "loop":
+        pool_senhas.executar = _executar_no_loop
+
+    try:
+        asyncio.run(medir(args.logins, args.concorrencia))
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+        os.remove(caminho)
+
+
+if __name__ == "__main__":
+    main()
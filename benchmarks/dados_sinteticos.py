@@ -0,0 +1,114 @@
+"""
+Geradores de dados sinteticos de MERCADO_GAS para benchmarks.
+
+Os valores imitam o formato real das planilhas (varias abas por planilha,
+varios produtos/locais por dia) e sao deterministicos para uma mesma semente.
+"""
+from __future__ import annotations
+
+import json
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+
+from bd_pcp.db.models.mercado_gas import MercadoGas
+from bd_pcp.db.models.model_base import Base
+
+PLANILHAS = (
+    "ATI GUAMARÉ - HISTÓRICO MOVIMENTAÇÃO E ESTOQUE.xlsx",
+    "UPGN - BALANÇO DIÁRIO.xlsx",
+    "TERMINAL - RECEBIMENTOS.xlsx",
+)
+ABAS = ("HISTÓRICO CONSOLIDAÇÃO - GLP", "HISTÓRICO CONSOLIDAÇÃO - GN", "ESTOQUE", "MOVIMENTAÇÃO")
+PRODUTOS = ("GLP", "GN", "C5+", "GASOLINA NATURAL", "PROPANO", "BUTANO")
+LOCAIS = ("3R Petroleum-EF-470.006", "Potiguar E&P - EF-470.004", "Guamaré", None)
+EMPRESAS = ("Potiguar E&P - EF-470.004", "3R Petroleum", "Brava Energia", None)
+UNIDADES = ("ton", "m3", "mil m3/d")
+DATA_INICIAL = date(2023, 1, 1)
+LINHAS_POR_DIA = 120
+
+
+def gerar_registros(
+    total: int,
+    data_inicial: date = DATA_INICIAL,
+    linhas_por_dia: int = LINHAS_POR_DIA,
+    semente: int = 42,
+) -> Iterator[Dict[str, Any]]:
+    """Gera ``total`` registros como dicts com as colunas de MercadoGasCriacao."""
+    aleatorio = random.Random(semente)
+    for indice in range(total):
+        yield {
+            "DATA": data_inicial + timedelta(days=indice // linhas_por_dia),
+            "PLANILHA": PLANILHAS[indice % len(PLANILHAS)],
+            "ABA": ABAS[(indice // len(PLANILHAS)) % len(ABAS)],
+            "PRODUTO": aleatorio.choice(PRODUTOS),
+            "LOCAL": aleatorio.choice(LOCAIS),
+            "EMPRESA": aleatorio.choice(EMPRESAS),
+            "UNIDADE": aleatorio.choice(UNIDADES),
+            "VALOR": round(aleatorio.uniform(0, 100000), 3),
+        }
+
+
+COLUNAS_TXT = ("DATA", "PLANILHA", "ABA", "PRODUTO", "LOCAL", "EMPRESA", "UNIDADE", "VALOR")
+
+
+def gerar_txt(total: int, delimitador: str = ";", semente: int = 42) -> bytes:
+    """Gera um upload TXT no layout real, com datas dd/mm/aaaa e decimal com virgula."""
+    linhas = [delimitador.join(COLUNAS_TXT)]
+    for registro in gerar_registros(total, semente=semente):
+        linhas.append(
+            delimitador.join(
+                (
+                    registro["DATA"].strftime("%d/%m/%Y"),
+                    registro["PLANILHA"],
+                    registro["ABA"],
+                    registro["PRODUTO"],
+                    registro["LOCAL"] or "",
+                    registro["EMPRESA"] or "",
+                    registro["UNIDADE"],
+                    f"{registro['VALOR']:.3f}".replace(".", ","),
+                )
+            )
+        )
+    return ("\n".join(linhas) + "\n").encode("utf-8")
+
+
+def gerar_json(total: int, semente: int = 42) -> bytes:
+    """Gera um upload JSON (lista de objetos) com datas ISO e VALOR numerico."""
+    registros = [
+        {**registro, "DATA": registro["DATA"].isoformat()}
+        for registro in gerar_registros(total, semente=semente)
+    ]
+    return json.dumps(registros, ensure_ascii=False).encode("utf-8")
+
+
+def popular_sqlite(
+    caminho: str,
+    total: int,
+    tamanho_bloco: int = 20000,
+    registros: Optional[Iterator[Dict[str, Any]]] = None,
+) -> Engine:
+    """Recria o schema em um SQLite local (modo WAL) e insere ``total`` registros sinteticos."""
+    engine = create_engine(f"sqlite:///{caminho}")
+    with engine.connect() as conexao:
+        # WAL permite leituras concorrentes com a escrita, como no SQL Server.
+        conexao.exec_driver_sql("PRAGMA journal_mode=WAL")
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    origem = registros if registros is not None else gerar_registros(total)
+    comando = insert(MercadoGas.__table__)
+    with engine.begin() as conexao:
+        bloco = []
+        for registro in origem:
+            bloco.append(registro)
+            if len(bloco) >= tamanho_bloco:
+                conexao.execute(comando, bloco)
+                bloco = []
+        if bloco:
+            conexao.execute(comando, bloco)
+
+    return engine
@@ -0,0 +1,67 @@
+import os
+
+# Settings exige as credenciais na importacao de bd_pcp.core.config; os testes
+# usam um SQLite temporario e nao abrem conexao com o SQL Server.
+for _nome, _valor in {
+    "SECRET_KEY": "chave-de-teste-com-pelo-menos-32-caracteres",
+    "DB_HOST": "localhost",
+    "DB_NAME": "pcp_teste",
+    "DB_USER": "teste",
+    "DB_PASSWORD": "teste",
+}.items():
+    os.environ.setdefault(_nome, _valor)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from bd_pcp.app import app  # noqa: E402
+from bd_pcp.core.cache_leitura import cache_leitura  # noqa: E402
+from bd_pcp.core.security import get_current_user  # noqa: E402
+from bd_pcp.core.session import get_db  # noqa: E402
+from bd_pcp.db.models.model_base import Base  # noqa: E402
+from bd_pcp.routers import gas_rotas  # noqa: E402
+from bd_pcp.services.gas_artefatos_excel import artefatos_excel  # noqa: E402
+from bd_pcp.services.importacao_jobs import fila_importacoes  # noqa: E402
+
+
+@pytest.fixture
+def fabrica_sessao(tmp_path, monkeypatch):
+    """Sessoes sobre um SQLite novo, usadas tambem pelas threads da fila e dos artefatos."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'pcp.db'}")
+    Base.metadata.create_all(engine)
+    fabrica = sessionmaker(bind=engine, autoflush=False)
+    monkeypatch.setattr(gas_rotas, "SessionLocal", fabrica)
+    monkeypatch.setattr(fila_importacoes, "fabrica_sessao", fabrica)
+    monkeypatch.setattr(fila_importacoes, "diretorio", str(tmp_path / "importacoes"))
+    monkeypatch.setattr(artefatos_excel, "fabrica_sessao", fabrica)
+    monkeypatch.setattr(artefatos_excel, "diretorio", str(tmp_path / "excel"))
+    # O cache e do processo: entradas de outro teste teriam a mesma chave e versao.
+    cache_leitura.limpar()
+    yield fabrica
+    fila_importacoes.encerrar()
+    artefatos_excel.encerrar()
+    engine.dispose()
+
+
+@pytest.fixture
+def aplicacao(fabrica_sessao):
+    """A aplicacao com get_db no SQLite do teste e um usuario autenticado."""
+    def obter_db():
+        db = fabrica_sessao()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = obter_db
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": "1"}
+    yield app
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def cliente(aplicacao):
+    # Sem o bloco "with": o ciclo de vida (retomada da fila) nao roda nos testes.
+    return TestClient(aplicacao)
@@ -0,0 +1,113 @@
+"""Arquivamento das versoes substituidas de MERCADO_GAS em MERCADO_GAS_HISTORICO."""
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from bd_pcp.db.models.mercado_gas import MercadoGas, MercadoGasHistorico
+from bd_pcp.db.repositories import gas_repositorios
+from bd_pcp.db.repositories.gas_repositorios import (
+    FUSO_FORTALEZA,
+    MercadoGasHistoricoRepository,
+    MercadoGasRepository,
+)
+from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
+from bd_pcp.scripts import arquivar_historico as script
+
+AGORA = datetime.now(FUSO_FORTALEZA).replace(tzinfo=None)
+CORTE = AGORA - timedelta(days=30)
+
+
+@pytest.fixture
+def ids(fabrica_sessao):
+    """IDs de 5 linhas substituidas ha 60 dias, 1 substituida ontem e 2 atuais."""
+    with fabrica_sessao() as db:
+        repositorio = MercadoGasRepository(db)
+        criados = repositorio.inserir_em_lote(
+            [
+                MercadoGasCriacao(
+                    DATA=date(2024, 1, dia), PLANILHA="plan.xlsx", ABA="GLP", PRODUTO="GLP", UNIDADE="ton", VALOR=dia,
+                )
+                for dia in range(1, 9)
+            ],
+            retornar_ids=True,
+        )
+        antigos, recente, atuais = criados[:5], criados[5], criados[6:]
+        for ids_, quando in ((antigos, AGORA - timedelta(days=60)), ([recente], AGORA - timedelta(days=1))):
+            db.execute(update(MercadoGas).where(MercadoGas.ID.in_(ids_)).values(ATUALIZADO_EM=quando))
+        db.commit()
+    return {"antigos": antigos, "recente": recente, "atuais": atuais}
+
+
+@pytest.fixture
+def sessao_do_script(fabrica_sessao, monkeypatch):
+    monkeypatch.setattr(script, "SessionLocal", fabrica_sessao)
+
+
+def _ids(fabrica_sessao, modelo):
+    with fabrica_sessao() as db:
+        return sorted(db.scalars(select(modelo.ID)))
+
+
+def test_lotes_movem_cada_linha_uma_vez(fabrica_sessao, ids):
+    lotes = []
+    apos_id = 0
+    with fabrica_sessao() as db:
+        repositorio = MercadoGasHistoricoRepository(db)
+        while True:
+            movidas, ultimo_id = repositorio.arquivar_lote(CORTE, apos_id, tamanho_lote=2)
+            if ultimo_id is None:
+                break
+            lotes.append(movidas)
+            apos_id = ultimo_id
+
+    assert lotes == [2, 2, 1]
+    assert apos_id == ids["antigos"][-1]
+    assert _ids(fabrica_sessao, MercadoGasHistorico) == ids["antigos"]
+    assert _ids(fabrica_sessao, MercadoGas) == sorted([ids["recente"], *ids["atuais"]])
+
+
+def test_falha_no_lote_nao_move_nada_e_a_nova_execucao_continua(fabrica_sessao, ids, sessao_do_script, monkeypatch):
+    def falhar(db, datas):
+        raise RuntimeError("conexao perdida")
+
+    registrar_alteracao = gas_repositorios.registrar_alteracao
+    monkeypatch.setattr(gas_repositorios, "registrar_alteracao", falhar)
+    with fabrica_sessao() as db:
+        with pytest.raises(RuntimeError):
+            MercadoGasHistoricoRepository(db).arquivar_lote(CORTE, tamanho_lote=2)
+    assert _ids(fabrica_sessao, MercadoGasHistorico) == []
+
+    monkeypatch.setattr(gas_repositorios, "registrar_alteracao", registrar_alteracao)
+    assert script.arquivar_historico(dias=30, tamanho_lote=2) == 5
+
+    assert _ids(fabrica_sessao, MercadoGasHistorico) == ids["antigos"]
+    assert len(_ids(fabrica_sessao, MercadoGas)) == 3
+
+
+def test_script_retoma_apos_o_ultimo_id(fabrica_sessao, ids, sessao_do_script, capsys):
+    assert script.arquivar_historico(dias=30, tamanho_lote=2, max_lotes=1) == 2
+    ultimo_id = ids["antigos"][1]
+    assert f"Ultimo ID: {ultimo_id}" in capsys.readouterr().out
+
+    script.main(["--dias", "30", "--tamanho-lote", "2", "--apos-id", str(ultimo_id)])
+
+    assert _ids(fabrica_sessao, MercadoGasHistorico) == ids["antigos"]
+    assert script.arquivar_historico(dias=30) == 0
+
+
+def test_listar_com_historico_inclui_as_linhas_arquivadas(fabrica_sessao, ids, sessao_do_script, cliente):
+    with fabrica_sessao() as db:
+        antes = [linha.ID for linha in MercadoGasRepository(db).listar(incluir_historico=True)]
+    script.arquivar_historico(dias=30)
+
+    with fabrica_sessao() as db:
+        repositorio = MercadoGasRepository(db)
+        com_historico = repositorio.listar(incluir_historico=True)
+        sem_historico = repositorio.listar()
+
+    assert [linha.ID for linha in com_historico] == antes
+    assert sorted(linha.ID for linha in sem_historico) == sorted([ids["recente"], *ids["atuais"]])
+    resposta = cliente.get("/api/gas/", params={"incluir_historico": True})
+    assert [item["ID"] for item in resposta.json()] == antes
+    assert all(item["ATUALIZADO_EM"] for item in resposta.json() if item["ID"] in ids["antigos"])
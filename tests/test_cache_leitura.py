@@ -0,0 +1,228 @@
+"""Cache de leitura de MercadoGas: versoes por mes invalidadas no commit das gravacoes."""
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, event, insert
+
+from bd_pcp.core import cache_leitura as modulo_cache
+from bd_pcp.core.cache_leitura import CacheLeitura
+from bd_pcp.db.models.mercado_gas import MercadoGas
+from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository
+from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
+
+JANEIRO = {"data_inicio": "2024-01-01", "data_fim": "2024-01-31"}
+
+
+def _registro(data, valor, aba="GLP"):
+    return {"DATA": data, "PLANILHA": "plan.xlsx", "ABA": aba, "PRODUTO": "GLP", "UNIDADE": "ton", "VALOR": valor}
+
+
+def _listar(cliente, rota="/api/gas/", **params):
+    resposta = cliente.get(rota, params={**JANEIRO, **params})
+    assert resposta.status_code == 200, resposta.text
+    return resposta.headers["x-cache"], resposta.json()
+
+
+@pytest.mark.parametrize("rota", ["/api/gas/", "/api/gas/atuais"])
+def test_gravacao_no_mes_invalida_a_listagem(cliente, rota):
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", 1.0)])
+    assert _listar(cliente, rota)[0] == "MISS"
+    assert _listar(cliente, rota)[0] == "HIT"
+
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", 2.0)])
+    estado, registros = _listar(cliente, rota)
+
+    assert estado == "MISS"
+    assert 2.0 in [registro["VALOR"] for registro in registros]
+
+
+def test_gravacao_em_outro_mes_mantem_o_cache(cliente):
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", 1.0)])
+    _listar(cliente)
+
+    cliente.post("/api/gas/upsert", json=[_registro("2024-02-10", 1.0)])
+
+    assert _listar(cliente)[0] == "HIT"
+
+
+def test_parametros_diferentes_nao_compartilham_entrada(cliente):
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", 1.0)])
+    _listar(cliente)
+
+    assert _listar(cliente, limite=1)[0] == "MISS"
+    assert _listar(cliente, apenas_sem_atualizacao=True)[0] == "MISS"
+
+
+def test_importacao_com_erro_nao_invalida(cliente):
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", 1.0)])
+    _listar(cliente)
+    conteudo = (
+        "DATA;PLANILHA;ABA;PRODUTO;LOCAL;EMPRESA;UNIDADE;VALOR\n"
+        "2024-01-11;plan.xlsx;GLP;GLP;;;ton;1\n"
+        "2024-01-12;plan.xlsx;GLP;GLP;;;ton;abc\n"
+    ).encode()
+
+    resposta = cliente.post("/api/gas/upload-txt", files={"arquivo": ("dados.txt", conteudo, "text/plain")})
+
+    assert resposta.status_code == 400
+    assert _listar(cliente)[0] == "HIT"
+
+
+def test_commit_fora_das_rotas_invalida(cliente, fabrica_sessao):
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", 1.0)])
+    _listar(cliente)
+
+    with fabrica_sessao() as db:
+        MercadoGasRepository(db).inserir_em_lote([MercadoGasCriacao(**_registro("2024-01-20", 3.0, aba="GN"))])
+
+    estado, registros = _listar(cliente)
+    assert estado == "MISS"
+    assert len(registros) == 2
+
+
+@pytest.fixture
+def cache_isolado(monkeypatch):
+    """Cache novo no lugar do global, que os eventos de commit e rollback da sessao usam."""
+    cache = CacheLeitura(1024)
+    monkeypatch.setattr(modulo_cache, "cache_leitura", cache)
+    return cache
+
+
+def test_rollback_descarta_os_meses_alterados(fabrica_sessao, cache_isolado):
+    chave = cache_isolado.chave("listar", date(2024, 1, 1), date(2024, 2, 1))
+
+    registros = [MercadoGasCriacao(**_registro("2024-01-15", 1.0))]
+
+    with fabrica_sessao() as db:
+        MercadoGasRepository(db).inserir_em_lote(registros, confirmar=False)
+        db.rollback()
+        db.commit()
+    assert cache_isolado.chave("listar", date(2024, 1, 1), date(2024, 2, 1)) == chave
+
+    with fabrica_sessao() as db:
+        MercadoGasRepository(db).inserir_em_lote(registros, confirmar=False)
+        db.commit()
+    assert cache_isolado.chave("listar", date(2024, 1, 1), date(2024, 2, 1)) != chave
+
+
+def test_versao_muda_apenas_para_os_meses_alterados():
+    cache = CacheLeitura(1024)
+    janeiro = cache.chave("listar", date(2024, 1, 1), date(2024, 2, 1))
+    fevereiro = cache.chave("listar", date(2024, 2, 1), date(2024, 3, 1))
+    sem_periodo = cache.chave("listar")
+
+    cache.invalidar_meses([(2024, 1)])
+
+    assert cache.chave("listar", date(2024, 1, 1), date(2024, 2, 1)) != janeiro
+    assert cache.chave("listar", date(2024, 2, 1), date(2024, 3, 1)) == fevereiro
+    assert cache.chave("listar") != sem_periodo
+
+
+def test_lru_limitado_em_bytes():
+    cache = CacheLeitura(400)
+    cache.guardar("a", b"a" * 100)
+    cache.guardar("b", b"b" * 100)
+    cache.guardar("c", b"c" * 100)
+    cache.obter("a")
+
+    cache.guardar("d", b"d" * 100)
+    cache.guardar("e", b"e" * 100)
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") is not None
+    assert cache.estatisticas()["bytes"] <= 400
+
+
+def test_item_maior_que_um_quarto_da_capacidade_nao_e_guardado():
+    cache = CacheLeitura(400)
+
+    cache.guardar("grande", b"x" * 101)
+
+    assert cache.obter("grande") is None
+
+
+def test_observadores_recebem_os_meses_apos_o_commit(fabrica_sessao, cache_isolado):
+    recebidos = []
+    cache_isolado.ao_invalidar(recebidos.append)
+
+    with fabrica_sessao() as db:
+        MercadoGasRepository(db).inserir_em_lote([MercadoGasCriacao(**_registro("2024-03-05", 1.0))], confirmar=False)
+        assert recebidos == []
+        db.commit()
+
+    assert recebidos == [{(2024, 3)}]
+
+
+
+def _gravar_por_outro_processo(db, data, valor):
+    """Insercao sem ``registrar_alteracao``, como a de outro worker ou script."""
+    db.execute(insert(MercadoGas).values({**_registro(data, valor, aba="GN"), "DATA": date.fromisoformat(data)}))
+    db.commit()
+
+
+@pytest.mark.parametrize("periodo", [JANEIRO, {}], ids=["periodo", "sem-periodo"])
+def test_gravacao_de_outro_processo_aparece_apos_o_intervalo(cliente, fabrica_sessao, monkeypatch, periodo):
+    def listar():
+        resposta = cliente.get("/api/gas/", params=periodo)
+        return resposta.headers["x-cache"], resposta.json()
+
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", 1.0)])
+    assert listar()[0] == "MISS"
+
+    with fabrica_sessao() as db:
+        _gravar_por_outro_processo(db, "2024-01-20", 3.0)
+    estado, registros = listar()
+    assert estado == "HIT" and len(registros) == 1
+
+    monkeypatch.setattr(modulo_cache.cache_leitura, "intervalo_verificacao", 0)
+    estado, registros = listar()
+    assert estado == "MISS" and len(registros) == 2
+    assert modulo_cache.cache_leitura.estatisticas()["alteracoes_externas"] == 1
+
+
+def test_acerto_dentro_do_intervalo_nao_consulta_o_banco(cliente, fabrica_sessao):
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", 1.0)])
+    _listar(cliente)
+    comandos = []
+    with fabrica_sessao() as db:
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: comandos.append(args[2]))
+
+    assert _listar(cliente)[0] == "HIT"
+    assert comandos == []
+
+
+def test_arquivamento_por_outro_processo_invalida_apenas_o_mes(fabrica_sessao):
+    cache = CacheLeitura(1024)
+    janeiro, fevereiro = (date(2024, 1, 1), date(2024, 2, 1)), (date(2024, 2, 1), date(2024, 3, 1))
+    with fabrica_sessao() as db:
+        MercadoGasRepository(db).inserir_em_lote(
+            [MercadoGasCriacao(**_registro(data, 1.0)) for data in ("2024-01-10", "2024-02-10")]
+        )
+        consultar = MercadoGasRepository(db).assinaturas_por_mes
+        for periodo in (janeiro, fevereiro):
+            cache.sincronizar(*periodo, consultar)
+        chaves = [cache.chave("listar", *periodo) for periodo in (janeiro, fevereiro)]
+
+        db.execute(delete(MercadoGas).where(MercadoGas.DATA < date(2024, 2, 1)))
+        db.commit()
+        for periodo in (janeiro, fevereiro):
+            cache.sincronizar(*periodo, consultar)
+
+    assert cache.chave("listar", *janeiro) != chaves[0]
+    assert cache.chave("listar", *fevereiro) == chaves[1]
+
+
+def test_mes_novo_de_outro_processo_invalida_as_consultas_sem_periodo(fabrica_sessao):
+    cache = CacheLeitura(1024, intervalo_verificacao=60)
+    with fabrica_sessao() as db:
+        consultar = MercadoGasRepository(db).assinaturas_por_mes
+        _gravar_por_outro_processo(db, "2024-03-05", 1.0)
+        cache.sincronizar(None, None, consultar)
+        sem_periodo = cache.chave("listar")
+        assert not cache.verificacao_pendente(None, None)
+        assert cache.verificacao_pendente(date(2024, 4, 1), date(2024, 5, 1))
+
+        _gravar_por_outro_processo(db, "2024-04-05", 1.0)
+        cache.sincronizar(None, None, consultar)
+
+    assert cache.chave("listar") != sem_periodo
@@ -0,0 +1,94 @@
+"""Cache de claims de tokens JWT verificados (CacheTokens)."""
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from bd_pcp.core import security
+from bd_pcp.core.security import CacheTokens, SecurityManager
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """Relogio controlado do modulo security (o ``exp`` do cache e comparado com time.time)."""
+    agora = SimpleNamespace(valor=1_000_000.0)
+    monkeypatch.setattr(security, "time", SimpleNamespace(time=lambda: agora.valor))
+    return agora
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = CacheTokens(2)
+    monkeypatch.setattr(security, "cache_tokens", cache)
+    return cache
+
+
+def test_falha_e_depois_acerto(relogio):
+    cache = CacheTokens(8)
+
+    assert cache.obter("token") is None
+    cache.guardar("token", {"sub": "1", "exp": relogio.valor + 60})
+    claims = cache.obter("token")
+    claims["sub"] = "alterado"
+
+    assert cache.obter("token") == {"sub": "1", "exp": relogio.valor + 60}
+    assert cache.estatisticas()["acertos"] == 2
+    assert cache.estatisticas()["falhas"] == 1
+
+
+def test_entrada_expira_no_exp_do_token(relogio):
+    cache = CacheTokens(8)
+    cache.guardar("token", {"sub": "1", "exp": relogio.valor + 60})
+
+    relogio.valor += 59.9
+    assert cache.obter("token") is not None
+
+    relogio.valor += 0.1
+    assert cache.obter("token") is None
+    assert cache.estatisticas()["itens"] == 0
+
+
+def test_token_sem_exp_nao_e_guardado():
+    cache = CacheTokens(8)
+
+    cache.guardar("token", {"sub": "1"})
+
+    assert cache.obter("token") is None
+    assert cache.estatisticas()["itens"] == 0
+
+
+def test_lru_descarta_o_menos_usado(relogio):
+    cache = CacheTokens(2)
+    for token in ("a", "b"):
+        cache.guardar(token, {"sub": token, "exp": relogio.valor + 60})
+    cache.obter("a")
+
+    cache.guardar("c", {"sub": "c", "exp": relogio.valor + 60})
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") is not None and cache.obter("c") is not None
+
+
+def test_verify_token_decodifica_uma_vez(cache, monkeypatch):
+    token = SecurityManager.create_access_token({"sub": "1"}, timedelta(minutes=5))
+    decodificacoes = []
+    decode = security.jwt.decode
+    monkeypatch.setattr(security.jwt, "decode", lambda *args, **kwargs: decodificacoes.append(1) or decode(*args, **kwargs))
+
+    primeira = SecurityManager.verify_token(token)
+    segunda = SecurityManager.verify_token(token)
+
+    assert primeira == segunda and primeira["sub"] == "1"
+    assert len(decodificacoes) == 1
+    assert cache.estatisticas()["acertos"] == 1
+
+
+def test_token_expirado_volta_a_ser_verificado(cache):
+    token = SecurityManager.create_access_token({"sub": "1"}, timedelta(seconds=-1))
+
+    with pytest.raises(HTTPException) as erro:
+        SecurityManager.verify_token(token)
+
+    assert erro.value.status_code == 401
+    assert cache.estatisticas()["itens"] == 0
@@ -0,0 +1,159 @@
+"""Agregacoes do retrato atual de MercadoGas (agregar e GET /api/gas/agregado)."""
+from datetime import date
+
+import pytest
+
+from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository
+
+
+def _registro(data, planilha, aba, valor):
+    return {"DATA": data, "PLANILHA": planilha, "ABA": aba, "PRODUTO": "GLP", "UNIDADE": "ton", "VALOR": valor}
+
+
+@pytest.fixture
+def dados(cliente):
+    """Cinco linhas atuais (soma 25); (10/01, a.xlsx, GLP) tem duas versoes substituidas."""
+    for valor in (100.0, 200.0):
+        cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", "a.xlsx", "GLP", valor)])
+    cliente.post("/api/gas/upsert", json=[
+        _registro("2024-01-10", "a.xlsx", "GLP", 3.0),
+        _registro("2024-01-10", "b.xlsx", "GLP", 4.0),
+        _registro("2024-01-11", "a.xlsx", "GN", 5.0),
+        _registro("2024-02-05", "a.xlsx", "GLP", 6.0),
+        _registro("2025-03-01", "b.xlsx", "GN", 7.0),
+    ])
+
+
+SOMAS_POR_GRANULARIDADE = {
+    "dia": [(date(2024, 1, 10), 7.0), (date(2024, 1, 11), 5.0), (date(2024, 2, 5), 6.0), (date(2025, 3, 1), 7.0)],
+    "mes": [(date(2024, 1, 1), 12.0), (date(2024, 2, 1), 6.0), (date(2025, 3, 1), 7.0)],
+    "ano": [(date(2024, 1, 1), 18.0), (date(2025, 1, 1), 7.0)],
+}
+
+
+def _agregar(fabrica_sessao, **parametros):
+    with fabrica_sessao() as db:
+        return MercadoGasRepository(db).agregar(**parametros)
+
+
+@pytest.mark.parametrize("granularidade", sorted(SOMAS_POR_GRANULARIDADE))
+def test_granularidade_agrupa_pelo_primeiro_dia_do_periodo(fabrica_sessao, dados, granularidade):
+    resultado = _agregar(fabrica_sessao, granularidade=granularidade)
+
+    assert [(linha["PERIODO"], linha["SOMA"]) for linha in resultado] == SOMAS_POR_GRANULARIDADE[granularidade]
+    assert all(set(linha) == {"PERIODO", "SOMA"} for linha in resultado)
+
+
+def test_sem_granularidade_nem_dimensoes_forma_um_grupo_com_todas_as_funcoes(fabrica_sessao, dados):
+    resultado = _agregar(fabrica_sessao, funcoes=["soma", "media", "minimo", "maximo", "contagem"])
+
+    assert resultado == [{"SOMA": 25.0, "MEDIA": 5.0, "MINIMO": 3.0, "MAXIMO": 7.0, "CONTAGEM": 5}]
+
+
+@pytest.mark.parametrize(
+    ("parametros", "esperado"),
+    [
+        ({"agrupar": ["ABA"]}, [("GLP", 13.0), ("GN", 12.0)]),
+        ({"agrupar": ["PLANILHA"], "aba": "GLP"}, [("a.xlsx", 9.0), ("b.xlsx", 4.0)]),
+        ({"agrupar": ["PRODUTO"], "planilha": "b.xlsx"}, [("GLP", 11.0)]),
+    ],
+)
+def test_dimensoes_e_filtros(fabrica_sessao, dados, parametros, esperado):
+    resultado = _agregar(fabrica_sessao, **parametros)
+
+    dimensao = parametros["agrupar"][0]
+    assert [(linha[dimensao], linha["SOMA"]) for linha in resultado] == esperado
+
+
+def test_dimensao_com_granularidade_ordena_pelo_periodo(fabrica_sessao, dados):
+    resultado = _agregar(fabrica_sessao, agrupar=["PLANILHA"], granularidade="mes", funcoes=["contagem"])
+
+    assert [(linha["PERIODO"], linha["PLANILHA"], linha["CONTAGEM"]) for linha in resultado] == [
+        (date(2024, 1, 1), "a.xlsx", 2),
+        (date(2024, 1, 1), "b.xlsx", 1),
+        (date(2024, 2, 1), "a.xlsx", 1),
+        (date(2025, 3, 1), "b.xlsx", 1),
+    ]
+
+
+def test_periodo_semiaberto(fabrica_sessao, dados):
+    resultado = _agregar(fabrica_sessao, data_inicio=date(2024, 1, 11), data_fim=date(2024, 2, 5))
+
+    assert resultado == [{"SOMA": 5.0}]
+
+
+@pytest.mark.parametrize("granularidade", [None, "dia", "mes", "ano"])
+def test_periodo_vazio(fabrica_sessao, dados, granularidade):
+    resultado = _agregar(
+        fabrica_sessao,
+        granularidade=granularidade,
+        funcoes=["soma", "contagem"],
+        data_inicio=date(2023, 1, 1),
+        data_fim=date(2024, 1, 1),
+    )
+
+    # Sem GROUP BY o banco devolve um grupo unico, mesmo sem linhas.
+    assert resultado == ([{"SOMA": None, "CONTAGEM": 0}] if granularidade is None else [])
+
+
+def _agregado(cliente, **params):
+    resposta = cliente.get("/api/gas/agregado", params=params)
+    assert resposta.status_code == 200, resposta.text
+    return resposta
+
+
+@pytest.mark.parametrize("granularidade", sorted(SOMAS_POR_GRANULARIDADE))
+def test_rota_por_granularidade(cliente, dados, granularidade):
+    itens = _agregado(cliente, granularidade=granularidade).json()
+
+    assert [(item["PERIODO"], item["SOMA"]) for item in itens] == [
+        (periodo.isoformat(), soma) for periodo, soma in SOMAS_POR_GRANULARIDADE[granularidade]
+    ]
+
+
+def test_rota_com_dimensoes_funcoes_e_periodo_inclusivo(cliente, dados):
+    itens = _agregado(
+        cliente,
+        agrupar=["ABA", "PLANILHA"],
+        funcoes=["maximo", "contagem"],
+        data_inicio="2024-01-10",
+        data_fim="2024-01-11",
+    ).json()
+
+    assert itens == [
+        {"ABA": "GLP", "PLANILHA": "a.xlsx", "MAXIMO": 3.0, "CONTAGEM": 1},
+        {"ABA": "GLP", "PLANILHA": "b.xlsx", "MAXIMO": 4.0, "CONTAGEM": 1},
+        {"ABA": "GN", "PLANILHA": "a.xlsx", "MAXIMO": 5.0, "CONTAGEM": 1},
+    ]
+
+
+@pytest.mark.parametrize(
+    ("granularidade", "esperado"),
+    [(None, [{"SOMA": None}]), ("dia", []), ("mes", []), ("ano", [])],
+)
+def test_rota_periodo_vazio(cliente, dados, granularidade, esperado):
+    params = {"data_inicio": "2023-01-01", "data_fim": "2023-12-31"}
+    if granularidade:
+        params["granularidade"] = granularidade
+
+    assert _agregado(cliente, **params).json() == esperado
+
+
+def test_rota_usa_o_cache_ate_a_proxima_gravacao(cliente, dados):
+    params = {"granularidade": "mes", "data_inicio": "2024-01-01", "data_fim": "2024-01-31"}
+    assert _agregado(cliente, **params).headers["x-cache"] == "MISS"
+    assert _agregado(cliente, **params).headers["x-cache"] == "HIT"
+
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-20", "c.xlsx", "GLP", 10.0)])
+    resposta = _agregado(cliente, **params)
+
+    assert resposta.headers["x-cache"] == "MISS"
+    assert resposta.json() == [{"PERIODO": "2024-01-01", "SOMA": 22.0}]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"granularidade": "semana"}, {"agrupar": "VALOR"}, {"funcoes": "mediana"}],
+)
+def test_rota_parametros_invalidos(cliente, params):
+    assert cliente.get("/api/gas/agregado", params=params).status_code == 422
@@ -0,0 +1,156 @@
+"""Exportacoes Excel mensais servidas do diretorio de artefatos."""
+import os
+import time
+
+import pytest
+
+from bd_pcp.services.gas_artefatos_excel import (
+    EXTENSAO_ARTEFATO,
+    IDADE_MAXIMA_TEMPORARIO,
+    PREFIXO_TEMPORARIO,
+    ArtefatosExcel,
+    artefatos_excel,
+)
+
+JANEIRO = {"mes": 1, "ano": 2024}
+
+
+def _registro(data, valor):
+    return {"DATA": data, "PLANILHA": "plan.xlsx", "ABA": "GLP", "PRODUTO": "GLP", "UNIDADE": "ton", "VALOR": valor}
+
+
+def _arquivos():
+    return sorted(os.listdir(artefatos_excel.diretorio))
+
+
+def _baixar(cliente):
+    resposta = cliente.get("/api/gas/exportar-excel", params=JANEIRO)
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.content.startswith(b"PK")
+    assert int(resposta.headers["content-length"]) == len(resposta.content)
+    return resposta
+
+
+@pytest.fixture
+def janeiro(cliente):
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", 1.0), _registro("2024-01-11", 2.0)])
+
+
+def test_mes_e_gerado_uma_vez_e_reutilizado(cliente, janeiro):
+    primeira = _baixar(cliente)
+    segunda = _baixar(cliente)
+
+    assert primeira.headers["x-cache"] == "MISS"
+    assert segunda.headers["x-cache"] == "HIT"
+    assert segunda.content == primeira.content
+    assert len(_arquivos()) == 1
+
+
+def test_gravacao_no_mes_gera_nova_versao_e_remove_a_anterior(cliente, janeiro):
+    _baixar(cliente)
+    anteriores = _arquivos()
+
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-12", 3.0)])
+    resposta = _baixar(cliente)
+
+    assert resposta.headers["x-cache"] == "MISS"
+    assert len(_arquivos()) == 1
+    assert _arquivos() != anteriores
+
+
+def test_mes_sem_registros_retorna_404(cliente):
+    resposta = cliente.get("/api/gas/exportar-excel", params={"mes": 5, "ano": 2024})
+
+    assert resposta.status_code == 404
+    assert not os.path.isdir(artefatos_excel.diretorio) or _arquivos() == []
+
+
+@pytest.mark.skipif(os.name == "nt", reason="No Windows um arquivo aberto nao pode ser removido.")
+@pytest.mark.parametrize("ja_gerado", [False, True], ids=["gerado-na-requisicao", "existente"])
+def test_arquivo_removido_antes_do_envio_continua_sendo_enviado(cliente, janeiro, monkeypatch, ja_gerado):
+    esperado = _baixar(cliente).content
+    if not ja_gerado:
+        for nome in _arquivos():
+            os.remove(os.path.join(artefatos_excel.diretorio, nome))
+    obter = ArtefatosExcel.obter
+
+    def obter_e_remover(self, db, ano, mes):
+        # Uma regeneracao ou limpeza remove o arquivo entre obter e o envio da resposta.
+        arquivo, acerto = obter(self, db, ano, mes)
+        for nome in _arquivos():
+            os.remove(os.path.join(self.diretorio, nome))
+        return arquivo, acerto
+
+    monkeypatch.setattr(ArtefatosExcel, "obter", obter_e_remover)
+    resposta = _baixar(cliente)
+
+    assert resposta.headers["x-cache"] == ("HIT" if ja_gerado else "MISS")
+    assert resposta.content == esperado
+    assert _arquivos() == []
+
+
+def test_limpeza_respeita_a_capacidade(cliente, janeiro, monkeypatch):
+    cliente.post("/api/gas/upsert", json=[_registro("2024-02-10", 1.0)])
+    _baixar(cliente)
+    tamanho = sum(os.path.getsize(os.path.join(artefatos_excel.diretorio, nome)) for nome in _arquivos())
+    monkeypatch.setattr(artefatos_excel, "capacidade_bytes", tamanho + 10)
+
+    resposta = cliente.get("/api/gas/exportar-excel", params={"mes": 2, "ano": 2024})
+
+    assert resposta.status_code == 200
+    assert [nome for nome in _arquivos() if "_2024_01_" in nome] == []
+    assert len(_arquivos()) == 1
+
+
+def test_versao_em_uso_fica_para_a_proxima_limpeza(cliente, janeiro, monkeypatch):
+    _baixar(cliente)
+    [em_uso] = _arquivos()
+    remover = os.remove
+
+    def remover_exceto_em_uso(caminho, *args, **kwargs):
+        # Como no Windows, com o arquivo aberto por outra resposta.
+        if os.path.basename(caminho) == em_uso:
+            raise PermissionError(caminho)
+        return remover(caminho, *args, **kwargs)
+
+    monkeypatch.setattr(os, "remove", remover_exceto_em_uso)
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-12", 3.0)])
+    assert _baixar(cliente).headers["x-cache"] == "MISS"
+    assert em_uso in _arquivos() and len(_arquivos()) == 2
+
+    monkeypatch.setattr(os, "remove", remover)
+    cliente.post("/api/gas/upsert", json=[_registro("2024-01-13", 4.0)])
+    _baixar(cliente)
+    assert em_uso not in _arquivos() and len(_arquivos()) == 1
+
+
+def _temporario(idade):
+    os.makedirs(artefatos_excel.diretorio, exist_ok=True)
+    caminho = os.path.join(artefatos_excel.diretorio, f"{PREFIXO_TEMPORARIO}{idade}{EXTENSAO_ARTEFATO}")
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(b"incompleto")
+    modificado_em = time.time() - idade
+    os.utime(caminho, (modificado_em, modificado_em))
+    return os.path.basename(caminho)
+
+
+def _temporarios():
+    return sorted(nome for nome in os.listdir(artefatos_excel.diretorio) if nome.startswith(PREFIXO_TEMPORARIO))
+
+
+def test_temporarios_antigos_sao_removidos_na_inicializacao(fabrica_sessao):
+    _temporario(IDADE_MAXIMA_TEMPORARIO + 60)
+    recente = _temporario(60)
+
+    assert artefatos_excel.remover_temporarios_antigos() == 1
+    assert _temporarios() == [recente]
+
+
+def test_limpeza_remove_temporarios_antigos(cliente, janeiro):
+    _temporario(IDADE_MAXIMA_TEMPORARIO + 60)
+    recente = _temporario(60)
+
+    _baixar(cliente)
+
+    assert _temporarios() == [recente]
+    assert len(_arquivos()) == 2
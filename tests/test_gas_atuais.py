@@ -0,0 +1,83 @@
+"""Retrato atual de MercadoGas (GET /api/gas/atuais)."""
+import json
+from datetime import date
+
+import pytest
+
+from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository
+from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
+
+
+def _registro(data, planilha, aba, valor):
+    return {"DATA": data, "PLANILHA": planilha, "ABA": aba, "PRODUTO": "GLP", "UNIDADE": "ton", "VALOR": valor}
+
+
+@pytest.fixture
+def historico(cliente):
+    """Tres chaves atuais; a chave (10/01, a.xlsx, GLP) tem duas versoes substituidas."""
+    for valor in (1.0, 2.0):
+        cliente.post("/api/gas/upsert", json=[_registro("2024-01-10", "a.xlsx", "GLP", valor)])
+    cliente.post("/api/gas/upsert", json=[
+        _registro("2024-01-10", "a.xlsx", "GLP", 3.0),
+        _registro("2024-01-10", "b.xlsx", "GLP", 4.0),
+        _registro("2024-01-11", "a.xlsx", "GN", 5.0),
+    ])
+
+
+def test_retorna_apenas_as_linhas_atuais_na_ordem_do_indice(cliente, historico):
+    resposta = cliente.get("/api/gas/atuais")
+
+    assert resposta.status_code == 200, resposta.text
+    itens = resposta.json()
+    assert [(item["DATA"], item["PLANILHA"], item["ABA"], item["VALOR"]) for item in itens] == [
+        ("2024-01-11", "a.xlsx", "GN", 5.0),
+        ("2024-01-10", "b.xlsx", "GLP", 4.0),
+        ("2024-01-10", "a.xlsx", "GLP", 3.0),
+    ]
+    assert all(item["ATUALIZADO_EM"] is None and item["ID"] and item["CRIADO_EM"] for item in itens)
+    assert len(cliente.get("/api/gas/").json()) == 5
+
+
+def test_mesmo_retrato_de_apenas_sem_atualizacao(cliente, historico):
+    atuais = cliente.get("/api/gas/atuais").json()
+    sem_atualizacao = cliente.get("/api/gas/", params={"apenas_sem_atualizacao": True}).json()
+
+    assert sorted(item["ID"] for item in atuais) == sorted(item["ID"] for item in sem_atualizacao)
+
+
+@pytest.mark.parametrize(
+    ("params", "valores"),
+    [
+        ({"planilha": "a.xlsx"}, [5.0, 3.0]),
+        ({"aba": "GLP"}, [4.0, 3.0]),
+        ({"planilha": "a.xlsx", "aba": "GLP"}, [3.0]),
+        ({"planilha": "c.xlsx"}, []),
+        ({"data_inicio": "2024-01-11"}, [5.0]),
+    ],
+)
+def test_filtros(cliente, historico, params, valores):
+    resposta = cliente.get("/api/gas/atuais", params=params)
+
+    assert [item["VALOR"] for item in resposta.json()] == valores
+
+
+def test_ndjson_em_fluxo(cliente, historico):
+    resposta = cliente.get("/api/gas/atuais", params={"formato": "ndjson"})
+
+    assert resposta.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(linha) for linha in resposta.text.splitlines()]
+    assert linhas == cliente.get("/api/gas/atuais").json()
+
+
+def test_repositorio_iterar_atuais_em_lotes(fabrica_sessao):
+    with fabrica_sessao() as db:
+        repositorio = MercadoGasRepository(db)
+        repositorio.inserir_em_lote([
+            MercadoGasCriacao(**_registro(date(2024, 1, dia), "a.xlsx", "GLP", dia)) for dia in range(1, 8)
+        ])
+        repositorio.atualizar_atualizado_em_em_lote([(date(2024, 1, 1), "a.xlsx", "GLP")])
+        db.commit()
+
+        valores = [linha.VALOR for linha in repositorio.iterar_atuais(tamanho_lote=2)]
+
+    assert valores == [7.0, 6.0, 5.0, 4.0, 3.0, 2.0]
@@ -0,0 +1,83 @@
+"""As rotas continuam respondendo enquanto uma importacao ocupa o banco."""
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from bd_pcp.db.models.usuario import Usuario
+from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository
+
+ATRASO_INSERCAO = 2.0
+LIMITE_RESPOSTA = 1.0
+
+ARQUIVO = (
+    "DATA;PLANILHA;ABA;PRODUTO;LOCAL;EMPRESA;UNIDADE;VALOR\n"
+    + "".join(f"2024-01-{dia:02d};plan.xlsx;GLP;GLP;;;ton;{dia},5\n" for dia in range(1, 29))
+).encode()
+
+
+@pytest.fixture
+def usuario(fabrica_sessao):
+    with fabrica_sessao() as db:
+        usuario = Usuario(USERNAME="operador", EMAIL="operador@empresa.com", IS_ACTIVE=True)
+        usuario.set_password("senha-operador")
+        db.add(usuario)
+        db.commit()
+
+
+@pytest.fixture
+def insercao_lenta(monkeypatch):
+    """Atrasa inserir_em_lote (bloqueante, como um bulk insert lento) e sinaliza o inicio."""
+    iniciada = threading.Event()
+    inserir_em_lote = MercadoGasRepository.inserir_em_lote
+
+    def inserir_lento(self, *args, **kwargs):
+        iniciada.set()
+        time.sleep(ATRASO_INSERCAO)
+        return inserir_em_lote(self, *args, **kwargs)
+
+    monkeypatch.setattr(MercadoGasRepository, "inserir_em_lote", inserir_lento)
+    return iniciada
+
+
+def _instante_do_sinal(evento: threading.Event) -> float:
+    assert evento.wait(timeout=10), "a importacao nao chegou a insercao"
+    return time.perf_counter()
+
+
+async def _durante_importacao(aplicacao, iniciada: threading.Event, metodo: str, url: str, **kwargs):
+    """Envia um upload lento e, com a insercao em andamento, outra requisicao no mesmo event loop."""
+    transporte = httpx.ASGITransport(app=aplicacao)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+        upload = asyncio.create_task(
+            cliente.post("/api/gas/upload-txt", files={"arquivo": ("dados.txt", ARQUIVO, "text/plain")})
+        )
+        # O instante e tomado na thread que espera o sinal: se o upload travar o
+        # loop, o atraso aparece na duracao da requisicao seguinte.
+        inicio = await asyncio.to_thread(_instante_do_sinal, iniciada)
+        resposta = await cliente.request(metodo, url, **kwargs)
+        duracao = time.perf_counter() - inicio
+        resposta_upload = await upload
+    return resposta, duracao, resposta_upload
+
+
+@pytest.mark.parametrize(
+    "metodo, url, kwargs",
+    [
+        ("GET", "/api/gas/", {"params": {"limite": 10}}),
+        ("GET", "/api/gas/atuais", {"params": {"limite": 10}}),
+        ("POST", "/api/auth/login", {"json": {"username": "operador", "password": "senha-operador"}}),
+    ],
+    ids=["listagem", "atuais", "login"],
+)
+def test_rotas_respondem_durante_importacao_lenta(aplicacao, usuario, insercao_lenta, metodo, url, kwargs):
+    resposta, duracao, resposta_upload = asyncio.run(
+        _durante_importacao(aplicacao, insercao_lenta, metodo, url, **kwargs)
+    )
+
+    assert resposta.status_code == 200, resposta.text
+    assert duracao < LIMITE_RESPOSTA
+    assert resposta_upload.status_code == 201, resposta_upload.text
+    assert resposta_upload.json()["total_processados"] == 28
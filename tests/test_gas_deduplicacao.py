@@ -0,0 +1,107 @@
+"""Reenvio de conteudo identico em /upload-txt e /upsert: duplicado sem forcar, reimportado com forcar."""
+import hashlib
+
+import pytest
+from sqlalchemy import func, select
+
+from bd_pcp.db.models.importacao_gas import RegistroImportacaoGas
+from bd_pcp.db.models.mercado_gas import MercadoGas
+
+ARQUIVO = (
+    "DATA;PLANILHA;ABA;PRODUTO;LOCAL;EMPRESA;UNIDADE;VALOR\n"
+    "2024-01-01;plan.xlsx;GLP;GLP;;;ton;1,5\n"
+    "2024-01-02;plan.xlsx;GLP;GLP;;;ton;2,5\n"
+).encode()
+REGISTROS = [
+    {"DATA": "2024-01-01", "PLANILHA": "plan.xlsx", "ABA": "GLP", "PRODUTO": "GLP", "UNIDADE": "ton", "VALOR": 1.5},
+    {"DATA": "2024-01-02", "PLANILHA": "plan.xlsx", "ABA": "GLP", "PRODUTO": "GLP", "UNIDADE": "ton", "VALOR": 2.5},
+]
+
+
+def _upload(cliente, **params):
+    return cliente.post("/api/gas/upload-txt", params=params, files={"arquivo": ("dados.txt", ARQUIVO, "text/plain")})
+
+
+def _upsert(cliente, **params):
+    return cliente.post("/api/gas/upsert", params=params, json=REGISTROS)
+
+
+ENVIOS = {"upload-txt": (_upload, 201), "upsert": (_upsert, 200)}
+
+
+def _contagens(fabrica_sessao):
+    """Total de linhas de MERCADO_GAS e quantas sao atuais."""
+    with fabrica_sessao() as db:
+        total = db.scalar(select(func.count()).select_from(MercadoGas))
+        atuais = db.scalar(select(func.count()).select_from(MercadoGas).where(MercadoGas.ATUALIZADO_EM.is_(None)))
+    return total, atuais
+
+
+@pytest.mark.parametrize("rota", ENVIOS)
+def test_primeiro_envio_importa_e_registra_o_hash(cliente, fabrica_sessao, rota):
+    enviar, codigo = ENVIOS[rota]
+
+    resposta = enviar(cliente)
+
+    assert resposta.status_code == codigo, resposta.text
+    assert resposta.json()["total_processados"] == 2
+    assert "duplicado" not in resposta.json()
+    assert _contagens(fabrica_sessao) == (2, 2)
+    with fabrica_sessao() as db:
+        [registro] = db.execute(select(RegistroImportacaoGas)).scalars().all()
+        assert registro.TIPO == rota
+        assert registro.LINHAS_INSERIDAS == 2
+        assert registro.IMPORTACOES == 1
+
+
+def test_hash_do_upload_e_o_do_arquivo(cliente, fabrica_sessao):
+    _upload(cliente)
+
+    with fabrica_sessao() as db:
+        assert db.get(RegistroImportacaoGas, hashlib.sha256(ARQUIVO).hexdigest()) is not None
+
+
+@pytest.mark.parametrize("rota", ENVIOS)
+def test_reenvio_identico_responde_200_duplicado_sem_gravar(cliente, fabrica_sessao, rota):
+    enviar, _ = ENVIOS[rota]
+    enviar(cliente)
+
+    resposta = enviar(cliente)
+
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    assert corpo["duplicado"] is True
+    assert corpo["total_processados"] == corpo["total_substituidos"] == 0
+    assert corpo["linhas_importadas"] == 2
+    assert corpo["arquivo"] == ("dados.txt" if rota == "upload-txt" else None)
+    assert _contagens(fabrica_sessao) == (2, 2)
+
+
+@pytest.mark.parametrize("rota", ENVIOS)
+def test_forcar_reimporta_e_substitui(cliente, fabrica_sessao, rota):
+    enviar, codigo = ENVIOS[rota]
+    enviar(cliente)
+
+    resposta = enviar(cliente, forcar=True)
+
+    assert resposta.status_code == codigo, resposta.text
+    assert resposta.json()["total_processados"] == 2
+    assert resposta.json()["total_substituidos"] == 2
+    assert "duplicado" not in resposta.json()
+    assert _contagens(fabrica_sessao) == (4, 2)
+    with fabrica_sessao() as db:
+        [registro] = db.execute(select(RegistroImportacaoGas)).scalars().all()
+        assert registro.IMPORTACOES == 2
+        assert registro.LINHAS_SUBSTITUIDAS == 2
+
+
+def test_importacao_com_erro_nao_registra_o_hash(cliente, fabrica_sessao):
+    invalido = ARQUIVO.replace(b"2,5", b"abc")
+    resposta = cliente.post("/api/gas/upload-txt", files={"arquivo": ("dados.txt", invalido, "text/plain")})
+    assert resposta.status_code == 400
+
+    segunda = cliente.post("/api/gas/upload-txt", files={"arquivo": ("dados.txt", invalido, "text/plain")})
+
+    assert segunda.status_code == 400
+    with fabrica_sessao() as db:
+        assert db.execute(select(RegistroImportacaoGas)).first() is None
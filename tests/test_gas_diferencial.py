@@ -0,0 +1,131 @@
+"""Importacao diferencial: grava so as linhas que mudaram e chega ao mesmo estado do modo substituir."""
+from functools import partial
+
+import pytest
+from sqlalchemy import select
+
+from bd_pcp.db.models.mercado_gas import MercadoGas
+from bd_pcp.routers import gas_rotas
+from bd_pcp.services.gas_txt_parser import iterar_mercado_gas_upload
+
+CABECALHO = "DATA;PLANILHA;ABA;PRODUTO;LOCAL;EMPRESA;UNIDADE;VALOR\n"
+
+
+def _linha(data, aba, produto, valor, local=None):
+    return {"DATA": data, "PLANILHA": "plan.xlsx", "ABA": aba, "PRODUTO": produto, "LOCAL": local, "UNIDADE": "ton", "VALOR": valor}
+
+
+BASE = [
+    _linha("2024-01-01", "GLP", "GLP", 1.0),
+    _linha("2024-01-01", "GLP", "C5+", 2.0),
+    _linha("2024-01-01", "GN", "GN", 3.0),
+    _linha("2024-01-02", "GLP", "GLP", 4.0),
+    _linha("2024-01-02", "GLP", "C5+", 5.0),
+    _linha("2024-01-02", "GN", "GN", 6.0),
+]
+
+
+def _alterado():
+    """BASE com um valor alterado, um local preenchido, uma linha removida, uma nova e uma repetida."""
+    linhas = [dict(linha) for linha in BASE]
+    linhas[0]["VALOR"] = 10.0
+    linhas[2]["LOCAL"] = "Guamare"
+    del linhas[4]
+    linhas.append(_linha("2024-01-02", "GLP", "Propano", 7.0))
+    linhas.append(dict(linhas[1]))
+    return linhas
+
+
+def _estado(fabrica_sessao):
+    """Linhas atuais (sem ATUALIZADO_EM) e o total de linhas da tabela."""
+    with fabrica_sessao() as db:
+        linhas = db.execute(select(MercadoGas)).scalars().all()
+        atuais = sorted(
+            (str(linha.DATA), linha.ABA, linha.PRODUTO, linha.LOCAL, linha.VALOR)
+            for linha in linhas if linha.ATUALIZADO_EM is None
+        )
+        return atuais, len(linhas)
+
+
+def test_upsert_diferencial_grava_apenas_o_que_mudou(cliente, fabrica_sessao):
+    assert cliente.post("/api/gas/upsert", json=BASE).status_code == 200
+
+    resposta = cliente.post("/api/gas/upsert", params={"modo": "diferencial"}, json=_alterado())
+
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.json() == {"total_processados": 3, "total_substituidos": 3, "total_inalterados": 3}
+    _, total = _estado(fabrica_sessao)
+    assert total == len(BASE) + 3
+
+
+def test_modos_deixam_as_mesmas_linhas_atuais(cliente, fabrica_sessao):
+    cliente.post("/api/gas/upsert", params={"modo": "diferencial"}, json=BASE)
+    cliente.post("/api/gas/upsert", params={"modo": "diferencial"}, json=_alterado())
+    atuais_diferencial, total_diferencial = _estado(fabrica_sessao)
+
+    with fabrica_sessao() as db:
+        db.execute(MercadoGas.__table__.delete())
+        db.commit()
+    cliente.post("/api/gas/upsert", params={"modo": "substituir", "forcar": True}, json=BASE)
+    cliente.post("/api/gas/upsert", params={"modo": "substituir", "forcar": True}, json=_alterado())
+    atuais_substituir, total_substituir = _estado(fabrica_sessao)
+
+    # O modo substituir regrava a linha repetida; o diferencial a considera uma vez.
+    assert sorted(set(atuais_substituir)) == atuais_diferencial
+    assert total_diferencial < total_substituir
+
+
+def test_reenvio_identico_no_modo_diferencial_nao_grava_nada(cliente, fabrica_sessao):
+    cliente.post("/api/gas/upsert", json=BASE)
+    _, total = _estado(fabrica_sessao)
+
+    resposta = cliente.post("/api/gas/upsert", params={"modo": "diferencial", "forcar": True}, json=BASE)
+
+    assert resposta.json() == {"total_processados": 0, "total_substituidos": 0, "total_inalterados": len(BASE)}
+    assert _estado(fabrica_sessao)[1] == total
+
+
+def _arquivo(linhas):
+    return (CABECALHO + "".join(
+        f"{linha['DATA']};{linha['PLANILHA']};{linha['ABA']};{linha['PRODUTO']};{linha['LOCAL'] or ''};;"
+        f"{linha['UNIDADE']};{linha['VALOR']}\n"
+        for linha in linhas
+    )).encode()
+
+
+def test_upload_diferencial_em_varios_lotes(cliente, fabrica_sessao, monkeypatch):
+    # Lotes de 2 linhas: as linhas de uma mesma chave chegam em lotes diferentes.
+    monkeypatch.setattr(gas_rotas, "iterar_mercado_gas_upload", partial(iterar_mercado_gas_upload, tamanho_lote=2))
+    cliente.post("/api/gas/upsert", json=BASE)
+
+    resposta = cliente.post(
+        "/api/gas/upload-txt",
+        params={"modo": "diferencial"},
+        files={"arquivo": ("dados.txt", _arquivo(_alterado()), "text/plain")},
+    )
+
+    assert resposta.status_code == 201, resposta.text
+    assert resposta.json()["total_processados"] == 3
+    assert resposta.json()["total_inalterados"] == 3
+    atuais, _ = _estado(fabrica_sessao)
+    assert atuais == sorted(set(
+        (linha["DATA"], linha["ABA"], linha["PRODUTO"], linha["LOCAL"], linha["VALOR"]) for linha in _alterado()
+    ))
+
+
+@pytest.mark.parametrize("modo", ["substituir", "diferencial"])
+def test_erro_de_validacao_indica_a_linha_lida(cliente, monkeypatch, modo):
+    monkeypatch.setattr(gas_rotas, "iterar_mercado_gas_upload", partial(iterar_mercado_gas_upload, tamanho_lote=2))
+    cliente.post("/api/gas/upsert", json=BASE)
+    linhas = [dict(linha) for linha in BASE]
+    linhas[4]["PLANILHA"] = " "
+
+    resposta = cliente.post(
+        "/api/gas/upload-txt",
+        params={"modo": modo, "forcar": True},
+        files={"arquivo": ("dados.txt", _arquivo(linhas), "text/plain")},
+    )
+
+    # Os lotes anteriores nao inserem nada no modo diferencial (linhas iguais as atuais).
+    assert resposta.status_code == 400
+    assert resposta.json()["detail"].startswith("Item 5:")
@@ -0,0 +1,168 @@
+"""Exportacao em fluxo de MercadoGas em CSV, Parquet e Arrow (GET /api/gas/exportar)."""
+import csv
+import gzip
+import io
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from bd_pcp.services import gas_exportacao
+from bd_pcp.services.gas_exportacao import COLUNAS_EXPORTACAO, gerar_exportacao
+
+JANEIRO = {"mes": 1, "ano": 2024}
+
+
+def _linha(indice, **valores):
+    return SimpleNamespace(**{
+        "ID": indice,
+        "DATA": date(2024, 1, indice),
+        "PLANILHA": "plan.xlsx",
+        "ABA": "GLP",
+        "PRODUTO": f"P{indice}",
+        "LOCAL": None,
+        "EMPRESA": "Empresa, S.A.",
+        "UNIDADE": "ton",
+        "VALOR": indice + 0.5,
+        "CRIADO_EM": datetime(2024, 2, 1, 8, 30, indice),
+        "ATUALIZADO_EM": None,
+        **valores,
+    })
+
+
+LINHAS = [_linha(indice) for indice in range(1, 6)]
+
+
+def _ler_csv(conteudo):
+    return list(csv.DictReader(io.StringIO(conteudo.decode("utf-8"))))
+
+
+def _esperado_csv(linha):
+    return {
+        nome: "" if valor is None else valor.isoformat() if isinstance(valor, date) else str(valor)
+        for nome, valor in ((nome, getattr(linha, nome)) for nome in COLUNAS_EXPORTACAO)
+    }
+
+
+def _esperado_colunar(linha):
+    return {nome: getattr(linha, nome) for nome in COLUNAS_EXPORTACAO}
+
+
+@pytest.fixture
+def pyarrow():
+    return pytest.importorskip("pyarrow")
+
+
+def test_csv_em_lotes_preserva_as_linhas():
+    blocos = list(gerar_exportacao(LINHAS, "csv", linhas_por_lote=2))
+
+    assert len(blocos) == 3
+    assert _ler_csv(b"".join(blocos)) == [_esperado_csv(linha) for linha in LINHAS]
+
+
+def test_csv_gzip_descompacta_no_mesmo_csv():
+    simples = b"".join(gerar_exportacao(LINHAS, "csv"))
+
+    compactado = b"".join(gerar_exportacao(LINHAS, "csv", "gzip", linhas_por_lote=2))
+
+    assert gzip.decompress(compactado) == simples
+
+
+@pytest.mark.parametrize("compressao", ["snappy", "zstd", "gzip", "nenhuma"])
+def test_parquet_um_row_group_por_lote(pyarrow, compressao):
+    import pyarrow.parquet as pq
+
+    conteudo = b"".join(gerar_exportacao(LINHAS, "parquet", compressao, linhas_por_lote=2))
+
+    arquivo = pq.ParquetFile(io.BytesIO(conteudo))
+    assert arquivo.metadata.num_row_groups == 3
+    assert arquivo.read().to_pylist() == [_esperado_colunar(linha) for linha in LINHAS]
+
+
+@pytest.mark.parametrize("compressao", ["nenhuma", "zstd", "lz4"])
+def test_arrow_um_record_batch_por_lote(pyarrow, compressao):
+    conteudo = b"".join(gerar_exportacao(LINHAS, "arrow", compressao, linhas_por_lote=2))
+
+    leitor = pyarrow.ipc.open_stream(conteudo)
+    lotes = list(leitor)
+    assert [lote.num_rows for lote in lotes] == [2, 2, 1]
+    assert pyarrow.Table.from_batches(lotes).to_pylist() == [_esperado_colunar(linha) for linha in LINHAS]
+
+
+def test_compressao_de_outro_formato_e_rejeitada():
+    with pytest.raises(ValueError, match="nao se aplica"):
+        list(gerar_exportacao(LINHAS, "csv", "zstd"))
+
+
+def _registro(data, valor):
+    return {"DATA": data, "PLANILHA": "plan.xlsx", "ABA": "GLP", "PRODUTO": "GLP", "UNIDADE": "ton", "VALOR": valor}
+
+
+@pytest.fixture
+def janeiro(cliente):
+    registros = [_registro(f"2024-01-{dia:02d}", float(dia)) for dia in (3, 1, 2)]
+    cliente.post("/api/gas/upsert", json=registros + [_registro("2024-02-01", 9.0)])
+
+
+def _exportar(cliente, **params):
+    resposta = cliente.get("/api/gas/exportar", params={**JANEIRO, **params})
+    assert resposta.status_code == 200, resposta.text
+    return resposta
+
+
+def test_rota_csv_na_ordem_da_listagem(cliente, janeiro):
+    resposta = _exportar(cliente, formato="csv")
+
+    assert resposta.headers["content-type"] == "text/csv; charset=utf-8"
+    assert 'filename="mercado_gas_1_2024.csv"' in resposta.headers["content-disposition"]
+    linhas = _ler_csv(resposta.content)
+    assert [(linha["DATA"], linha["VALOR"]) for linha in linhas] == [
+        ("2024-01-03", "3.0"), ("2024-01-02", "2.0"), ("2024-01-01", "1.0"),
+    ]
+
+
+def test_rota_csv_gzip(cliente, janeiro):
+    simples = _exportar(cliente, formato="csv").content
+
+    resposta = _exportar(cliente, formato="csv", compressao="gzip")
+
+    assert 'filename="mercado_gas_1_2024.csv.gz"' in resposta.headers["content-disposition"]
+    assert gzip.decompress(resposta.content) == simples
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_rota_colunar(cliente, janeiro, pyarrow, formato):
+    import pyarrow.parquet as pq
+
+    resposta = _exportar(cliente, formato=formato)
+
+    assert f'filename="mercado_gas_1_2024.{formato}"' in resposta.headers["content-disposition"]
+    if formato == "parquet":
+        tabela = pq.read_table(io.BytesIO(resposta.content))
+    else:
+        tabela = pyarrow.ipc.open_stream(resposta.content).read_all()
+    assert tabela.column_names == list(COLUNAS_EXPORTACAO)
+    assert tabela.column("DATA").to_pylist() == [date(2024, 1, dia) for dia in (3, 2, 1)]
+    assert tabela.column("VALOR").to_pylist() == [3.0, 2.0, 1.0]
+
+
+@pytest.mark.parametrize("formato", ["parquet", "arrow"])
+def test_rota_colunar_sem_pyarrow_responde_501(cliente, janeiro, monkeypatch, formato):
+    monkeypatch.setattr(gas_exportacao, "pa", None)
+
+    resposta = cliente.get("/api/gas/exportar", params={**JANEIRO, "formato": formato})
+
+    assert resposta.status_code == 501
+    assert "pyarrow" in resposta.json()["detail"]
+
+
+def test_rota_periodo_vazio_responde_404(cliente, janeiro):
+    resposta = cliente.get("/api/gas/exportar", params={"mes": 5, "ano": 2024, "formato": "csv"})
+
+    assert resposta.status_code == 404
+
+
+def test_rota_compressao_invalida_responde_400(cliente, janeiro):
+    resposta = cliente.get("/api/gas/exportar", params={**JANEIRO, "formato": "csv", "compressao": "lz4"})
+
+    assert resposta.status_code == 400
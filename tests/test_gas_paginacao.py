@@ -0,0 +1,90 @@
+"""Paginacao por cursor (DATA, ID) de GET /api/gas/."""
+from datetime import date, timedelta
+
+import pytest
+
+from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository
+from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
+
+
+def _registros(datas):
+    return [
+        MercadoGasCriacao(DATA=data, PLANILHA="plan.xlsx", ABA=f"aba{indice}", PRODUTO="GLP", UNIDADE="ton", VALOR=indice)
+        for indice, data in enumerate(datas)
+    ]
+
+
+@pytest.fixture
+def inserir(fabrica_sessao):
+    def inserir(datas):
+        with fabrica_sessao() as db:
+            MercadoGasRepository(db).inserir_em_lote(_registros(datas))
+    return inserir
+
+
+def _paginas(cliente, **params):
+    """Percorre todas as paginas seguindo proximo_cursor."""
+    paginas = []
+    cursor = None
+    while True:
+        resposta = cliente.get("/api/gas/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert resposta.status_code == 200, resposta.text
+        pagina = resposta.json()
+        paginas.append(pagina["itens"])
+        cursor = pagina["proximo_cursor"]
+        if cursor is None:
+            return paginas
+
+
+def test_paginas_cobrem_a_listagem_completa_na_ordem_data_id(cliente, inserir):
+    # Datas repetidas: o ID desempata e nenhuma linha se repete entre paginas.
+    inserir([date(2024, 1, 1) + timedelta(days=indice % 4) for indice in range(11)])
+
+    paginas = _paginas(cliente, limite=3)
+    completa = cliente.get("/api/gas/").json()
+
+    assert [len(pagina) for pagina in paginas] == [3, 3, 3, 2]
+    itens = [item for pagina in paginas for item in pagina]
+    assert [item["ID"] for item in itens] == [item["ID"] for item in completa]
+    assert [(item["DATA"], item["ID"]) for item in itens] == sorted(
+        ((item["DATA"], item["ID"]) for item in itens), reverse=True
+    )
+
+
+def test_paginacao_respeita_o_periodo(cliente, inserir):
+    inserir([date(2024, 1, 1) + timedelta(days=indice) for indice in range(10)])
+
+    paginas = _paginas(cliente, limite=2, data_inicio="2024-01-03", data_fim="2024-01-07")
+
+    datas = [item["DATA"] for pagina in paginas for item in pagina]
+    assert datas == [f"2024-01-{dia:02d}" for dia in range(7, 2, -1)]
+
+
+def test_insercao_entre_paginas_nao_desloca_o_cursor(cliente, inserir):
+    inserir([date(2024, 1, 1) + timedelta(days=indice) for indice in range(6)])
+    primeira = cliente.get("/api/gas/", params={"limite": 3}).json()
+
+    # Linhas mais recentes entram antes da posicao do cursor.
+    inserir([date(2024, 2, 1), date(2024, 2, 2)])
+    segunda = cliente.get("/api/gas/", params={"limite": 3, "cursor": primeira["proximo_cursor"]}).json()
+
+    assert [item["DATA"] for item in primeira["itens"]] == ["2024-01-06", "2024-01-05", "2024-01-04"]
+    assert [item["DATA"] for item in segunda["itens"]] == ["2024-01-03", "2024-01-02", "2024-01-01"]
+    assert segunda["proximo_cursor"] is None
+
+
+def test_sem_limite_e_cursor_retorna_lista_completa(cliente, inserir):
+    inserir([date(2024, 1, 1), date(2024, 1, 2)])
+
+    resposta = cliente.get("/api/gas/")
+
+    assert isinstance(resposta.json(), list)
+    assert len(resposta.json()) == 2
+
+
+@pytest.mark.parametrize("cursor", ["nao-e-um-cursor", "WyJ4IiwxXQ"])
+def test_cursor_invalido_retorna_400(cliente, cursor):
+    resposta = cliente.get("/api/gas/", params={"limite": 3, "cursor": cursor})
+
+    assert resposta.status_code == 400
+    assert resposta.json()["detail"] == "Cursor de paginacao invalido."
@@ -0,0 +1,173 @@
+"""Paridade entre os motores de parse dos uploads TXT de MercadoGas."""
+import csv
+from io import BytesIO, StringIO
+
+import pytest
+
+from bd_pcp.services.gas_parser_colunar import converter_csv_colunar
+from bd_pcp.services.gas_parser_paralelo import converter_csv_paralelo, encerrar_executor
+from bd_pcp.services.gas_txt_parser import (
+    MOTOR_COLUNAR,
+    MOTOR_PYTHON,
+    GasTxtParserError,
+    detectar_delimitador,
+    iterar_mercado_gas_upload,
+    ler_blocos,
+    parse_mercado_gas_upload,
+    separar_resultados,
+    validar_cabecalho,
+)
+
+CABECALHO = "DATA;PLANILHA;ABA;PRODUTO;LOCAL;EMPRESA;UNIDADE;VALOR\n"
+
+ARQUIVOS = {
+    "iso_virgula_decimal": CABECALHO + (
+        "2024-01-01;plan.xlsx;GLP;GLP;Guamare;Potiguar;ton;1,5\n"
+        "2024-01-02;plan.xlsx;GLP;GLP;;;ton;2,25\n"
+        "2024-01-03; plan.xlsx ; GLP ;GLP; Guamare ; ;ton;-3,75\n"
+    ),
+    "data_barra_milhar": CABECALHO + (
+        "01/02/2024;plan.xlsx;GN;GN;Guamare;Potiguar;m3;1.234,56\n"
+        "02/02/2024;plan.xlsx;GN;GN;Guamare;Potiguar;m3;1 234,5\n"
+        "29/02/2024;plan.xlsx;GN;GN;Guamare;Potiguar;m3;7\n"
+    ),
+    "data_hifen_ponto_tab": (
+        "DATA\tPLANILHA\tABA\tPRODUTO\tLOCAL\tEMPRESA\tUNIDADE\tVALOR\n"
+        "01-03-2024\tplan.xlsx\tC5+\tC5+\tGuamare\tPotiguar\tm3\t1,234.5\n"
+        "02-03-2024\tplan.xlsx\tC5+\tC5+\tGuamare\tPotiguar\tm3\t0.5\n"
+    ),
+    "formatos_misturados": CABECALHO + (
+        "2024-04-01;plan.xlsx;GLP;GLP;;;ton;1,5\n"
+        "02/04/2024;plan.xlsx;GLP;GLP;;;ton;2.5\n"
+        "03-04-2024;plan.xlsx;GLP;GLP;;;ton;1.000,5\n"
+    ),
+    "celulas_vazias": CABECALHO + (
+        "2024-05-01;plan.xlsx;GLP;GLP;;;ton;\n"
+        "2024-05-02;plan.xlsx;GLP;GLP;;;ton;  \n"
+        "2024-05-03;;GLP;GLP;;;ton;1\n"
+        "2024-05-04;plan.xlsx;GLP;GLP;;;ton\n"
+    ),
+    "aspas_e_linhas_em_branco": CABECALHO + (
+        '2024-06-01;"plan; com separador.xlsx";GLP;GLP;"Local\nem duas linhas";;ton;"1,5"\n'
+        "\n"
+        "   \n"
+        "2024-06-02;plan.xlsx;GLP;GLP;;;ton;2\n"
+    ),
+    "numeros_malformados": CABECALHO + (
+        "2024-07-01;plan.xlsx;GLP;GLP;;;ton;1,5\n"
+        "2024-07-02;plan.xlsx;GLP;GLP;;;ton;12,3x\n"
+        "2024-07-03;plan.xlsx;GLP;GLP;;;ton;abc\n"
+        "2024-07-04;plan.xlsx;GLP;GLP;;;ton;2\n"
+    ),
+    "datas_invalidas": CABECALHO + (
+        "2024-08-01;plan.xlsx;GLP;GLP;;;ton;1\n"
+        ";plan.xlsx;GLP;GLP;;;ton;1\n"
+        "2024-13-01;plan.xlsx;GLP;GLP;;;ton;1\n"
+        "31/02/2024;plan.xlsx;GLP;GLP;;;ton;1\n"
+        "ontem;plan.xlsx;GLP;GLP;;;ton;1\n"
+    ),
+    "sem_dados": CABECALHO,
+}
+
+MOTORES = {
+    "colunar": {"motor": MOTOR_COLUNAR},
+    "paralelo-python": {"motor": MOTOR_PYTHON, "processos": 2, "limite_paralelo": 0},
+    "paralelo-colunar": {"motor": MOTOR_COLUNAR, "processos": 2, "limite_paralelo": 0},
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _encerrar_pool():
+    yield
+    encerrar_executor()
+
+
+def _converter(conteudo: str, **opcoes):
+    """Registros convertidos ou o detalhe do GasTxtParserError."""
+    try:
+        return [registro.model_dump() for registro in parse_mercado_gas_upload(conteudo.encode(), **opcoes)]
+    except GasTxtParserError as exc:
+        return exc.detail
+
+
+def _converter_em_fluxo(conteudo: str, **opcoes):
+    try:
+        return [
+            registro.model_dump()
+            for lote in iterar_mercado_gas_upload(BytesIO(conteudo.encode()), tamanho_lote=2, **opcoes)
+            for registro in lote
+        ]
+    except GasTxtParserError as exc:
+        return exc.detail
+
+
+def _converter_em_blocos(conteudo: str, conversor, **opcoes):
+    """Converte com blocos pequenos, para que as linhas caiam em blocos diferentes."""
+    delimitador = detectar_delimitador(conteudo)
+    fluxo = StringIO(conteudo)
+    leitor = csv.DictReader(fluxo, delimiter=delimitador)
+    validar_cabecalho(leitor.fieldnames)
+    try:
+        registros, erros = separar_resultados(
+            conversor(fluxo, leitor.fieldnames, delimitador, tamanho_bloco=48, **opcoes),
+            indice_inicio=2,
+        )
+    except GasTxtParserError as exc:
+        return exc.detail
+    return erros or [registro.model_dump() for registro in registros]
+
+
+@pytest.mark.parametrize("nome_motor", MOTORES)
+@pytest.mark.parametrize("arquivo", ARQUIVOS)
+def test_motores_produzem_o_mesmo_resultado_que_o_python(arquivo, nome_motor):
+    conteudo = ARQUIVOS[arquivo]
+
+    assert _converter(conteudo, **MOTORES[nome_motor]) == _converter(conteudo)
+
+
+@pytest.mark.parametrize("nome_motor", MOTORES)
+@pytest.mark.parametrize("arquivo", ARQUIVOS)
+def test_motores_em_fluxo_produzem_o_mesmo_resultado_que_o_python(arquivo, nome_motor):
+    conteudo = ARQUIVOS[arquivo]
+
+    assert _converter_em_fluxo(conteudo, **MOTORES[nome_motor]) == _converter_em_fluxo(conteudo)
+
+
+@pytest.mark.parametrize(
+    "conversor, opcoes",
+    [
+        (converter_csv_colunar, {}),
+        (converter_csv_paralelo, {"motor": MOTOR_PYTHON, "processos": 2}),
+        (converter_csv_paralelo, {"motor": MOTOR_COLUNAR, "processos": 2}),
+    ],
+    ids=["colunar", "paralelo-python", "paralelo-colunar"],
+)
+@pytest.mark.parametrize("arquivo", ARQUIVOS)
+def test_conversao_em_blocos_pequenos_preserva_linhas_e_mensagens(arquivo, conversor, opcoes):
+    conteudo = ARQUIVOS[arquivo]
+
+    assert _converter_em_blocos(conteudo, conversor, **opcoes) == _converter(conteudo)
+
+
+def test_motor_python_converte_formatos_por_arquivo():
+    registros = _converter(ARQUIVOS["data_barra_milhar"])
+
+    assert [str(registro["DATA"]) for registro in registros] == ["2024-02-01", "2024-02-02", "2024-02-29"]
+    assert [registro["VALOR"] for registro in registros] == [1234.56, 1234.5, 7.0]
+
+
+def test_motor_python_reporta_linhas_invalidas_pela_posicao_no_arquivo():
+    erros = _converter(ARQUIVOS["datas_invalidas"])
+
+    assert [erro.split(":")[0] for erro in erros] == ["Linha 3", "Linha 4", "Linha 5", "Linha 6"]
+    assert erros[0] == "Linha 3: Campo DATA nao pode ser vazio."
+    assert erros[3] == "Linha 6: Formato de data invalido: 'ontem'."
+
+
+def test_ler_blocos_nao_corta_campo_entre_aspas():
+    texto = 'a;"linha\nquebrada";1\nb;c;2\n' * 20
+
+    blocos = list(ler_blocos(StringIO(texto), 16))
+
+    assert "".join(blocos) == texto
+    assert all(bloco.count('"') % 2 == 0 for bloco in blocos)
@@ -0,0 +1,71 @@
+"""Periodo inclusivo da API convertido no intervalo semiaberto DATA >= inicio AND DATA < fim."""
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository, intervalo_mes
+from bd_pcp.routers.gas_rotas import _periodo_consulta
+from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
+
+
+@pytest.mark.parametrize(
+    ("data_inicio", "data_fim", "esperado"),
+    [
+        (None, None, (None, None)),
+        (date(2024, 1, 1), None, (date(2024, 1, 1), None)),
+        (None, date(2024, 1, 31), (None, date(2024, 2, 1))),
+        (date(2024, 2, 29), date(2024, 2, 29), (date(2024, 2, 29), date(2024, 3, 1))),
+        (date(2024, 12, 1), date(2024, 12, 31), (date(2024, 12, 1), date(2025, 1, 1))),
+    ],
+)
+def test_periodo_inclusivo_vira_semiaberto(data_inicio, data_fim, esperado):
+    assert _periodo_consulta(data_inicio, data_fim) == esperado
+
+
+def test_periodo_invertido_e_rejeitado():
+    with pytest.raises(HTTPException) as erro:
+        _periodo_consulta(date(2024, 1, 2), date(2024, 1, 1))
+
+    assert erro.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    ("mes", "ano", "esperado"),
+    [(1, 2024, (date(2024, 1, 1), date(2024, 2, 1))), (12, 2024, (date(2024, 12, 1), date(2025, 1, 1)))],
+)
+def test_intervalo_mes(mes, ano, esperado):
+    assert intervalo_mes(mes, ano) == esperado
+
+
+@pytest.fixture
+def virada_de_mes(fabrica_sessao):
+    """Um registro por dia de 30/01 a 02/02."""
+    datas = [date(2024, 1, 30), date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 2)]
+    with fabrica_sessao() as db:
+        MercadoGasRepository(db).inserir_em_lote([
+            MercadoGasCriacao(DATA=data, PLANILHA="plan.xlsx", ABA="GLP", PRODUTO="GLP", UNIDADE="ton", VALOR=1.0)
+            for data in datas
+        ])
+
+
+@pytest.mark.parametrize("rota", ["/api/gas/", "/api/gas/atuais"])
+def test_rotas_incluem_data_inicio_e_data_fim(cliente, virada_de_mes, rota):
+    resposta = cliente.get(rota, params={"data_inicio": "2024-01-31", "data_fim": "2024-02-01"})
+
+    assert resposta.status_code == 200, resposta.text
+    assert sorted(item["DATA"] for item in resposta.json()) == ["2024-01-31", "2024-02-01"]
+
+
+@pytest.mark.parametrize("rota", ["/api/gas/", "/api/gas/atuais"])
+def test_rotas_rejeitam_periodo_invertido(cliente, rota):
+    resposta = cliente.get(rota, params={"data_inicio": "2024-02-01", "data_fim": "2024-01-31"})
+
+    assert resposta.status_code == 400
+
+
+def test_filtro_mes_nao_inclui_o_primeiro_dia_do_mes_seguinte(fabrica_sessao, virada_de_mes):
+    with fabrica_sessao() as db:
+        registros = MercadoGasRepository(db).filtro_mes(1, 2024)
+
+    assert sorted(registro.DATA for registro in registros) == [date(2024, 1, 30), date(2024, 1, 31)]
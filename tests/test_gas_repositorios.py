@@ -0,0 +1,82 @@
+"""Substituicao em lote das linhas atuais de MercadoGas."""
+from datetime import date
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.schema import CreateTable
+
+from bd_pcp.db.models.mercado_gas import MercadoGas
+from bd_pcp.db.repositories import gas_repositorios
+from bd_pcp.db.repositories.gas_repositorios import MercadoGasRepository
+from bd_pcp.schemas.mercado_gas_schema import MercadoGasCriacao
+
+
+def _registro(data, aba, produto):
+    return MercadoGasCriacao(DATA=data, PLANILHA="plan.xlsx", ABA=aba, PRODUTO=produto, UNIDADE="ton", VALOR=1.0)
+
+
+def test_substituicao_conta_as_linhas_de_cada_chave(fabrica_sessao, monkeypatch):
+    # Blocos de 2 chaves: a contagem acumula entre os blocos.
+    monkeypatch.setattr(gas_repositorios, "TAMANHO_LOTE_CHAVES", 2)
+    janeiro, fevereiro = date(2024, 1, 1), date(2024, 2, 1)
+    with fabrica_sessao() as db:
+        repositorio = MercadoGasRepository(db)
+        repositorio.inserir_em_lote([
+            _registro(janeiro, "GLP", "GLP"),
+            _registro(janeiro, "GLP", "C5+"),
+            _registro(janeiro, "GN", "GN"),
+            _registro(fevereiro, "GLP", "GLP"),
+        ])
+        chaves = [
+            (janeiro, "plan.xlsx", "GLP"),
+            (janeiro, "plan.xlsx", "GN"),
+            (fevereiro, "plan.xlsx", "GLP"),
+            (fevereiro, "plan.xlsx", "GN"),
+            (janeiro, "plan.xlsx", "GLP"),
+        ]
+
+        afetados = repositorio.atualizar_atualizado_em_em_lote(chaves)
+        db.commit()
+        atuais = db.scalar(select(func.count()).select_from(MercadoGas).where(MercadoGas.ATUALIZADO_EM.is_(None)))
+        repetidos = repositorio.atualizar_atualizado_em_em_lote(chaves[:1])
+
+    assert afetados == {
+        (janeiro, "plan.xlsx", "GLP"): 2,
+        (janeiro, "plan.xlsx", "GN"): 1,
+        (fevereiro, "plan.xlsx", "GLP"): 1,
+        (fevereiro, "plan.xlsx", "GN"): 0,
+    }
+    assert atuais == 0
+    assert repetidos == {(janeiro, "plan.xlsx", "GLP"): 0}
+
+
+def test_linha_gravada_com_outra_grafia_conta_para_a_chave_informada(fabrica_sessao):
+    # ABA sem distincao de maiusculas, como na collation padrao do SQL Server.
+    tabela = MercadoGas.__table__
+    with fabrica_sessao() as db:
+        ddl = str(CreateTable(tabela).compile(db.get_bind()))
+        db.execute(text(f'DROP TABLE "{tabela.name}"'))
+        db.execute(text(ddl.replace('"ABA" VARCHAR(100)', '"ABA" VARCHAR(100) COLLATE NOCASE')))
+        janeiro = date(2024, 1, 1)
+        repositorio = MercadoGasRepository(db)
+        repositorio.inserir_em_lote([_registro(janeiro, "glp", "GLP"), _registro(janeiro, "GN", "GN")])
+
+        afetados = repositorio.atualizar_atualizado_em_em_lote([
+            (janeiro, "plan.xlsx", "GLP"),
+            (janeiro, "plan.xlsx", "GN"),
+        ])
+
+    assert afetados == {(janeiro, "plan.xlsx", "GLP"): 1, (janeiro, "plan.xlsx", "GN"): 1}
+
+
+def test_criar_em_lote_le_os_registros_em_uma_consulta_por_bloco(fabrica_sessao, monkeypatch):
+    monkeypatch.setattr(gas_repositorios, "TAMANHO_LOTE_IDS", 2)
+    dados = [_registro(date(2024, 1, dia), "GLP", "GLP") for dia in (3, 1, 2)]
+    comandos = []
+    with fabrica_sessao() as db:
+        event.listen(db.get_bind(), "before_cursor_execute", lambda *args: comandos.append(args[2]))
+
+        criados = MercadoGasRepository(db).criar_em_lote(dados)
+
+        assert [criado.DATA for criado in criados] == [registro.DATA for registro in dados]
+        assert all(criado.ID and criado.CRIADO_EM for criado in criados)
+    assert len([comando for comando in comandos if comando.lstrip().upper().startswith("SELECT")]) == 2
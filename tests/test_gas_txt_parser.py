@@ -0,0 +1,91 @@
+"""Leitura em fluxo dos uploads TXT de MercadoGas (iterar_mercado_gas_upload)."""
+from io import BytesIO
+
+import pytest
+
+from bd_pcp.services.gas_txt_parser import (
+    TAMANHO_AMOSTRA,
+    GasTxtParserError,
+    iterar_mercado_gas_upload,
+    parse_mercado_gas_upload,
+)
+
+CABECALHO = "DATA;PLANILHA;ABA;PRODUTO;LOCAL;EMPRESA;UNIDADE;VALOR\n"
+
+
+def _linhas(quantidade, local=""):
+    return "".join(
+        f"2024-01-{indice % 28 + 1:02d};plan.xlsx;GLP;P{indice};{local};;ton;{indice},5\n"
+        for indice in range(quantidade)
+    )
+
+
+def _lotes(conteudo, **opcoes):
+    return list(iterar_mercado_gas_upload(BytesIO(conteudo), **opcoes))
+
+
+@pytest.mark.parametrize("quantidade", [1, 4, 5, 9])
+def test_lotes_respeitam_o_tamanho_e_a_ordem(quantidade):
+    conteudo = (CABECALHO + _linhas(quantidade)).encode()
+
+    lotes = _lotes(conteudo, tamanho_lote=4)
+
+    assert [len(lote) for lote in lotes] == [4] * (quantidade // 4) + ([quantidade % 4] if quantidade % 4 else [])
+    assert [registro for lote in lotes for registro in lote] == parse_mercado_gas_upload(conteudo)
+
+
+def test_erros_de_lotes_diferentes_usam_a_linha_do_arquivo():
+    linhas = _linhas(7).splitlines(keepends=True)
+    linhas[1] = linhas[1].replace("2024-01-02", "ontem")
+    linhas[5] = linhas[5].replace("5,5", "abc")
+    conteudo = (CABECALHO + "".join(linhas)).encode()
+    lotes = iterar_mercado_gas_upload(BytesIO(conteudo), tamanho_lote=2)
+
+    with pytest.raises(GasTxtParserError) as erro:
+        list(lotes)
+
+    assert [mensagem.split(":")[0] for mensagem in erro.value.detail] == ["Linha 3", "Linha 7"]
+    assert erro.value.detail[0] == "Linha 3: Formato de data invalido: 'ontem'."
+
+
+def test_nenhum_lote_e_produzido_depois_do_primeiro_erro():
+    linhas = _linhas(6).splitlines(keepends=True)
+    linhas[2] = linhas[2].replace("2024-01-03", "ontem")
+    lotes = iterar_mercado_gas_upload(BytesIO((CABECALHO + "".join(linhas)).encode()), tamanho_lote=2)
+
+    assert len(next(lotes)) == 2
+    with pytest.raises(GasTxtParserError):
+        next(lotes)
+
+
+def test_byte_latin1_depois_da_amostra_usa_latin1_no_arquivo_inteiro():
+    inicio = CABECALHO + _linhas(TAMANHO_AMOSTRA // 40)
+    assert len(inicio) > TAMANHO_AMOSTRA
+    conteudo = (inicio + _linhas(1, local="Guamaré")).encode("latin-1")
+
+    lotes = _lotes(conteudo, tamanho_lote=1000)
+
+    assert lotes[-1][-1].LOCAL == "Guamaré"
+    assert [registro for lote in lotes for registro in lote] == parse_mercado_gas_upload(conteudo)
+
+
+def test_caractere_utf8_na_fronteira_da_amostra_continua_utf8():
+    prefixo = CABECALHO
+    while len(prefixo) < TAMANHO_AMOSTRA - 80:
+        prefixo += _linhas(1)
+    antes_do_local = len(prefixo) + len("2024-01-01;plan.xlsx;GLP;P0;")
+    # "e" acentuado (2 bytes) comecando no ultimo byte do primeiro bloco lido.
+    local = "x" * (TAMANHO_AMOSTRA - 1 - antes_do_local) + "é"
+    conteudo = (prefixo + _linhas(1, local=local)).encode()
+    assert conteudo[TAMANHO_AMOSTRA - 1:TAMANHO_AMOSTRA + 1] == "é".encode()
+
+    lotes = _lotes(conteudo, tamanho_lote=1000)
+
+    assert lotes[-1][-1].LOCAL == local
+
+
+def test_arquivo_vazio():
+    with pytest.raises(GasTxtParserError, match="Arquivo vazio"):
+        _lotes(b"")
+    with pytest.raises(GasTxtParserError, match="Arquivo vazio"):
+        _lotes(b"  \n\n")
@@ -0,0 +1,175 @@
+"""Estados das importacoes em segundo plano (GET /api/gas/jobs/{id})."""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from bd_pcp.db.models.importacao_gas import (
+    FASE_CONCLUIDA,
+    FASE_ERRO,
+    FASE_INSERCAO,
+    FASE_LEITURA,
+    FASES_EM_ANDAMENTO,
+    ImportacaoGas,
+)
+from bd_pcp.db.repositories.gas_repositorios import FUSO_FORTALEZA
+from bd_pcp.services.importacao_jobs import MENSAGEM_ABANDONADA, FilaImportacoes, fila_importacoes
+
+REGISTROS = [
+    {"DATA": "2024-01-01", "PLANILHA": "plan.xlsx", "ABA": "GLP", "PRODUTO": "GLP", "UNIDADE": "ton", "VALOR": 1.5},
+    {"DATA": "2024-01-02", "PLANILHA": "plan.xlsx", "ABA": "GLP", "PRODUTO": "GLP", "UNIDADE": "ton", "VALOR": 2.5},
+]
+
+
+def _aguardar(cliente, endereco, tempo_maximo=10.0):
+    """Consulta o job ate ele sair das fases em andamento."""
+    limite = time.monotonic() + tempo_maximo
+    while True:
+        job = cliente.get(endereco).json()
+        if job["FASE"] not in ("na_fila", *FASES_EM_ANDAMENTO) or time.monotonic() > limite:
+            return job
+        time.sleep(0.05)
+
+
+def _arquivos_pendentes():
+    if not os.path.isdir(fila_importacoes.diretorio):
+        return []
+    return os.listdir(fila_importacoes.diretorio)
+
+
+def test_upsert_assincrono_conclui_e_remove_o_arquivo(cliente):
+    resposta = cliente.post("/api/gas/upsert", params={"assincrono": True}, json=REGISTROS)
+
+    assert resposta.status_code == 202
+    assert resposta.headers["location"] == f"/api/gas/jobs/{resposta.json()['ID']}"
+    job = _aguardar(cliente, resposta.headers["location"])
+    assert job["FASE"] == FASE_CONCLUIDA
+    assert job["LINHAS_LIDAS"] == job["LINHAS_INSERIDAS"] == 2
+    assert job["ERROS"] is None
+    assert job["INICIADO_EM"] and job["CONCLUIDO_EM"]
+    assert _arquivos_pendentes() == []
+    assert len(cliente.get("/api/gas/").json()) == 2
+
+
+def test_upload_assincrono_com_linhas_invalidas_termina_em_erro(cliente):
+    conteudo = (
+        "DATA;PLANILHA;ABA;PRODUTO;LOCAL;EMPRESA;UNIDADE;VALOR\n"
+        "2024-01-01;plan.xlsx;GLP;GLP;;;ton;1,5\n"
+        "ontem;plan.xlsx;GLP;GLP;;;ton;2\n"
+    ).encode()
+
+    resposta = cliente.post(
+        "/api/gas/upload-txt",
+        params={"assincrono": True},
+        files={"arquivo": ("dados.txt", conteudo, "text/plain")},
+    )
+
+    job = _aguardar(cliente, resposta.headers["location"])
+    assert job["FASE"] == FASE_ERRO
+    assert job["ERROS"] == ["Linha 3: Formato de data invalido: 'ontem'."]
+    assert job["LINHAS_INSERIDAS"] == 0
+    assert _arquivos_pendentes() == []
+    assert cliente.get("/api/gas/").json() == []
+
+
+def test_falha_apos_reservar_grava_o_erro(cliente, monkeypatch):
+    def falhar(db, importacao):
+        raise RuntimeError("banco indisponivel")
+
+    monkeypatch.setattr(FilaImportacoes, "_ja_importado", staticmethod(falhar))
+
+    resposta = cliente.post("/api/gas/upsert", params={"assincrono": True}, json=REGISTROS)
+
+    job = _aguardar(cliente, resposta.headers["location"])
+    assert job["FASE"] == FASE_ERRO
+    assert job["ERROS"] == ["Falha ao executar a importacao: banco indisponivel"]
+    assert job["CONCLUIDO_EM"]
+    assert _arquivos_pendentes() == []
+
+
+def test_conteudo_identico_na_fila_reutiliza_a_importacao(cliente, monkeypatch):
+    # Sem threads na fila, a primeira importacao continua na_fila.
+    monkeypatch.setattr(FilaImportacoes, "_submeter", lambda self, id_: None)
+
+    primeira = cliente.post("/api/gas/upsert", params={"assincrono": True}, json=REGISTROS).json()
+    segunda = cliente.post("/api/gas/upsert", params={"assincrono": True}, json=REGISTROS).json()
+    forcada = cliente.post("/api/gas/upsert", params={"assincrono": True, "forcar": True}, json=REGISTROS).json()
+
+    assert primeira["FASE"] == "na_fila"
+    assert segunda["ID"] == primeira["ID"]
+    assert forcada["ID"] != primeira["ID"]
+
+
+@pytest.fixture
+def importacoes_em_andamento(fabrica_sessao, tmp_path):
+    """Uma importacao sem sinal de vida ha uma hora, uma recente e uma ja concluida."""
+    agora = datetime.now(FUSO_FORTALEZA).replace(tzinfo=None)
+    casos = {
+        "abandonada": (FASE_INSERCAO, agora - timedelta(hours=1)),
+        "recente": (FASE_LEITURA, agora),
+        "concluida": (FASE_CONCLUIDA, agora - timedelta(hours=1)),
+    }
+    with fabrica_sessao() as db:
+        for id_, (fase, atividade) in casos.items():
+            caminho = tmp_path / f"{id_}.dat"
+            caminho.write_bytes(b"[]")
+            db.add(ImportacaoGas(
+                ID=id_, TIPO="upsert", CAMINHO=str(caminho), FASE=fase,
+                INICIADO_EM=atividade, ATIVIDADE_EM=atividade,
+            ))
+        db.commit()
+    return tmp_path
+
+
+def test_importacao_abandonada_vira_erro_e_perde_o_arquivo(fabrica_sessao, importacoes_em_andamento):
+    assert fila_importacoes.encerrar_abandonadas() == 1
+
+    with fabrica_sessao() as db:
+        importacoes = {importacao.ID: importacao for importacao in db.query(ImportacaoGas)}
+        assert importacoes["abandonada"].FASE == FASE_ERRO
+        assert MENSAGEM_ABANDONADA in importacoes["abandonada"].ERROS
+        assert importacoes["recente"].FASE == FASE_LEITURA
+        assert importacoes["concluida"].FASE == FASE_CONCLUIDA
+    assert not (importacoes_em_andamento / "abandonada.dat").exists()
+    assert (importacoes_em_andamento / "recente.dat").exists()
+
+
+def test_importacao_em_execucao_neste_processo_nao_e_abandonada(fabrica_sessao, importacoes_em_andamento, monkeypatch):
+    monkeypatch.setattr(fila_importacoes, "_ativas", {"abandonada"})
+
+    assert fila_importacoes.encerrar_abandonadas() == 0
+
+    with fabrica_sessao() as db:
+        assert db.get(ImportacaoGas, "abandonada").FASE == FASE_INSERCAO
+
+
+def _aguardar_estatistica(chave, valor, tempo_maximo=10.0):
+    limite = time.monotonic() + tempo_maximo
+    while fila_importacoes.estatisticas()[chave] != valor and time.monotonic() < limite:
+        time.sleep(0.01)
+    return fila_importacoes.estatisticas()[chave]
+
+
+def test_encerrar_desconta_as_importacoes_canceladas(fabrica_sessao, monkeypatch):
+    liberar = threading.Event()
+    monkeypatch.setattr(fila_importacoes, "max_threads", 1)
+    monkeypatch.setitem(fila_importacoes._executores, "bloqueante", lambda db, importacao, progresso: liberar.wait(10))
+    concluidas = fila_importacoes.estatisticas()["concluidas"]
+
+    with fabrica_sessao() as db:
+        for indice in range(3):
+            fila_importacoes.enfileirar(db, "bloqueante", f"[{indice}]".encode())
+        assert _aguardar_estatistica("em_execucao", 1) == 1
+        assert fila_importacoes.estatisticas()["na_fila"] == 2
+
+        fila_importacoes.encerrar()
+        assert fila_importacoes.estatisticas()["na_fila"] == 0
+
+        liberar.set()
+        assert _aguardar_estatistica("em_execucao", 0) == 0
+        # A fila volta a funcionar no mesmo processo, com a contagem correta.
+        fila_importacoes.enfileirar(db, "bloqueante", b"[3]")
+        assert _aguardar_estatistica("concluidas", concluidas + 2) == concluidas + 2
+    assert fila_importacoes.estatisticas()["na_fila"] == 0
@@ -0,0 +1,66 @@
+"""Exposicao de metricas em /metrics (formato texto do Prometheus)."""
+import re
+
+AMOSTRA = re.compile(r"^(?P<nome>[a-z_]+)(?P<rotulos>\{.*\})? (?P<valor>\S+)$")
+
+
+def _amostras(cliente):
+    resposta = cliente.get("/metrics")
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/plain; version=0.0.4")
+    amostras = {}
+    for linha in resposta.text.splitlines():
+        if linha.startswith("#"):
+            continue
+        encontrada = AMOSTRA.match(linha)
+        assert encontrada, linha
+        amostras[encontrada["nome"] + (encontrada["rotulos"] or "")] = float(encontrada["valor"])
+    return amostras
+
+
+def test_histograma_da_rota_conta_a_requisicao(cliente):
+    serie = 'pcp_http_requisicao_duracao_segundos_count{metodo="GET",rota="/api/gas/jobs/{importacao_id}",status="404"}'
+    antes = _amostras(cliente).get(serie, 0)
+
+    assert cliente.get("/api/gas/jobs/nao-existe").status_code == 404
+    depois = _amostras(cliente)
+
+    assert depois[serie] == antes + 1
+    faixa_infinita = serie.replace("_count{", "_bucket{").replace('"404"}', '"404",le="+Inf"}')
+    assert depois[faixa_infinita] == depois[serie]
+    assert depois[serie.replace("_count{", "_sum{")] > 0
+
+
+def test_caminho_sem_rota_usa_desconhecida(cliente):
+    cliente.get("/nao/existe")
+
+    assert any('rota="desconhecida"' in serie for serie in _amostras(cliente))
+
+
+def test_contadores_de_linhas_do_upsert(cliente):
+    antes = _amostras(cliente)
+    registros = [
+        {"DATA": "2024-01-01", "PLANILHA": "plan.xlsx", "ABA": "GLP", "PRODUTO": produto, "UNIDADE": "ton", "VALOR": 1.0}
+        for produto in ("GLP", "C5+")
+    ]
+
+    cliente.post("/api/gas/upsert", json=registros)
+    # forcar: um reenvio identico seria reconhecido como duplicado e nao gravaria nada.
+    cliente.post("/api/gas/upsert", params={"forcar": True}, json=registros)
+    depois = _amostras(cliente)
+
+    def incremento(nome):
+        serie = f'{nome}{{origem="upsert"}}'
+        return depois[serie] - antes.get(serie, 0)
+
+    assert incremento("pcp_gas_linhas_lidas_total") == 4
+    assert incremento("pcp_gas_linhas_inseridas_total") == 4
+    assert incremento("pcp_gas_linhas_substituidas_total") == 2
+
+
+def test_coletores_de_estatisticas(cliente):
+    amostras = _amostras(cliente)
+
+    assert "pcp_token_cache_capacidade" in amostras
+    assert "pcp_senhas_max_threads" in amostras
+    assert "pcp_gas_cache_bytes" in amostras
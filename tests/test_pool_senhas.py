@@ -0,0 +1,65 @@
+"""Pool dedicado de hash e verificacao de senhas (PoolSenhas)."""
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from bd_pcp.core.senhas import PoolSenhas
+from bd_pcp.db.models.usuario import Usuario
+from bd_pcp.routers import usuario_autenticacao
+
+
+async def _ocupar(pool: PoolSenhas, liberar: threading.Event, quantidade: int):
+    """Submete ``quantidade`` tarefas que so terminam quando ``liberar`` for sinalizado."""
+    tarefas = [asyncio.ensure_future(pool.executar(liberar.wait, 10)) for _ in range(quantidade)]
+    while pool.estatisticas()["em_execucao"] < min(quantidade, pool.max_threads):
+        await asyncio.sleep(0.01)
+    return tarefas
+
+
+def test_fila_cheia_recusa_com_503():
+    async def cenario():
+        pool = PoolSenhas(max_threads=1, max_fila=1)
+        liberar = threading.Event()
+        # Uma tarefa em execucao e uma na fila: a proxima excede max_fila.
+        tarefas = await _ocupar(pool, liberar, 2)
+        try:
+            with pytest.raises(HTTPException) as erro:
+                await pool.executar(lambda: None)
+        finally:
+            liberar.set()
+            await asyncio.gather(*tarefas)
+        return pool, erro.value
+
+    pool, erro = asyncio.run(cenario())
+
+    assert erro.status_code == 503
+    assert erro.headers == {"Retry-After": "1"}
+    estatisticas = pool.estatisticas()
+    assert estatisticas["recusadas"] == 1
+    assert estatisticas["concluidas"] == 2
+    assert estatisticas["na_fila"] == estatisticas["em_execucao"] == 0
+
+
+def test_verificar_e_gerar_hash():
+    async def cenario():
+        pool = PoolSenhas(max_threads=2, max_fila=4)
+        senha_hash = await pool.gerar_hash("segredo")
+        return await pool.verificar("segredo", senha_hash), await pool.verificar("outra", senha_hash)
+
+    assert asyncio.run(cenario()) == (True, False)
+
+
+def test_login_com_pool_cheio_retorna_503(cliente, fabrica_sessao, monkeypatch):
+    with fabrica_sessao() as db:
+        usuario = Usuario(USERNAME="operador", EMAIL="operador@empresa.com", IS_ACTIVE=True)
+        usuario.set_password("senha-operador")
+        db.add(usuario)
+        db.commit()
+    monkeypatch.setattr(usuario_autenticacao, "pool_senhas", PoolSenhas(max_threads=1, max_fila=0))
+
+    resposta = cliente.post("/api/auth/login", json={"username": "operador", "password": "senha-operador"})
+
+    assert resposta.status_code == 503
+    assert resposta.headers["retry-after"] == "1"
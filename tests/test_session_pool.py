@@ -0,0 +1,30 @@
+"""Estatisticas do pool de conexoes instrumentado."""
+from sqlalchemy import create_engine, text
+
+from bd_pcp.core import session
+from bd_pcp.core.config import settings
+from bd_pcp.core.session import PoolInstrumentado, estatisticas_pool
+
+
+def test_estatisticas_usam_a_configuracao_do_pool(tmp_path, monkeypatch):
+    max_overflow = settings.DB_MAX_OVERFLOW + 3
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=PoolInstrumentado,
+        pool_size=2,
+        max_overflow=max_overflow,
+    )
+    monkeypatch.setattr(session, "engine", engine)
+
+    with engine.connect() as conexao:
+        conexao.execute(text("SELECT 1"))
+        em_uso = estatisticas_pool()
+    engine.dispose()
+    apos_dispose = estatisticas_pool()
+
+    assert em_uso["max_overflow"] == max_overflow
+    assert em_uso["em_uso"] == 1
+    assert em_uso["aquisicoes"] == 1
+    # dispose() recria o pool com a mesma configuracao e preserva as metricas.
+    assert apos_dispose["max_overflow"] == max_overflow
+    assert apos_dispose["aquisicoes"] == 1